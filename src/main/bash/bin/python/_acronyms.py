@@ -0,0 +1,151 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _acronyms - compact in-memory store for acronyms: slotted records and a sorted index of short forms
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import bisect           ## lookup in sorted short forms
+import operator         ## sort key for the index
+from array import array ## group offsets of the index
+
+
+
+##
+## Global variables
+##
+fields = {                  ## YAML keys of an acronym and the record slots they are stored in
+    'short': 'short',
+    'short-target': 'short_target',
+    'long': 'long',
+    'long-target': 'long_target',
+    'description': 'description',
+    'notes': 'notes',
+    'urls': 'urls',
+    'src-file': 'src_file'
+}
+shared = {}                 ## keys of maps used by all acronyms (languages, URL tags), each key string exists once
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: copy a map of a YAML entry (e.g. languages or URLs) with shared keys, None if not set
+##
+def compact(value):
+    if type(value) is dict:
+        return { shared.setdefault(key, key): value[key] for key in value }
+    return value
+
+
+
+##
+## class: an acronym, read like the YAML dictionary it was created from: acronym['short'], 'notes' in acronym, acronym.get('urls')
+## - only known keys are kept, keys of maps are shared, so language keys and URL tags exist once
+##
+class Acronym:
+    __slots__ = ( 'short', 'short_target', 'long', 'long_target', 'description', 'notes', 'urls', 'src_file' )
+
+    def __init__(self, entries, src_file):
+        get = entries.get
+        self.short = get('short')
+        self.short_target = compact(get('short-target'))
+        self.long = compact(get('long'))
+        self.long_target = compact(get('long-target'))
+        self.description = compact(get('description'))
+        self.notes = compact(get('notes'))
+        self.urls = compact(get('urls'))
+        self.src_file = src_file
+
+    def __getitem__(self, name):
+        value = getattr(self, fields[name]) if name in fields else None
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return name in fields and getattr(self, fields[name]) is not None
+
+    def get(self, name, default=None):
+        value = getattr(self, fields[name]) if name in fields else None
+        return default if value is None else value
+
+
+
+##
+## class: index of acronyms by lower case short form, read like a dictionary of lists: idx.keys(), idx[short], short in idx
+## - keys are sorted, acronyms with the same short form are in the order they were added to the store
+## - entries has all acronym keys in index order, groups are ranges in entries
+##
+class Index:
+    __slots__ = ( 'shorts', 'starts', 'entries' )
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.shorts = []
+        self.starts = array('I', [ 0 ])
+        self.entries = []
+
+    def build(self, acronyms):
+        self.clear()
+        items = [ (acronyms[key].short.lower(), key) for key in acronyms ]
+        items.sort(key=operator.itemgetter(0))
+        for short, key in items:
+            if len(self.shorts) == 0 or self.shorts[-1] != short:
+                if len(self.shorts) > 0:
+                    self.starts.append(len(self.entries))
+                self.shorts.append(short)
+            self.entries.append(key)
+        if len(self.shorts) > 0:
+            self.starts.append(len(self.entries))
+
+    def position(self, short):
+        index = bisect.bisect_left(self.shorts, short)
+        if index < len(self.shorts) and self.shorts[index] == short:
+            return index
+        return -1
+
+    def keys(self):
+        return self.shorts
+
+    def __getitem__(self, short):
+        index = self.position(short)
+        if index < 0:
+            raise KeyError(short)
+        return self.entries[self.starts[index]:self.starts[index + 1]]
+
+    def __contains__(self, short):
+        return self.position(short) >= 0
+
+    def __len__(self):
+        return len(self.shorts)
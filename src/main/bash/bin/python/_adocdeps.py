@@ -0,0 +1,226 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _adocdeps - dependency graph of ADOC documents and the files they include, with content hashes
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import os               ## operating system, e.g. file handling
+import sys              ## system for stderr
+import re               ## include directives and attributes
+import json             ## dependency graph file
+import hashlib          ## content hash of documents and included files
+
+
+
+##
+## Global variables
+##
+attributes = {}             ## attributes for include paths, as given to asciidoctor, they overwrite attributes set in documents
+
+graph_version = 1           ## version of the graph layout, change when layout changes
+graph = {}                  ## dependency graph: version, files with hash and includes, and documents per target
+visited = set()             ## files visited in this run
+hashed = [0]                ## number of files read and hashed in this run
+
+include_directive = re.compile(r'^\|?[ \t]*include::([^\[\s][^\[]*)\[[^\]]*\][ \t]*$', re.M)
+attribute_entry = re.compile(r'^:([A-Za-z0-9_][A-Za-z0-9_-]*):[ \t]*(.*?)[ \t]*$', re.M)
+attribute_reference = re.compile(r'\{([A-Za-z0-9_][A-Za-z0-9_-]*)\}')
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: read dependency graph, empty if not found or not usable
+##
+def read_graph(graph_file):
+    global graph
+
+    try:
+        with open(graph_file, 'r') as stream:
+            graph = json.load(stream)
+    except (OSError, ValueError):
+        graph = {}
+    if not isinstance(graph, dict) or graph.get('version') != graph_version:
+        graph = { 'version': graph_version, 'files': {}, 'targets': {} }
+
+
+
+##
+## function: write dependency graph atomically
+##
+def write_graph(graph_file):
+    directory = os.path.dirname(graph_file)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    tmp = graph_file + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp, 'w') as stream:
+        json.dump(graph, stream, indent=1, sort_keys=True)
+    os.replace(tmp, graph_file)
+
+
+
+##
+## function: hash, includes, and attribute entries of a file, None if the file cannot be read
+## - files are only read if mtime or size changed since the last run
+##
+def get_file(file):
+    try:
+        st = os.stat(file)
+    except OSError:
+        return None
+    visited.add(file)
+    entry = graph['files'].get(file)
+    if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return entry
+
+    try:
+        with open(file, 'rb') as stream:
+            content = stream.read()
+    except OSError:
+        return None
+    hashed[0] += 1
+    text = content.decode('utf-8', errors='replace')
+    entry = [ st.st_mtime_ns, st.st_size, hashlib.sha1(content).hexdigest(), include_directive.findall(text), attribute_entry.findall(text) ]
+    graph['files'][file] = entry
+    return entry
+
+
+
+##
+## function: substitute attribute references, returns None if an attribute is not set
+##
+def substitute(text, defined):
+    missing = []
+    def value(match):
+        name = match.group(1)
+        if name in attributes:
+            return attributes[name]
+        if name in defined:
+            return defined[name]
+        missing.append(name)
+        return match.group(0)
+    ret = attribute_reference.sub(value, text)
+    if len(missing) > 0:
+        return None
+    return ret
+
+
+
+##
+## function: resolve an include target to a file name, None for URIs and targets with attributes that are not set
+##
+def resolve(include, directory, defined):
+    if '://' in include:
+        return None
+    path = substitute(include.strip(), defined)
+    if path is None:
+        return None
+    return os.path.abspath(os.path.join(directory, path))
+
+
+
+##
+## function: all files a document depends on, returns map of file name to hash (None for missing files)
+##
+def get_dependencies(doc):
+    ret = {}
+    defined = {}
+    todo = [ doc ]
+    while len(todo) > 0:
+        file = todo.pop()
+        if file in ret:
+            continue
+        entry = get_file(file)
+        if entry is None:
+            ret[file] = None
+            continue
+        ret[file] = entry[2]
+        for name, value in entry[4]:
+            value = substitute(value, defined)
+            if value is not None:
+                defined[name] = value
+        for include in reversed(entry[3]):
+            path = resolve(include, os.path.dirname(file), defined)
+            if path is not None:
+                todo.append(path)
+    return ret
+
+
+
+##
+## function: file name of a rendered document, keeping its path relative to the docs directory
+##
+def output_file(doc, docs_dir, output_dir, target):
+    rel = os.path.basename(doc)
+    if docs_dir != '':
+        rel = os.path.relpath(os.path.abspath(doc), os.path.abspath(docs_dir))
+    return os.path.join(output_dir, os.path.splitext(rel)[0] + "." + target)
+
+
+
+##
+## function: documents of a target in the graph, a change of attributes drops all documents rendered before
+##
+def get_section(target):
+    section = graph['targets'].get(target)
+    if section is None or section.get('attributes') != attributes:
+        section = { 'attributes': attributes, 'built': {}, 'pending': {} }
+        graph['targets'][target] = section
+    return section
+
+
+
+##
+## function: remove files no document depends on any more from the graph
+##
+def prune():
+    used = set(visited)
+    for section in graph['targets'].values():
+        for deps in list(section['built'].values()) + list(section['pending'].values()):
+            used.update(deps)
+    for file in list(graph['files']):
+        if not file in used:
+            del graph['files'][file]
+
+
+
+##
+## function: record documents as rendered, with the dependencies found when they were checked
+##
+def record(target, docs):
+    section = graph['targets'].get(target, { 'pending': {} })
+    for doc in docs:
+        key = os.path.abspath(doc)
+        if key in section['pending']:
+            section['built'][key] = section['pending'].pop(key)
+        else:
+            print("    > not checked before, not recorded: %s" % doc, file=sys.stderr)
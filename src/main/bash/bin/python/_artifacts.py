@@ -0,0 +1,175 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _artifacts - index of artifacts (PDFs etc.) in the library home, with a persistent cache refreshed by directory mtime
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and cache settings
+import os               ## operating system, scandir and stat
+import pickle           ## persist the index
+import bisect           ## prefix lookup in sorted names
+import time             ## timings for scan and lookups
+
+
+
+##
+## Global variables
+##
+index_version = 1           ## version of the index layout, change when layout changes
+library_home = ''           ## library home directory of the index
+directories = {}            ## index, key is directory relative to library home and value is (mtime_ns, sorted names, sub directories)
+
+stats = {}                  ## statistics of the last scan: directories, scanned, unchanged, artifacts, seconds
+lookups = [0, 0.0]          ## number of lookups and seconds spent in lookups
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset lookup and scan statistics, for the next task in the same process
+##
+def reset():
+    global stats
+    global lookups
+
+    stats = {}
+    lookups = [0, 0.0]
+
+
+
+##
+## function: read persisted index, empty if not found or not usable
+##
+def read_index(fn):
+    try:
+        with open(fn, 'rb') as stream:
+            index = pickle.load(stream)
+        if index.get('version') == index_version:
+            return index['directories']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, KeyError):
+        pass
+    return {}
+
+
+
+##
+## function: write index atomically, failure to write is not an error
+##
+def write_index(fn):
+    try:
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        with open(fn + '.tmp', 'wb') as stream:
+            pickle.dump({ 'version': index_version, 'directories': directories }, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(fn + '.tmp', fn)
+    except OSError:
+        pass
+
+
+
+##
+## function: scan library home, directories with unchanged mtime are not listed again
+##
+def scan(home):
+    global library_home
+    start = time.perf_counter()
+    library_home = home
+    fn = _corpus.cache_file(home, 'artifacts')
+    last = read_index(fn) if _corpus.use_cache == True else {}
+    directories.clear()
+    scanned = 0
+
+    todo = [ '' ]
+    while len(todo) > 0:
+        rel = todo.pop()
+        path = home + '/' + rel if rel != '' else home
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        if rel in last and last[rel][0] == mtime:
+            directories[rel] = last[rel]
+        else:
+            names = []
+            subdirs = []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name.startswith('.'):
+                            continue
+                        names.append(entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+            except OSError:
+                continue
+            names.sort()
+            directories[rel] = (mtime, names, subdirs)
+            scanned += 1
+        for subdir in directories[rel][2]:
+            todo.append(rel + '/' + subdir if rel != '' else subdir)
+
+    if _corpus.use_cache == True and (scanned > 0 or len(last) != len(directories)):
+        write_index(fn)
+
+    stats['directories'] = len(directories)
+    stats['scanned'] = scanned
+    stats['unchanged'] = len(directories) - scanned
+    stats['artifacts'] = sum(len(value[1]) - len(value[2]) for value in directories.values())
+    stats['seconds'] = time.perf_counter() - start
+
+
+
+##
+## function: find artifacts for a directory and base name, same as glob of dir/basename*.* but a lookup in the index
+##
+def find(rel, basename):
+    start = time.perf_counter()
+    files = []
+    if rel in directories:
+        names = directories[rel][1]
+        index = bisect.bisect_left(names, basename)
+        while index < len(names) and names[index].startswith(basename):
+            if '.' in names[index][len(basename):]:
+                files.append(library_home + '/' + rel + '/' + names[index] if rel != '' else library_home + '/' + names[index])
+            index += 1
+    lookups[0] += 1
+    lookups[1] += time.perf_counter() - start
+    return files
+
+
+
+##
+## function: print statistics of the last scan and of all lookups
+##
+def print_stats():
+    print("    > artifact index: %d directories (%d scanned, %d unchanged), %d artifacts in %.3fs" % (stats['directories'], stats['scanned'], stats['unchanged'], stats['artifacts'], stats['seconds']))
+    if lookups[0] > 0:
+        print("    > artifact lookups: %d in %.3fs" % (lookups[0], lookups[1]))
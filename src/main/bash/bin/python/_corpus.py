@@ -0,0 +1,392 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## _corpus - loads YAML sources of the SKB, with a persistent cache of parsed entries
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _loader          ## parsing YAML files, libyaml if available
+import os               ## operating system, e.g. file handling
+import sys              ## system for stderr
+import pickle           ## persist the cache
+import hashlib          ## content hash of YAML files
+import time             ## timings for cold/warm loads
+import yaml             ## YAML errors
+import multiprocessing  ## process pool for parallel parsing
+
+
+
+##
+## Global variables
+##
+cache_version = 2           ## version of the cache layout, change when layout changes
+default_cache_dir = os.environ.get('SKB_DASHBOARD_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'skb-dashboard'))
+cache_dir = default_cache_dir   ## cache directory, tasks set it with --cache-dir
+use_cache = True            ## use the cache, False means parse all files every time
+jobs = 1                    ## number of parallel jobs for parsing YAML files
+keep = False                ## keep loaded files in memory, later loads of the same files are not checked again
+kept = {}                   ## loaded files kept in memory, key is YAML directory and value is (files, parsed YAML files)
+
+stats = {}                  ## statistics of the last load: files, parsed, cached, seconds, state
+digests = {}                ## SHA-1 of loaded files, key is file name
+errors = {}                 ## YAML errors of files that could not be parsed, key is file name
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset settings and statistics, for the next task in the same process
+## - files loaded in keep mode stay, with their digests and YAML errors, they are what the next task should use
+##
+def reset():
+    global cache_dir
+    global use_cache
+    global jobs
+    global stats
+
+    cache_dir = default_cache_dir
+    use_cache = True
+    jobs = 1
+    stats = {}
+
+
+
+##
+## function: name of a cache file for a YAML directory, other modules use their own name
+##
+def cache_file(yaml_dir, name='corpus'):
+    digest = hashlib.sha1(os.path.abspath(yaml_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, name + '-' + digest + '.pickle')
+
+
+
+##
+## function: name of the cache shard of one directory of a YAML directory
+## - shards are in a directory named like the cache file, one shard per directory of YAML files
+##
+def shard_file(yaml_dir, directory):
+    digest = hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_file(yaml_dir)[:-len('.pickle')], digest + '.pickle')
+
+
+
+##
+## function: read cache file, returns empty cache if not found or not usable
+##
+def read_cache(fn):
+    try:
+        with open(fn, 'rb') as stream:
+            cache = pickle.load(stream)
+        if cache.get('version') == cache_version:
+            return cache['files']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+        pass
+    return None
+
+
+
+##
+## function: write cache file atomically, failure to write is not an error
+##
+def write_cache(fn, files):
+    try:
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        tmp = fn + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'wb') as stream:
+            pickle.dump({'version': cache_version, 'files': files}, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, fn)
+    except OSError as exc:
+        print("    > could not write cache %s: %s" % (fn, exc), file=sys.stderr)
+
+
+
+##
+## function: parse YAML content, returns parsed YAML and error message (None if parsed)
+##
+def parse(content):
+    try:
+        return (_loader.load(content), None)
+    except yaml.YAMLError as exc:
+        return (None, str(exc))
+
+
+
+##
+## function: parse a list of YAML contents, in parallel jobs if set
+## - pool is an existing process pool, if not given a pool is created when there is enough to parse
+##
+def parse_all(contents, pool=None):
+    if pool is None and (jobs < 2 or len(contents) < jobs * 4):
+        return [parse(content) for content in contents]
+
+    start = time.perf_counter()
+    chunksize = max(1, len(contents) // (jobs * 16))
+    if pool is not None:
+        ret = pool.map(parse, contents, chunksize)
+    else:
+        with multiprocessing.get_context('fork').Pool(jobs) as pool:
+            ret = pool.map(parse, contents, chunksize)
+    _loader.record(len(contents), time.perf_counter() - start)
+    return ret
+
+
+
+##
+## function: check files against cached entries, returns True if the cache needs to be written
+## - unchanged files are added to ret and update, files that need parsing are added to pending
+##
+def check_files(files, cached, ret, update, pending):
+    dirty = False
+    for file in files:
+        try:
+            st = os.stat(file)
+        except OSError:
+            continue
+        key = os.path.abspath(file)
+        entry = cached.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            update[key] = entry
+            ret[file] = entry[3]
+            digests[file] = entry[2]
+            continue
+
+        try:
+            with open(file, 'rb') as stream:
+                content = stream.read()
+        except OSError:
+            continue
+        digest = hashlib.sha1(content).hexdigest()
+        dirty = True
+        if entry is not None and entry[2] == digest:
+            update[key] = (st.st_mtime_ns, st.st_size, digest, entry[3])
+            ret[file] = entry[3]
+            digests[file] = digest
+        else:
+            pending.append((file, key, st, digest, content))
+    return dirty
+
+
+
+##
+## function: add parse results of pending files to ret and update, returns number of files that failed
+##
+def add_parsed(pending, results, ret, update):
+    failed = 0
+    for (file, key, st, digest, content), (data, error) in zip(pending, results):
+        if error is not None:
+            errors[file] = error
+            failed += 1
+            continue
+        update[key] = (st.st_mtime_ns, st.st_size, digest, data)
+        ret[file] = data
+        digests[file] = digest
+    return failed
+
+
+
+##
+## function: group files by directory, returns map of directory to files in order of the files
+##
+def group_files(files):
+    ret = {}
+    for file in files:
+        ret.setdefault(os.path.dirname(file), []).append(file)
+    return ret
+
+
+
+##
+## function: remove the cache file of an older layout, the corpus is now cached in shards
+##
+def remove_old_cache(yaml_dir):
+    try:
+        os.remove(cache_file(yaml_dir))
+    except OSError:
+        pass
+
+
+
+##
+## function: load YAML files, returns dictionary with file name as key and parsed YAML as value
+## - files that cannot be read or parsed are not in the returned dictionary, YAML errors are in 'errors'
+## - a file is only parsed if mtime/size changed and its content hash differs from the cached one
+##
+def load(yaml_dir, files):
+    global stats
+
+    start = time.perf_counter()
+    kept_dir = os.path.abspath(yaml_dir)
+    if keep == True and kept_dir in kept and kept[kept_dir][0] == files:
+        ret = kept[kept_dir][1]
+        stats = { 'files': len(ret), 'parsed': 0, 'cached': len(ret), 'seconds': time.perf_counter() - start, 'state': 'memory' }
+        return ret
+
+    if use_cache == True:
+        remove_old_cache(yaml_dir)
+    ret = {}
+    pending = []
+    shards = {}
+    found = 0
+    for directory, dir_files in group_files(files).items():
+        cached = None
+        if use_cache == True:
+            cached = read_cache(shard_file(yaml_dir, directory))
+        if cached is None:
+            cached = {}
+        else:
+            found += 1
+        update = {}
+        dirty = check_files(dir_files, cached, ret, update, pending)
+        shards[directory] = (cached, update, dirty)
+
+    results = parse_all([item[4] for item in pending])
+    parsed = {}
+    for item, result in zip(pending, results):
+        parsed.setdefault(os.path.dirname(item[0]), []).append((item, result))
+    failed = 0
+    for directory, (cached, update, dirty) in shards.items():
+        if directory in parsed:
+            failed += add_parsed([p[0] for p in parsed[directory]], [p[1] for p in parsed[directory]], ret, update)
+            dirty = True
+        if use_cache == True and (dirty == True or update.keys() != cached.keys()):
+            write_cache(shard_file(yaml_dir, directory), update)
+
+    state = 'cold'
+    if found > 0:
+        state = 'warm'
+    if use_cache == False:
+        state = 'off'
+    stats = {
+        'files': len(ret) + failed,
+        'parsed': len(pending),
+        'cached': len(ret) + failed - len(pending),
+        'seconds': time.perf_counter() - start,
+        'state': state
+    }
+    if keep == True:
+        kept[kept_dir] = (list(files), ret)
+    return ret
+
+
+
+##
+## function: load the YAML files of one directory from its cache shard, returns dictionary like load()
+## - pool is an existing process pool for parsing, or None
+##
+def load_directory(yaml_dir, directory, files, pool=None):
+    if len(files) == 0:
+        return {}
+
+    start = time.perf_counter()
+    stats['directories'] = stats.get('directories', 0) + 1
+    fn = shard_file(yaml_dir, directory)
+    cached = None
+    if use_cache == True:
+        cached = read_cache(fn)
+    if cached is None:
+        cached = {}
+        stats['missed'] = stats.get('missed', 0) + 1
+
+    ret = {}
+    update = {}
+    pending = []
+    dirty = check_files(files, cached, ret, update, pending)
+    if len(pending) > 0:
+        results = parse_all([item[4] for item in pending], pool)
+        stats['failed'] = stats.get('failed', 0) + add_parsed(pending, results, ret, update)
+        dirty = True
+    if use_cache == True and (dirty == True or update.keys() != cached.keys()):
+        write_cache(fn, update)
+
+    stats['parsed'] = stats.get('parsed', 0) + len(pending)
+    stats['loaded'] = stats.get('loaded', 0) + len(ret)
+    stats['seconds'] = stats.get('seconds', 0) + time.perf_counter() - start
+    return ret
+
+
+
+##
+## function: stream YAML files directory by directory, yields (directory, YAML files, loaded files)
+## - tree is an iterable of (directory, YAML files), for instance _discovery.walk()
+## - loaded files is a dictionary like load() with the files of the directory only
+## - only one directory is held in memory, digests of its files are removed when the next directory is loaded
+## - in keep mode all files are loaded at once, so later loads can use them
+##
+def stream(yaml_dir, tree):
+    global stats
+
+    if keep == True:
+        tree = list(tree)
+        ret = load(yaml_dir, [ file for directory, yaml_files in tree for file in yaml_files ])
+        for directory, yaml_files in tree:
+            yield (directory, yaml_files, { file: ret[file] for file in yaml_files if file in ret })
+        return
+
+    stats = {}
+    if use_cache == True:
+        remove_old_cache(yaml_dir)
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.get_context('fork').Pool(jobs)
+    try:
+        for directory, yaml_files in tree:
+            ret = load_directory(yaml_dir, directory, yaml_files, pool)
+            yield (directory, yaml_files, ret)
+            for file in ret:
+                digests.pop(file, None)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    state = 'warm'
+    if stats.get('missed', 0) == stats.get('directories', 0):
+        state = 'cold'
+    if use_cache == False:
+        state = 'off'
+    failed = stats.get('failed', 0)
+    stats = {
+        'files': stats.get('loaded', 0) + failed,
+        'parsed': stats.get('parsed', 0),
+        'cached': stats.get('loaded', 0) + failed - stats.get('parsed', 0),
+        'seconds': stats.get('seconds', 0),
+        'state': state
+    }
+
+
+
+##
+## function: print statistics of the last load
+##
+def print_stats():
+    print("    > loaded %d YAML files (%s cache): %d parsed, %d from cache in %.3fs" % (stats['files'], stats['state'], stats['parsed'], stats['cached'], stats['seconds']))
+    _loader.print_stats()
@@ -0,0 +1,108 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _discovery - finds YAML sources of the SKB with a single traversal of the directory tree
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## keep mode, traversals are kept with the loaded files
+import os               ## operating system, scandir
+
+
+
+##
+## Global variables
+##
+kept = {}                   ## traversals kept in memory, key is YAML directory and value is directory map
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: list one directory, returns sorted YAML files and sorted sub-directories
+## - same files as glob of **/*.yaml: hidden files and directories are ignored
+##
+def list_directory(directory):
+    yaml_files = []
+    subdirs = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                subdirs.append(directory + '/' + entry.name)
+            elif entry.name.endswith('.yaml'):
+                yaml_files.append(directory + '/' + entry.name)
+    yaml_files.sort()
+    subdirs.sort()
+    return (yaml_files, subdirs)
+
+
+
+##
+## function: walk a YAML directory, yields (directory, YAML files) as directories are found
+## - directories are yielded in sorted depth-first order, including those without YAML files
+## - only the directories still to be visited are held in memory
+##
+def walk(yaml_dir):
+    todo = [ yaml_dir ]
+    while len(todo) > 0:
+        directory = todo.pop()
+        try:
+            yaml_files, subdirs = list_directory(directory)
+        except OSError:
+            continue
+        yield (directory, yaml_files)
+        todo.extend(reversed(subdirs))
+
+
+
+##
+## function: walk a YAML directory once, returns map of directory to YAML files
+## - the map has all directories below the YAML directory, in the order of walk()
+##
+def scan(yaml_dir):
+    if _corpus.keep == True and yaml_dir in kept:
+        return kept[yaml_dir]
+
+    tree = dict(walk(yaml_dir))
+
+    if _corpus.keep == True:
+        kept[yaml_dir] = tree
+    return tree
+
+
+
+##
+## function: all YAML files of a directory map, in order of traversal
+##
+def files(tree):
+    return [ file for yaml_files in tree.values() for file in yaml_files ]
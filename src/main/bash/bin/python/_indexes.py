@@ -0,0 +1,133 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _indexes - persisted indexes over a YAML directory: reading and writing them, updating them for new, changed, and removed files
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings, parsing YAML files
+import _discovery       ## finding YAML files with a single traversal
+import os               ## operating system, stat
+import sys              ## system for stderr
+import pickle           ## persist indexes
+import gc               ## no collection while unpickling an index
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: read a persisted index, returns the index dictionary or None if not found or not usable
+## - the garbage collector is paused while unpickling, indexes have no cycles and collecting only costs time
+##
+def read(fn, version):
+    gc.disable()
+    try:
+        with open(fn, 'rb') as stream:
+            index = pickle.load(stream)
+        if isinstance(index, dict) and index.get('version') == version:
+            return index
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, KeyError):
+        pass
+    finally:
+        gc.enable()
+    return None
+
+
+
+##
+## function: write an index atomically, failure to write is not an error
+##
+def write(fn, version, index, name):
+    try:
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        tmp = fn + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'wb') as stream:
+            pickle.dump(dict(index, version=version), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, fn)
+    except OSError as exc:
+        print("    > could not write %s %s: %s" % (name, fn, exc), file=sys.stderr)
+
+
+
+##
+## function: update indexes of a YAML directory, files new or changed for any index are parsed once for all of them
+## - indexes is a list of (files, add, remove)
+##   - files maps a file relative to the YAML directory to (mtime_ns, size, entry id or -1), it is updated
+##   - add(key, entries) adds the entry of a parsed file and returns its entry id, remove(entry id) removes it
+## - returns a list of (parsed, removed, errors) in the order of indexes
+##
+def update(yaml_dir, indexes):
+    seen = set()
+    changed = {}
+    for directory, yaml_files in _discovery.walk(yaml_dir):
+        for file in yaml_files:
+            rel = file[len(yaml_dir)+1:]
+            seen.add(rel)
+            try:
+                st = os.stat(file)
+            except OSError:
+                continue
+            for number, (files, add, remove) in enumerate(indexes):
+                last = files.get(rel)
+                if last is None or last[0] != st.st_mtime_ns or last[1] != st.st_size:
+                    changed.setdefault(rel, (file, st, set()))[2].add(number)
+
+    ret = []
+    for files, add, remove in indexes:
+        removed = [ rel for rel in files if not rel in seen ]
+        for rel in removed:
+            if files[rel][2] >= 0:
+                remove(files[rel][2])
+            del files[rel]
+        ret.append([ 0, len(removed), 0 ])
+
+    contents = []
+    for rel, (file, st, numbers) in changed.items():
+        try:
+            with open(file, 'rb') as stream:
+                contents.append(stream.read())
+        except OSError:
+            contents.append(b'')
+    for (rel, (file, st, numbers)), (data, error) in zip(changed.items(), _corpus.parse_all(contents)):
+        usable = error is None and isinstance(data, dict) and len(data) == 1 and isinstance(data[list(data.keys())[0]], dict)
+        for number in numbers:
+            files, add, remove = indexes[number]
+            if rel in files and files[rel][2] >= 0:
+                remove(files[rel][2])
+            eid = -1
+            if usable == True:
+                key = list(data.keys())[0]
+                eid = add(key, data[key])
+            else:
+                ret[number][2] += 1
+            files[rel] = (st.st_mtime_ns, st.st_size, eid)
+            ret[number][0] += 1
+    return [ tuple(item) for item in ret ]
@@ -0,0 +1,287 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _libindex - persisted secondary indexes of library entries (year, type, title, URL tags), updated incrementally with the person index
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings
+import _indexes         ## reading, writing, and updating persisted indexes
+import _persons         ## person index, updated together with this index
+import sys              ## interning values
+import time             ## timings for updates
+import bisect           ## year ranges in the sorted year index
+from array import array ## compact sorted year index
+
+
+
+##
+## Global variables
+## - persons are searched in the person index of _persons, entries are matched by key
+##
+index_version = 2           ## version of the index layout, change when layout changes
+
+keys = []                   ## entry keys, position is the entry id, None for unused ids
+titles = []                 ## entry titles with title addon, position is the entry id
+years = []                  ## entry years, position is the entry id, -1 if not set
+types = []                  ## entry types, position is the entry id, '' if not set
+tags = []                   ## URL tags of each entry, position is the entry id
+ids = {}                    ## entry id of each key
+
+by_type = {}                ## type index, key is type and value is set of entry ids
+by_tag = {}                 ## URL tag index, key is tag and value is set of entry ids
+year_order = array('I')     ## entry ids with a year sorted by year, rebuilt when entries changed
+year_values = array('i')    ## years in the order of year_order, for bisect
+
+files = {}                  ## indexed files, key is file relative to the YAML directory and value is (mtime_ns, size, entry id or -1)
+free = []                   ## unused entry ids of removed entries
+
+stats = {}                  ## statistics of the last update: files, parsed, unchanged, removed, errors, seconds
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: read persisted index, returns False if not found or not usable
+##
+def read_index(fn):
+    global keys, titles, years, types, tags, ids, by_type, by_tag, year_order, year_values, files, free
+
+    index = _indexes.read(fn, index_version)
+    if index is None:
+        return False
+    keys, titles, years, types, tags = index['keys'], index['titles'], index['years'], index['types'], index['tags']
+    by_type, by_tag, year_order, year_values = index['by_type'], index['by_tag'], index['year_order'], index['year_values']
+    files, free = index['files'], index['free']
+    ids = { key: eid for eid, key in enumerate(keys) if key is not None }
+    return True
+
+
+
+##
+## function: write index atomically, failure to write is not an error
+##
+def write_index(fn):
+    _indexes.write(fn, index_version, {
+        'keys': keys, 'titles': titles, 'years': years, 'types': types, 'tags': tags,
+        'by_type': by_type, 'by_tag': by_tag, 'year_order': year_order, 'year_values': year_values,
+        'files': files, 'free': free
+    }, 'library index')
+
+
+
+##
+## function: clear the index
+##
+def clear():
+    global keys, titles, years, types, tags, ids, by_type, by_tag, year_order, year_values, files, free
+
+    keys, titles, years, types, tags, ids = [], [], [], [], [], {}
+    by_type, by_tag = {}, {}
+    year_order, year_values = array('I'), array('i')
+    files, free = {}, []
+
+
+
+##
+## function: add an entry with all its indexed fields, returns the entry id
+##
+def add_entry(key, data):
+    title = str(data.get('title', ''))
+    if 'titleaddon' in data:
+        title += " - " + str(data['titleaddon'])
+    try:
+        year = int(data.get('year'))
+    except (TypeError, ValueError):
+        year = -1
+    type = sys.intern(str(data.get('type', '')))
+    entry_tags = ()
+    if isinstance(data.get('urls'), dict):
+        entry_tags = tuple(sys.intern(str(tag)) for tag in data['urls'])
+
+    if len(free) > 0:
+        eid = free.pop()
+        keys[eid], titles[eid], years[eid], types[eid], tags[eid] = key, title, year, type, entry_tags
+    else:
+        eid = len(keys)
+        keys.append(key)
+        titles.append(title)
+        years.append(year)
+        types.append(type)
+        tags.append(entry_tags)
+
+    ids[key] = eid
+    if type != '':
+        by_type.setdefault(type, set()).add(eid)
+    for tag in entry_tags:
+        by_tag.setdefault(tag, set()).add(eid)
+    return eid
+
+
+
+##
+## function: remove a value from a posting set, the set is removed when empty
+##
+def discard(index, value, item):
+    postings = index.get(value)
+    if postings is not None:
+        postings.discard(item)
+        if len(postings) == 0:
+            del index[value]
+
+
+
+##
+## function: remove an entry, its id can be used again
+##
+def remove_entry(eid):
+    discard(by_type, types[eid], eid)
+    for tag in tags[eid]:
+        discard(by_tag, tag, eid)
+    if ids.get(keys[eid]) == eid:
+        del ids[keys[eid]]
+    keys[eid], titles[eid], years[eid], types[eid], tags[eid] = None, '', -1, '', ()
+    free.append(eid)
+
+
+
+##
+## function: rebuild the sorted year index, sorting is cheaper than keeping order on every change
+##
+def sort_years():
+    global year_order, year_values
+
+    order = sorted((eid for eid in range(len(keys)) if keys[eid] is not None and years[eid] >= 0), key=years.__getitem__)
+    year_order = array('I', order)
+    year_values = array('i', (years[eid] for eid in order))
+
+
+
+##
+## function: update this index and the person index for a YAML directory, new and changed files are parsed once for both
+## - check False uses persisted indexes as they are, without looking for changed files
+## - returns True if the index changed
+##
+def update(yaml_dir, check=True):
+    global stats
+
+    start = time.perf_counter()
+    fn = _corpus.cache_file(yaml_dir, 'library-index')
+    persons_fn = _persons.index_file(yaml_dir)
+    read = _corpus.use_cache == True and read_index(fn) == True
+    if read == False:
+        clear()
+    if _corpus.use_cache == False or _persons.read_index(persons_fn) == False:
+        _persons.clear()
+        read = False
+    if read == True and check == False:
+        stats = { 'files': len(files), 'parsed': 0, 'unchanged': len(files), 'removed': 0, 'errors': 0, 'seconds': time.perf_counter() - start }
+        _persons.set_stats(0, 0, 0, stats['seconds'])
+        return False
+
+    results = _indexes.update(yaml_dir, [ (files, add_entry, remove_entry), (_persons.files, _persons.add_entry, _persons.remove_entry) ])
+    parsed, removed, errors = results[0]
+    if parsed > 0 or removed > 0:
+        sort_years()
+        if _corpus.use_cache == True:
+            write_index(fn)
+    if _corpus.use_cache == True and (results[1][0] > 0 or results[1][1] > 0):
+        _persons.write_index(persons_fn)
+    stats = { 'files': len(files), 'parsed': parsed, 'unchanged': len(files) - parsed, 'removed': removed, 'errors': errors, 'seconds': time.perf_counter() - start }
+    _persons.set_stats(results[1][0], results[1][1], results[1][2], stats['seconds'])
+    return parsed > 0 or removed > 0
+
+
+
+##
+## function: entry ids with a year in a range, either end can be None for an open range
+##
+def find_years(year_from=None, year_to=None):
+    lo = 0 if year_from is None else bisect.bisect_left(year_values, year_from)
+    hi = len(year_values) if year_to is None else bisect.bisect_right(year_values, year_to)
+    return set(year_order[lo:hi])
+
+
+
+##
+## function: entry ids of persons, exact name or else case-insensitive substring of names, optionally only some roles
+##
+def find_persons(name, roles=None):
+    pid = _persons.lookup(name)
+    if pid is not None:
+        pids = [ pid ]
+    else:
+        lower = name.lower()
+        pids = [ pid for pid, person in enumerate(_persons.names) if lower in person.lower() ]
+    role_ids = None if roles is None else set(_persons.roles.index(role) for role in roles)
+    ret = set()
+    for pid in pids:
+        for value in _persons.entries[pid]:
+            if role_ids is None or (value & 3) in role_ids:
+                eid = ids.get(_persons.keys[value >> 2])
+                if eid is not None:
+                    ret.add(eid)
+    return ret
+
+
+
+##
+## function: search entries, all given criteria must match, returns entry ids sorted by key
+## - set indexes are intersected smallest first, the title substring is checked last on the remaining entries
+##
+def search(person=None, roles=None, year_from=None, year_to=None, type=None, title=None, tag=None):
+    sets = []
+    if person is not None:
+        sets.append(find_persons(person, roles))
+    if year_from is not None or year_to is not None:
+        sets.append(find_years(year_from, year_to))
+    if type is not None:
+        sets.append(by_type.get(type, set()))
+    if tag is not None:
+        sets.append(by_tag.get(tag, set()))
+
+    if len(sets) > 0:
+        sets.sort(key=len)
+        found = sets[0].intersection(*sets[1:])
+    else:
+        found = range(len(keys))
+    if title is not None:
+        lower = title.lower()
+        found = [ eid for eid in found if lower in titles[eid].lower() ]
+    return sorted((eid for eid in found if keys[eid] is not None), key=keys.__getitem__)
+
+
+
+##
+## function: print statistics of the last update
+##
+def print_stats():
+    print("    > library index: %d files (%d parsed, %d unchanged, %d removed, %d not usable), %d entries, %d types, %d URL tags in %.3fs" % (stats['files'], stats['parsed'], stats['unchanged'], stats['removed'], stats['errors'], len(keys) - len(free), len(by_type), len(by_tag), stats['seconds']))
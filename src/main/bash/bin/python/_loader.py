@@ -0,0 +1,109 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## _loader - loads YAML content, using the libyaml C loader when available
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import yaml             ## parsing YAML files
+import os               ## operating system, e.g. environment
+import time             ## timings for files per second
+
+
+
+##
+## Global variables
+## - set SKB_YAML_LOADER=python in the environment to force the pure Python loader
+##
+loader = yaml.SafeLoader    ## loader class used for parsing
+loader_name = 'SafeLoader (pure Python)'
+if yaml.__with_libyaml__ == True and os.environ.get('SKB_YAML_LOADER', '') != 'python':
+    try:
+        from yaml import CSafeLoader
+        loader = CSafeLoader
+        loader_name = 'CSafeLoader (libyaml)'
+    except ImportError:
+        pass
+
+files = 0                   ## number of files parsed
+seconds = 0.0               ## time spent parsing
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset the loader statistics, for the next task in the same process
+##
+def reset():
+    global files
+    global seconds
+
+    files = 0
+    seconds = 0.0
+
+
+
+##
+## function: parse YAML content (string, bytes, or stream)
+##
+def load(content):
+    global files
+    global seconds
+
+    start = time.perf_counter()
+    data = yaml.load(content, Loader=loader)
+    seconds += time.perf_counter() - start
+    files += 1
+    return data
+
+
+
+##
+## function: record files parsed elsewhere, e.g. in parallel jobs
+##
+def record(count, duration):
+    global files
+    global seconds
+
+    files += count
+    seconds += duration
+
+
+
+##
+## function: print loader statistics
+##
+def print_stats():
+    if files > 0 and seconds > 0:
+        print("    > YAML loader: %s, parsed %d files in %.3fs, %.0f files/s" % (loader_name, files, seconds, files / seconds))
+    else:
+        print("    > YAML loader: %s, parsed no files" % loader_name)
@@ -0,0 +1,265 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## _ngram - persisted trigram index for substring search in YAML entries
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings
+import os               ## operating system, e.g. file handling
+import pickle           ## persist the index
+import hashlib          ## name of the index file
+import time             ## timings for index updates
+from array import array ## compact posting lists
+
+
+
+##
+## Global variables
+## - entries are numbered, posting lists are arrays of entry numbers, so the index loads fast
+##
+index_version = 2           ## version of the index layout, change when layout changes
+gram_size = 3               ## size of n-grams
+separator = '\x00'          ## separator of texts of a field
+compact_share = 0.25        ## compact the index when more than this share of entry numbers is unused, e.g. after reloads in server mode
+
+sources = {}                ## indexed files, key is file name relative to YAML directory and value is (digest, entry number)
+keys = []                   ## entry keys, index is entry number, None for removed entries
+texts = []                  ## entry texts, index is entry number, value is dictionary of field to lower case texts joined by separator
+grams = {}                  ## inverted index, key is field and value is dictionary of n-gram to array of entry numbers
+
+stats = {}                  ## statistics of the last update: entries, updated, removed, seconds
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset the index, for the next task in the same process, update() reads the persisted index again
+##
+def reset():
+    global sources
+    global keys
+    global texts
+    global grams
+    global stats
+
+    sources, keys, texts, grams, stats = {}, [], [], {}, {}
+
+
+
+##
+## function: n-grams of a text
+##
+def ngrams(text):
+    return set(text[i:i+gram_size] for i in range(len(text) - gram_size + 1))
+
+
+
+##
+## function: name of the index file for a YAML directory
+##
+def index_file(yaml_dir, name):
+    digest = hashlib.sha1(os.path.abspath(yaml_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(_corpus.cache_dir, name + '-' + digest + '.pickle')
+
+
+
+##
+## function: read index file, leaves an empty index if not found or not usable
+##
+def read_index(fn):
+    global sources
+    global keys
+    global texts
+    global grams
+
+    try:
+        with open(fn, 'rb') as stream:
+            data = pickle.load(stream)
+        if data.get('version') == index_version:
+            sources = data['sources']
+            keys = data['keys']
+            texts = data['texts']
+            grams = data['grams']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+        pass
+
+
+
+##
+## function: write index file atomically, failure to write is not an error
+##
+def write_index(fn):
+    try:
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        tmp = fn + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'wb') as stream:
+            pickle.dump({'version': index_version, 'sources': sources, 'keys': keys, 'texts': texts, 'grams': grams}, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, fn)
+    except OSError:
+        pass
+
+
+
+##
+## function: add an entry to the index, returns entry number
+##
+def add(key, fields):
+    number = len(keys)
+    keys.append(key)
+    texts.append({})
+    for field in fields:
+        joined = separator.join(str(text).lower() for text in fields[field])
+        texts[number][field] = joined
+        if not field in grams:
+            grams[field] = {}
+        for gram in ngrams(joined):
+            if not gram in grams[field]:
+                grams[field][gram] = array('I')
+            grams[field][gram].append(number)
+    return number
+
+
+
+##
+## function: remove an entry from the index
+##
+def remove(number):
+    for field in texts[number]:
+        for gram in ngrams(texts[number][field]):
+            postings = grams[field].get(gram)
+            if postings is not None:
+                postings = array('I', (n for n in postings if n != number))
+                if len(postings) == 0:
+                    del grams[field][gram]
+                else:
+                    grams[field][gram] = postings
+    keys[number] = None
+    texts[number] = {}
+
+
+
+##
+## function: compact the index, entries are numbered again without the numbers of removed entries
+##
+def compact():
+    global sources
+    global keys
+    global texts
+
+    numbers = {}
+    for number, key in enumerate(keys):
+        if key is not None:
+            numbers[number] = len(numbers)
+    keys = [ key for key in keys if key is not None ]
+    texts = [ text for number, text in enumerate(texts) if number in numbers ]
+    for field in grams:
+        for gram in grams[field]:
+            grams[field][gram] = array('I', (numbers[number] for number in grams[field][gram]))
+    sources = { rel: (digest, numbers[number]) for rel, (digest, number) in sources.items() }
+
+
+
+##
+## function: bring the index up to date with loaded YAML files, re-indexing only changed files
+## - corpus: parsed YAML files, key is file name
+## - digests: content hash of the files, key is file name
+## - extract: function that returns entry key and dictionary of field to list of texts for parsed YAML
+##
+def update(yaml_dir, name, corpus, digests, extract):
+    global stats
+
+    start = time.perf_counter()
+    fn = index_file(yaml_dir, name)
+    if _corpus.use_cache == True:
+        read_index(fn)
+
+    current = { file[len(yaml_dir)+1:]: file for file in corpus }
+    updated = 0
+    removed = 0
+    for rel in list(sources):
+        if not rel in current:
+            remove(sources[rel][1])
+            del sources[rel]
+            removed += 1
+    for rel, file in current.items():
+        source = sources.get(rel)
+        if source is not None and source[0] == digests[file]:
+            continue
+        if source is not None:
+            remove(source[1])
+        key, fields = extract(corpus[file])
+        sources[rel] = (digests[file], add(key, fields))
+        updated += 1
+
+    unused = len(keys) - len(sources)
+    if unused > 0 and unused > len(keys) * compact_share:
+        compact()
+
+    if _corpus.use_cache == True and (updated > 0 or removed > 0):
+        write_index(fn)
+
+    stats = {
+        'entries': len(sources),
+        'updated': updated,
+        'removed': removed,
+        'seconds': time.perf_counter() - start
+    }
+
+
+
+##
+## function: search for a substring in fields, returns set of entry keys
+## - candidates are taken from the shortest posting list of the pattern's n-grams and verified
+## - patterns shorter than the n-gram size are checked against all entries
+##
+def search(fields, pattern):
+    pattern = pattern.lower()
+    ret = set()
+    for field in fields:
+        if len(pattern) < gram_size:
+            candidates = range(len(keys))
+        else:
+            index = grams.get(field, {})
+            candidates = min((index.get(gram, ()) for gram in ngrams(pattern)), key=len)
+        for number in candidates:
+            if pattern in texts[number].get(field, ''):
+                ret.add(keys[number])
+    return ret
+
+
+
+##
+## function: print statistics of the last update
+##
+def print_stats():
+    print("    > n-gram index: %d entries, %d updated, %d removed in %.3fs" % (stats['entries'], stats['updated'], stats['removed'], stats['seconds']))
@@ -0,0 +1,124 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _output - writes generated files only if their content changed, atomically via a temporary file and rename
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _profile         ## counting written files
+import os               ## operating system, stat, replace, remove
+import re               ## lines ignored when comparing
+
+
+
+##
+## Global variables
+##
+volatile = re.compile(rb'^// - on .*\n', re.M)  ## generation date lines of ADOC headers, ignored when comparing content
+
+written = 0                 ## number of files written
+skipped = 0                 ## number of files not written because their content did not change
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset the counts of written and unchanged files, for the next task in the same process
+##
+def reset():
+    global written
+    global skipped
+
+    written = 0
+    skipped = 0
+
+
+
+##
+## function: test if a file has the given content, returns False if the file does not exist
+## - content without volatile lines: size first, the file is only read if the size is the same
+## - content with volatile lines like the generation date: bytes, then bytes without volatile lines
+##
+def unchanged(fn, data):
+    try:
+        if volatile.search(data) is None:
+            if os.stat(fn).st_size != len(data):
+                return False
+            with open(fn, 'rb') as stream:
+                return stream.read() == data
+        with open(fn, 'rb') as stream:
+            existing = stream.read()
+    except OSError:
+        return False
+    if existing == data:
+        return True
+    return volatile.sub(b'', existing) == volatile.sub(b'', data)
+
+
+
+##
+## function: write content to a file unless it already has that content, returns True if written
+## - content is written to a temporary file in the same directory, which then replaces the file
+## - an interrupted write leaves the old file in place, never a partially written one
+##
+def write(fn, content):
+    global written
+    global skipped
+
+    data = content
+    if isinstance(content, str):
+        data = content.encode('utf-8')
+    if unchanged(fn, data) == True:
+        skipped += 1
+        return False
+
+    tmp = fn + '.' + str(os.getpid()) + '.tmp'
+    try:
+        with open(tmp, 'wb') as stream:
+            stream.write(data)
+        os.replace(tmp, fn)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    written += 1
+    _profile.add_write(len(data))
+    return True
+
+
+
+##
+## function: print number of written and unchanged files
+##
+def print_stats():
+    print("    > output files: %d written, %d unchanged" % (written, skipped))
@@ -0,0 +1,231 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _persons - persisted index of persons (authors, editors, presenters, panelists) of library entries, updated incrementally
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings
+import _indexes         ## reading, writing, and updating persisted indexes
+import sys              ## interning names
+import time             ## timings for updates
+
+
+
+##
+## Global variables
+##
+index_version = 1           ## version of the index layout, change when layout changes
+roles = ( 'authors', 'editors', 'presenters', 'panelists' )    ## entry fields with persons, position is the role number
+
+names = []                  ## person names, interned, position is the person id
+ids = {}                    ## person id of each name
+keys = []                   ## entry keys, position is the entry id, None for unused ids
+slots = []                  ## persons of each entry, position is the entry id, values are person id * 4 + role
+entries = []                ## entries of each person, position is the person id, values are entry id * 4 + role
+files = {}                  ## indexed files, key is file relative to the YAML directory and value is (mtime_ns, size, entry id or -1)
+free = []                   ## unused entry ids of removed entries
+
+stats = {}                  ## statistics of the last update: files, parsed, unchanged, removed, errors, seconds
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: name of the persisted index of a YAML directory
+##
+def index_file(yaml_dir):
+    return _corpus.cache_file(yaml_dir, 'persons')
+
+
+
+##
+## function: read persisted index, returns False if not found or not usable
+##
+def read_index(fn):
+    global names, ids, keys, slots, entries, files, free
+
+    index = _indexes.read(fn, index_version)
+    if index is None:
+        return False
+    names = [ sys.intern(name) for name in index['names'] ]
+    keys, slots, entries, files, free = index['keys'], index['slots'], index['entries'], index['files'], index['free']
+    ids = { name: pid for pid, name in enumerate(names) }
+    return True
+
+
+
+##
+## function: write index atomically, failure to write is not an error
+##
+def write_index(fn):
+    _indexes.write(fn, index_version, { 'names': names, 'keys': keys, 'slots': slots, 'entries': entries, 'files': files, 'free': free }, 'person index')
+
+
+
+##
+## function: clear the index
+##
+def clear():
+    global names, ids, keys, slots, entries, files, free
+
+    names, ids, keys, slots, entries, files, free = [], {}, [], [], [], {}, []
+
+
+
+##
+## function: person id of a name, new persons are added
+##
+def get_person(name):
+    pid = ids.get(name)
+    if pid is None:
+        pid = len(names)
+        name = sys.intern(name)
+        names.append(name)
+        ids[name] = pid
+        entries.append([])
+    return pid
+
+
+
+##
+## function: add an entry with the persons of all roles, returns the entry id
+##
+def add_entry(key, data):
+    persons = []
+    for role, field in enumerate(roles):
+        value = data.get(field)
+        if isinstance(value, str):
+            value = [ value ]
+        if isinstance(value, list):
+            for person in value:
+                if isinstance(person, str):
+                    persons.append(get_person(person) * 4 + role)
+
+    if len(free) > 0:
+        eid = free.pop()
+        keys[eid] = key
+        slots[eid] = tuple(persons)
+    else:
+        eid = len(keys)
+        keys.append(key)
+        slots.append(tuple(persons))
+    for slot in persons:
+        entries[slot >> 2].append(eid * 4 + (slot & 3))
+    return eid
+
+
+
+##
+## function: remove an entry, its id can be used again
+##
+def remove_entry(eid):
+    for slot in slots[eid]:
+        entries[slot >> 2].remove(eid * 4 + (slot & 3))
+    keys[eid] = None
+    slots[eid] = ()
+    free.append(eid)
+
+
+
+##
+## function: update the index for a YAML directory, only new and changed files are parsed
+## - returns True if the index changed
+##
+def update(yaml_dir):
+    start = time.perf_counter()
+    fn = index_file(yaml_dir)
+    if _corpus.use_cache == False or read_index(fn) == False:
+        clear()
+
+    parsed, removed, errors = _indexes.update(yaml_dir, [ (files, add_entry, remove_entry) ])[0]
+    if _corpus.use_cache == True and (parsed > 0 or removed > 0):
+        write_index(fn)
+    set_stats(parsed, removed, errors, time.perf_counter() - start)
+    return parsed > 0 or removed > 0
+
+
+
+##
+## function: set statistics of an update, also used by indexes that update the person index with their own
+##
+def set_stats(parsed, removed, errors, seconds):
+    global stats
+
+    stats = { 'files': len(files), 'parsed': parsed, 'unchanged': len(files) - parsed, 'removed': removed, 'errors': errors, 'seconds': seconds }
+
+
+
+##
+## function: person id of a name, None if not in the index
+##
+def lookup(name):
+    pid = ids.get(name)
+    if pid is None or len(entries[pid]) == 0:
+        return None
+    return pid
+
+
+
+##
+## function: entries of a person, list of (key, role) in order of keys
+##
+def get_entries(pid):
+    return sorted((keys[value >> 2], roles[value & 3]) for value in entries[pid])
+
+
+
+##
+## function: co-authors of a person with the number of shared entries, list of (name, count), most shared first
+##
+def get_coauthors(pid):
+    counts = {}
+    for eid in set(value >> 2 for value in entries[pid]):
+        for other in set(slot >> 2 for slot in slots[eid]):
+            if other != pid:
+                counts[other] = counts.get(other, 0) + 1
+    return sorted(((names[other], count) for other, count in counts.items()), key=lambda item: (-item[1], item[0]))
+
+
+
+##
+## function: all persons with entries and their number of entries, sorted by name
+##
+def get_persons():
+    return sorted((name, len(set(value >> 2 for value in entries[pid]))) for pid, name in enumerate(names) if len(entries[pid]) > 0)
+
+
+
+##
+## function: print statistics of the last update
+##
+def print_stats():
+    print("    > person index: %d files (%d parsed, %d unchanged, %d removed, %d not usable), %d entries, %d persons, %d slots in %.3fs" % (stats['files'], stats['parsed'], stats['unchanged'], stats['removed'], stats['errors'], len(keys) - len(free), len([ e for e in entries if len(e) > 0 ]), sum(len(s) for s in slots), stats['seconds']))
@@ -0,0 +1,193 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _profile - per-phase profiling of Python tasks: wall and CPU time, files, bytes written, peak memory, optional cProfile dump
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## YAML loading phases and file counts
+import _discovery       ## discovery phase
+import os               ## operating system, CPU times incl. child processes
+import sys              ## system for stderr
+import time             ## wall and CPU time
+import atexit           ## report also for tasks that exit early
+import tracemalloc      ## peak memory
+import cProfile         ## optional profile dump
+
+
+
+##
+## Global variables
+##
+enabled = False             ## profiling requested
+dump_file = ''              ## file for cProfile statistics, empty for no dump
+phases = {}                 ## phases, key is name and value is [wall, cpu, calls], times exclude nested phases
+running = []                ## stack of running phases, each [wall start, cpu start, wall of nested, cpu of nested]
+writes = [ 0, 0 ]           ## output files and bytes written
+started = [ 0.0, 0.0 ]      ## wall and CPU time at start
+profiler = None             ## cProfile profiler, if a dump is requested
+active = False              ## profiling started and not yet reported
+registered = False          ## report registered to run at exit
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: CPU time of this process and all waited for child processes, e.g. parallel jobs
+##
+def cpu_time():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+
+##
+## function: wrap a function so that its time is added to a phase
+##
+def timed(name, function):
+    def wrapper(*args, **kwargs):
+        frame = [ time.perf_counter(), time.process_time(), 0.0, 0.0 ]
+        running.append(frame)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            running.pop()
+            wall = time.perf_counter() - frame[0]
+            cpu = time.process_time() - frame[1]
+            phase = phases.setdefault(name, [ 0.0, 0.0, 0 ])
+            phase[0] += wall - frame[2]
+            phase[1] += cpu - frame[3]
+            phase[2] += 1
+            if len(running) > 0:
+                running[-1][2] += wall
+                running[-1][3] += cpu
+    wrapper.__wrapped__ = function
+    return wrapper
+
+
+
+##
+## function: add phases to functions of a module, namespace is a module dictionary, e.g. globals() of a task
+## - functions that are already wrapped are not wrapped again, e.g. shared modules used by several tasks in one process
+##
+def instrument(namespace, task_phases):
+    for name in task_phases:
+        for function in task_phases[name]:
+            if not hasattr(namespace[function], '__wrapped__'):
+                namespace[function] = timed(name, namespace[function])
+
+
+
+##
+## function: start profiling if enabled, with the phases of a task, phases of other modules it uses, and the shared phases for discovery and YAML loading
+## - calling it again before the report only adds phases, e.g. tasks run as stages of a profiled skb-pipeline
+##
+def start(namespace, task_phases, module_phases={}):
+    global profiler
+    global active
+    global registered
+
+    if enabled == False:
+        return
+    if active == False:
+        active = True
+        started[0] = time.perf_counter()
+        started[1] = cpu_time()
+        tracemalloc.start()
+        if dump_file != '':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        if registered == False:
+            atexit.register(report)
+            registered = True
+    instrument(vars(_discovery), { 'discovery': ( 'scan', 'list_directory' ) })
+    instrument(vars(_corpus), { 'cache': ( 'load', 'load_directory' ), 'parse': ( 'parse_all', ) })
+    for module in module_phases:
+        instrument(vars(module), module_phases[module])
+    instrument(namespace, task_phases)
+
+
+
+##
+## function: reset settings and collected times, for the next task in the same process, e.g. a stage of skb-pipeline
+##
+def reset():
+    global enabled
+    global dump_file
+
+    enabled = False
+    dump_file = ''
+    phases.clear()
+    running.clear()
+    writes[0], writes[1] = 0, 0
+    started[0], started[1] = 0.0, 0.0
+
+
+
+##
+## function: count an output file and its bytes, used by tasks when they write outputs
+##
+def add_write(count):
+    writes[0] += 1
+    writes[1] += count
+
+
+
+##
+## function: print the report to STDERR, so outputs on STDOUT are not changed
+##
+def report():
+    global profiler
+    global active
+
+    if active == False:
+        return
+    active = False
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(dump_file)
+    wall = time.perf_counter() - started[0]
+    cpu = cpu_time() - started[1]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    out = sys.stderr
+    out.write("\n    > profile\n")
+    out.write("      %-16s %10s %10s %10s\n" % ("phase", "wall", "cpu", "calls"))
+    for name in phases:
+        out.write("      %-16s %9.3fs %9.3fs %10d\n" % (name, phases[name][0], phases[name][1], phases[name][2]))
+    out.write("      %-16s %9.3fs %9.3fs\n" % ("other", wall - sum(phase[0] for phase in phases.values()), cpu - sum(phase[1] for phase in phases.values())))
+    out.write("      %-16s %9.3fs %9.3fs\n" % ("total", wall, cpu))
+    out.write("      files: %d YAML (%d parsed), %d written with %d bytes\n" % (_corpus.stats.get('files', 0), _corpus.stats.get('parsed', 0), writes[0], writes[1]))
+    out.write("      peak memory: %.1f MiB (tracemalloc)\n" % (peak / 1048576.0))
+    if profiler is not None:
+        out.write("      cProfile statistics: %s\n" % dump_file)
+        profiler = None
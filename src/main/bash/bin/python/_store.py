@@ -0,0 +1,244 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _store - SQLite store of library and acronym entries with FTS5 full-text tables, updated incrementally by file hash
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## parsing YAML files, parallel jobs
+import _discovery       ## finding YAML files with a single traversal
+import os               ## operating system, stat
+import sqlite3          ## the store
+import hashlib          ## content hash of YAML files
+import multiprocessing  ## process pool for parallel parsing
+import time             ## timings for loads and queries
+
+
+
+##
+## Global variables
+##
+schema_version = 1          ## version of the schema, change when the schema changes, the store is then created again
+
+## full-text columns of each corpus, first column is the label shown in results
+columns = {
+    'library': ( 'title', 'adoc' ),
+    'acronyms': ( 'short', 'long', 'description', 'notes' )
+}
+
+## bm25 weights of the full-text columns, matches in titles and short forms rank higher
+weights = {
+    'library': ( 4.0, 1.0 ),
+    'acronyms': ( 4.0, 2.0, 1.0, 1.0 )
+}
+
+stats = {}                  ## statistics of the last load: files, parsed, unchanged, rehashed, removed, errors, seconds
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: open the store, creates tables if needed, returns connection
+##
+def connect(fn):
+    directory = os.path.dirname(fn)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(fn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM meta WHERE name = 'schema'").fetchone()
+    if row is None or row[0] != str(schema_version):
+        conn.execute("DROP TABLE IF EXISTS entries")
+        for corpus in columns:
+            conn.execute("DROP TABLE IF EXISTS %s_fts" % corpus)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(schema_version),))
+    conn.execute("CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, root TEXT NOT NULL, corpus TEXT NOT NULL, key TEXT, label TEXT, mtime_ns INTEGER, size INTEGER, sha1 TEXT)")
+    conn.execute("CREATE INDEX IF NOT EXISTS entries_root ON entries (root, corpus)")
+    for corpus, names in columns.items():
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS %s_fts USING fts5(%s, prefix='2 3')" % (corpus, ", ".join(names)))
+    conn.commit()
+    return conn
+
+
+
+##
+## function: text of a YAML value: strings as they are, maps and lists joined (e.g. long forms in several languages)
+##
+def get_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(get_text(item) for item in value.values())
+    if isinstance(value, list):
+        return " ".join(get_text(item) for item in value)
+    if value is None:
+        return ''
+    return str(value)
+
+
+
+##
+## function: key and full-text columns of a parsed YAML file, None if it is not a single entry
+##
+def get_row(corpus, data):
+    if not isinstance(data, dict) or len(data) != 1 or not isinstance(data[list(data.keys())[0]], dict):
+        return None
+    key = list(data.keys())[0]
+    entries = data[key]
+    texts = [ get_text(entries.get(name)) for name in columns[corpus] ]
+    if corpus == 'library' and 'titleaddon' in entries:
+        texts[0] += " - " + get_text(entries['titleaddon'])
+    return (key, texts)
+
+
+
+##
+## function: insert or replace an entry and its full-text row, id is None for new files
+##
+def upsert(conn, corpus, root, file, st, digest, row, rid):
+    key, texts = row if row is not None else (None, [ '' ] * len(columns[corpus]))
+    label = texts[0]
+    if corpus == 'acronyms':
+        label = texts[0] + " - " + texts[1]
+    if rid is None:
+        rid = conn.execute("INSERT INTO entries (path, root, corpus, key, label, mtime_ns, size, sha1) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (file, root, corpus, key, label, st.st_mtime_ns, st.st_size, digest)).lastrowid
+    else:
+        conn.execute("UPDATE entries SET key = ?, label = ?, mtime_ns = ?, size = ?, sha1 = ? WHERE id = ?", (key, label, st.st_mtime_ns, st.st_size, digest, rid))
+        conn.execute("DELETE FROM %s_fts WHERE rowid = ?" % corpus, (rid,))
+    if row is not None:
+        conn.execute("INSERT INTO %s_fts (rowid, %s) VALUES (?, %s)" % (corpus, ", ".join(columns[corpus]), ", ".join('?' * len(texts))), [ rid ] + texts)
+
+
+
+##
+## function: load a YAML directory into the store, only files with changed content are parsed
+## - files with changed mtime or size are hashed, files with the same hash only get the new mtime and size
+## - directories are loaded one at a time and committed, so memory stays flat and an interrupted load keeps what is done
+##
+def load(conn, corpus, yaml_dir):
+    global stats
+
+    start = time.perf_counter()
+    root = os.path.abspath(yaml_dir)
+    known = { path: (rid, mtime_ns, size, sha1) for rid, path, mtime_ns, size, sha1 in conn.execute("SELECT id, path, mtime_ns, size, sha1 FROM entries WHERE root = ? AND corpus = ?", (root, corpus)) }
+    stats = { 'files': 0, 'parsed': 0, 'unchanged': 0, 'rehashed': 0, 'removed': 0, 'errors': 0 }
+    pool = None
+    if _corpus.jobs > 1:
+        pool = multiprocessing.get_context('fork').Pool(_corpus.jobs)
+    try:
+        for directory, yaml_files in _discovery.walk(root):
+            pending = []
+            for file in yaml_files:
+                last = known.pop(file, None)
+                try:
+                    st = os.stat(file)
+                except OSError:
+                    continue
+                stats['files'] += 1
+                if last is not None and last[1] == st.st_mtime_ns and last[2] == st.st_size:
+                    stats['unchanged'] += 1
+                    continue
+                try:
+                    with open(file, 'rb') as stream:
+                        content = stream.read()
+                except OSError:
+                    continue
+                digest = hashlib.sha1(content).hexdigest()
+                if last is not None and last[3] == digest:
+                    conn.execute("UPDATE entries SET mtime_ns = ?, size = ? WHERE id = ?", (st.st_mtime_ns, st.st_size, last[0]))
+                    stats['rehashed'] += 1
+                    continue
+                pending.append((file, st, digest, content, None if last is None else last[0]))
+
+            if len(pending) > 0:
+                results = _corpus.parse_all([ item[3] for item in pending ], pool)
+                for (file, st, digest, content, rid), (data, error) in zip(pending, results):
+                    row = get_row(corpus, data) if error is None else None
+                    if row is None:
+                        stats['errors'] += 1
+                    upsert(conn, corpus, root, file, st, digest, row, rid)
+                stats['parsed'] += len(pending)
+            conn.commit()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    for path, (rid, mtime_ns, size, sha1) in known.items():
+        conn.execute("DELETE FROM entries WHERE id = ?", (rid,))
+        conn.execute("DELETE FROM %s_fts WHERE rowid = ?" % corpus, (rid,))
+        stats['removed'] += 1
+    conn.commit()
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+
+##
+## function: quote every word of a query as a string, for queries that are not valid FTS5 syntax
+##
+def quote(query):
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+
+##
+## function: full-text search in a corpus, returns (number of matches, list of (key, label, snippet, path)) best first
+## - query is FTS5 syntax (words, "phrases", prefix*, AND/OR/NOT, NEAR), invalid syntax is searched as plain words
+## - field restricts the search to one full-text column
+##
+def search(conn, corpus, query, field=None, limit=20):
+    table = corpus + "_fts"
+    match = query
+    if field is not None:
+        match = "{%s} : (%s)" % (field, query)
+    sql_count = "SELECT count(*) FROM %s WHERE %s MATCH ?" % (table, table)
+    bm25 = "bm25(%s, %s)" % (table, ", ".join(str(weight) for weight in weights[corpus]))
+    sql = "SELECT e.key, e.label, snippet(%s, -1, '[', ']', '...', 12), e.path FROM %s f JOIN entries e ON e.id = f.rowid WHERE %s MATCH ? ORDER BY %s LIMIT ?" % (table, table, table, bm25)
+    try:
+        total = conn.execute(sql_count, (match,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        match = quote(query)
+        if field is not None:
+            match = "{%s} : (%s)" % (field, match)
+        total = conn.execute(sql_count, (match,)).fetchone()[0]
+    return (total, conn.execute(sql, (match, limit)).fetchall())
+
+
+
+##
+## function: print statistics of the last load
+##
+def print_stats(corpus):
+    print("    > store %s: %d files (%d parsed, %d unchanged, %d same hash, %d removed, %d not usable) in %.3fs" % (corpus, stats['files'], stats['parsed'], stats['unchanged'], stats['rehashed'], stats['removed'], stats['errors'], stats['seconds']))
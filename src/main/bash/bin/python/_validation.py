@@ -0,0 +1,146 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## _validation - collects validation errors and duplicate keys, prints and writes reports
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _profile         ## counting written reports
+import json             ## JSON report
+import multiprocessing  ## process pool for parallel validation
+
+
+
+##
+## Global variables
+##
+file_errors = {}            ## errors per file, key is file name and value is list of error messages
+duplicates = {}             ## duplicate keys, key is YAML key and value is list of files defining it
+keys = {}                   ## first file for each YAML key, to detect duplicates
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: reset errors, duplicates, and keys, for the next task in the same process, e.g. a stage of skb-pipeline
+##
+def reset():
+    file_errors.clear()
+    duplicates.clear()
+    keys.clear()
+
+
+
+##
+## function: run a check function for all files, in parallel jobs if set, returns results in order of files
+## - jobs are forked, so they share all settings and the parsed YAML files
+## - pool is an existing process pool, then files are items with everything the check needs
+##
+def run(files, check, jobs, pool=None):
+    if pool is not None:
+        return pool.map(check, files, max(1, len(files) // (jobs * 4)))
+    if jobs < 2:
+        return [check(file) for file in files]
+
+    chunksize = max(1, len(files) // (jobs * 16))
+    with multiprocessing.get_context('fork').Pool(jobs) as pool:
+        return pool.map(check, files, chunksize)
+
+
+
+##
+## function: add errors for a file, nothing is added for an empty list
+##
+def add_errors(file, errors):
+    if len(errors) > 0:
+        if not file in file_errors:
+            file_errors[file] = []
+        file_errors[file].extend(errors)
+
+
+
+##
+## function: add a key, records a duplicate if the key was added before, returns first file for a duplicate or None
+##
+def add_key(key, file):
+    if not key in keys:
+        keys[key] = file
+        return None
+    if not key in duplicates:
+        duplicates[key] = [ keys[key] ]
+    duplicates[key].append(file)
+    return keys[key]
+
+
+
+##
+## function: exit status for the report, 0 if no errors and no duplicates, 80 otherwise
+##
+def exit_status():
+    if len(file_errors) > 0 or len(duplicates) > 0:
+        return 80
+    return 0
+
+
+
+##
+## function: print human-readable report
+##
+def print_report(yaml_dir, files):
+    print("\n    > validation report: %d files, %d with errors, %d duplicate keys" % (files, len(file_errors), len(duplicates)))
+    for file in sorted(file_errors):
+        print("      -> .../%s" % file[len(yaml_dir)+1:])
+        for error in file_errors[file]:
+            print("         --> %s" % error.replace("\n", "\n             "))
+    for key in sorted(duplicates):
+        print("      -> key %s defined in" % key)
+        for file in duplicates[key]:
+            print("         --> .../%s" % file[len(yaml_dir)+1:])
+
+
+
+##
+## function: write JSON report
+##
+def write_json(fn, yaml_dir, files):
+    report = {
+        'yaml-directory': yaml_dir,
+        'files': files,
+        'status': exit_status(),
+        'errors': { file: file_errors[file] for file in sorted(file_errors) },
+        'duplicates': { key: duplicates[key] for key in sorted(duplicates) }
+    }
+    with open(fn, 'w') as stream:
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+        _profile.add_write(stream.tell())
+    print("    > wrote report: %s" % fn)
@@ -0,0 +1,111 @@
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## _watch - watches a YAML directory by polling and calls a rebuild function for changed files
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _discovery       ## finding YAML files with a single traversal
+import os               ## operating system, stat of files
+import sys              ## system for flushing output
+import time             ## sleeping between polls, timings
+
+
+
+##
+## Global variables
+##
+interval = 1.0              ## seconds between two polls
+debounce = 0.5              ## seconds without further changes before a rebuild starts
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: state of all YAML files in a directory, key is file name and value is (mtime, size)
+##
+def snapshot(yaml_dir):
+    state = {}
+    for file in _discovery.files(_discovery.scan(yaml_dir)):
+        try:
+            st = os.stat(file)
+        except OSError:
+            continue
+        state[file] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+
+##
+## function: compare two states, returns changed (incl. new) and removed files
+##
+def changes(old, new):
+    changed = [ file for file in new if old.get(file) != new[file] ]
+    removed = [ file for file in old if not file in new ]
+    return (changed, removed)
+
+
+
+##
+## function: watch a YAML directory until interrupted, calls rebuild(changed, removed) after a burst of changes settled
+## - a failing rebuild is reported, watching continues
+##
+def watch(yaml_dir, rebuild):
+    print("\n    > watching %s, polling every %.1fs, Ctrl-C to stop" % (yaml_dir, interval))
+    sys.stdout.flush()
+    last = snapshot(yaml_dir)
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(yaml_dir)
+            if current == last:
+                continue
+
+            ## debounce: editors and checkouts change several files, wait until nothing changes anymore
+            while True:
+                time.sleep(debounce)
+                settled = snapshot(yaml_dir)
+                if settled == current:
+                    break
+                current = settled
+
+            changed, removed = changes(last, current)
+            last = current
+            start = time.perf_counter()
+            print("\n    > detected %d changed and %d removed YAML files" % (len(changed), len(removed)))
+            try:
+                rebuild(changed, removed)
+                print("    > rebuild done in %.3fs" % (time.perf_counter() - start))
+            except Exception as exc:
+                print("    > rebuild failed with %s: %s" % (type(exc).__name__, exc))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\n    > stopped watching")
@@ -32,6 +32,12 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _acronyms        ## compact store for acronyms
+import _watch           ## watch mode, rebuild of changed pages
+import _output          ## writing files only if changed, atomically
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
@@ -47,12 +53,16 @@ import datetime         ## to get date/time for ADOC files
 ##
 task_level = "warn"         ## warning level
 yaml_dir = ''               ## YAML directory
+corpus = {}                 ## parsed YAML files, key is file name
 output_dir = ''             ## empty output directory, means same as the YAML file
 
-acronyms = {}               ## dictionary of acronyms
-acr_idx  = {}               ## index for acronyms, key is short and value is list of names
+acronyms = {}               ## dictionary of acronyms, key is name and value is an acronym record
+acr_idx  = _acronyms.Index() ## index for acronyms, key is short and value is list of names
 
 target_adoc = False         ## target ADOC
+watch = False               ## watch mode: keep running and rebuild pages of changed acronyms
+pending = set()             ## watch mode: files changed or removed since the last successful rebuild
+adoc_files = {}             ## content of ADOC files, key is file name and value is list of lines, written once at the end
 
 adoc_header = "//\n"        ## header for ADOC files
 adoc_header += "// This file was generated by SKB-Dashboard, task 'library-ext'\n"
@@ -81,7 +91,13 @@ def help():
     print("          [-h | --help]                    - this help screen")
     print("          [-o | --output-directory] <dir>  - output directory, default is same as YAML source")
     print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
+    print("          [-w | --watch]                   - watch YAML directory and rebuild pages of changed acronyms, until Ctrl-C")
     print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files")
+    print("          [--watch-interval] <seconds>     - seconds between two polls in watch mode, default 1")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
     print("\n")
     print("Ceated ADOC files will be written to the output directory, if set")
@@ -98,11 +114,12 @@ def cli(argv):
     global task_level
 
     global target_adoc
+    global watch
 
 
 
     try:
-        opts, args = getopt.getopt(argv,"Aaho:T:y:",["yaml-directory=","output-directory=","help","task-level=","all","adoc"])
+        opts, args = getopt.getopt(argv,"Aaho:T:wy:",["yaml-directory=","output-directory=","help","task-level=","all","adoc","cache-dir=","no-cache","watch","watch-interval=","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -110,29 +127,47 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
         elif opt in ("-o", "--output-directory"):
             output_dir = arg
         elif opt in ("-A", "--all"):
             target_adoc = True
         elif opt in ("-a", "--adoc"):
             target_adoc = True
+        elif opt in ("-w", "--watch"):
+            watch = True
+        elif opt == "--watch-interval":
+            try:
+                _watch.interval = float(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+
+    if watch == True and (output_dir == '' or target_adoc == False):
+        print("error: watch mode needs an output directory and the ADOC target")
+        sys.exit(70)
 
 
 
 
 ##
-## function: write an acronym to an ADOC file
+## function: add an acronym to an ADOC file, the file is buffered and written by write_adoc_files
 ##
 def add_to_adoc_file(dict, entry, file, with_cat, with_addons):
-    file_exists = os.path.isfile(file)
-    if file_exists == False:
-        stream_out = open(file,'w')
-        stream_out.write(adoc_header)
-        stream_out.close()
+    if not file in adoc_files:
+        adoc_files[file] = [ adoc_header ]
 
     acr_short = ''
     if 'short-target' in dict[entry] and 'adoc' in dict[entry]['short-target']:
@@ -173,33 +208,57 @@ def add_to_adoc_file(dict, entry, file, with_cat, with_addons):
                 count += 1
     acr_addon += "\n"
 
-    stream_out = open(file,'a')
-    stream_out.write(acr_short + ":: " + acr_long + acr_addon)
-    stream_out.close()
+    adoc_files[file].append(acr_short + ":: " + acr_long + acr_addon)
+
+
+
+##
+## function: write all buffered ADOC files, each file once, creating directories once
+## - files are only written if their content changed, see _output
+##
+def write_adoc_files():
+    directories = set(os.path.dirname(file) for file in adoc_files)
+    for directory in sorted(directories):
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for file in sorted(adoc_files):
+        if _output.write(file, "".join(adoc_files[file])) == True:
+            written += 1
+    print("    > wrote %d ADOC files, %d unchanged" % (written, len(adoc_files) - written))
 
 
 
 ##
-## function: write acronym ADOC files, one per first character
+## function: ADOC files of an acronym, by character and by category
 ##
-def build_by_char(dict, idx):
+def get_pages(dict, entry):
+    first_char = dict[entry]['short'][0].upper()
+    bc_dir = output_dir + "/by-character/"
+    by_char = bc_dir + first_char + ".adoc"
+    if first_char.isalpha() == False:
+        by_char = bc_dir + "0-9.adoc"
+    by_cat = output_dir + "/by-category/" + os.path.dirname(entry) + ".adoc"
+    return (by_char, by_cat)
+
+
+
+##
+## function: write acronym ADOC files, one per first character and one per category
+## - if pages is set, only those ADOC files are built
+##
+def build_by_char(dict, idx, pages=None):
     if output_dir != '':
         for key_sorted in sorted(idx.keys()):
             for entry in idx[key_sorted]:
-                first_char = dict[entry]['short'][0].upper()
-
                 if target_adoc == True:
-                    bc_dir = output_dir + "/by-character/"
-                    pathlib.Path(bc_dir).mkdir(parents=True, exist_ok=True)
-                    file = bc_dir + first_char + ".adoc"
-                    if first_char.isalpha() == False:
-                        file = bc_dir + "0-9.adoc"
-                    add_to_adoc_file(dict, entry, file, True, False)
+                    by_char, by_cat = get_pages(dict, entry)
+                    if pages is None or by_char in pages:
+                        add_to_adoc_file(dict, entry, by_char, True, False)
+                    if pages is None or by_cat in pages:
+                        add_to_adoc_file(dict, entry, by_cat, False, True)
 
-                    bc_dir = output_dir + "/by-category/"
-                    file = bc_dir + os.path.dirname(entry) + ".adoc"
-                    pathlib.Path(os.path.dirname(file)).mkdir(parents=True, exist_ok=True)
-                    add_to_adoc_file(dict, entry, file, False, True)
+        write_adoc_files()
 
 
 
@@ -207,13 +266,7 @@ def build_by_char(dict, idx):
 ## function: sort acronyms by value of short entry
 ##
 def index_acronyms(dict, idx):
-    for key in dict:
-        short_lc = dict[key]['short'].lower()
-        if short_lc in idx:
-            idx[short_lc].append(key)
-        else:
-            list = [ key ]
-            idx[short_lc] = list
+    idx.build(dict)
 
 
 
@@ -221,45 +274,104 @@ def index_acronyms(dict, idx):
 ## function: process a single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
         if not key in acronyms:
-            entries['src-file'] = file
-            acronyms[key] = entries
+            acronyms[key] = _acronyms.Acronym(entries, file)
         else:
             print("      -> key %s already in dictionary, defined in %s" % (key, acronyms[key]['src-file']))
             sys.exit(80)
 
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
 
 
 
+##
+## function: rebuild pages of changed acronyms in watch mode, before and after the change
+## - acronyms are built into new dictionary and index, which replace the old ones only if all files were processed
+## - errors are reported and do not stop watching, changes of a failed rebuild are rebuilt with the next one
+##
+def rebuild(changed, removed):
+    global acronyms
+    global acr_idx
+
+    pending.update(changed)
+    pending.update(removed)
+    pages = set()
+    for entry in acronyms:
+        if acronyms[entry]['src-file'] in pending:
+            pages.update(get_pages(acronyms, entry))
+
+    files = _discovery.files(_discovery.scan(yaml_dir))
+    _corpus.errors.clear()
+    corpus.clear()
+    corpus.update(_corpus.load(yaml_dir, files))
+    for file in _corpus.errors:
+        print("      -> YAML error in %s: %s" % (file, _corpus.errors[file]))
+    previous = (acronyms, acr_idx)
+    acronyms, acr_idx = {}, _acronyms.Index()
+    try:
+        for file in files:
+            process_file(file)
+        index_acronyms(acronyms, acr_idx)
+    except SystemExit as exc:
+        print("      -> failed with exit code %s, nothing rebuilt" % exc.code)
+        acronyms, acr_idx = previous
+        return
+    except Exception as exc:
+        print("      -> failed with %s: %s, nothing rebuilt" % (type(exc).__name__, exc))
+        acronyms, acr_idx = previous
+        return
+    finally:
+        corpus.clear()
+
+    for entry in acronyms:
+        if acronyms[entry]['src-file'] in pending:
+            pages.update(get_pages(acronyms, entry))
+    pending.clear()
+
+    adoc_files.clear()
+    build_by_char(acronyms, acr_idx, pages)
+    for page in sorted(pages):
+        if not page in adoc_files and os.path.isfile(page):
+            os.remove(page)
+            print("    > removed empty page: %s" % page)
+
+
+
 ##
 ## function: main function
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'processing': ( 'process_file', 'index_acronyms' ), 'rendering': ( 'build_by_char', ), 'writes': ( 'write_adoc_files', ) })
 
     print("    > YAML directory: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
+        files = _discovery.files(_discovery.scan(yaml_dir))
+        corpus.update(_corpus.load(yaml_dir, files))
+        _corpus.print_stats()
         for file in files:
             process_file(file)
+        ## parsed YAML files are not needed anymore, all acronyms are in the compact store
+        corpus.clear()
 
         index_acronyms(acronyms, acr_idx)
         print("\n    > found %d YAML files and %d acronyms" % (len(files), len(acronyms)))
         build_by_char(acronyms, acr_idx)
 
+        if watch == True:
+            _watch.watch(yaml_dir, rebuild)
+
     else:
         print("error: could not open YAML directory: %s" % yaml_dir)
         sys.exit(71)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## acronyms-client - queries an acronyms server, see 'acronyms --serve'
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import json             ## answers from the server
+import socket           ## Unix sockets
+import http.client      ## HTTP requests
+import urllib.parse     ## quoting queries
+
+
+
+##
+## Global variables
+##
+server_port = 8642          ## port of the server on localhost
+server_socket = ''          ## Unix socket of the server, used instead of port if set
+queries = []                ## queries in order of command line, list of (path, pattern)
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("acronyms-client - queries an acronyms server, see 'acronyms --serve'\n")
+    print("       Usage: acronyms-client [options]\n")
+    print("       Options")
+    print("          [-d | --duplicates]              - print duplicates (short form)")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-l | --long] <string>           - search <string> in long form")
+    print("          [-n | --notes] <string>          - search <string> in descriptions, notes, and URLs")
+    print("          [-r | --reload]                  - server reloads changed YAML files")
+    print("          [-s | --short] <string>          - search <string> in short form")
+    print("          [--port] <port>                  - port of the server on localhost, default: %d" % server_port)
+    print("          [--socket] <file>                - Unix socket of the server, used instead of port")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global server_port
+    global server_socket
+
+    try:
+        opts, args = getopt.getopt(argv,"dhl:n:rs:",["duplicates","help","long=","notes=","reload","short=","port=","socket="])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-d", "--duplicates"):
+            queries.append(("/duplicates", ''))
+        elif opt in ("-l", "--long"):
+            queries.append(("/long", arg))
+        elif opt in ("-n", "--notes"):
+            queries.append(("/notes", arg))
+        elif opt in ("-r", "--reload"):
+            queries.append(("/reload", ''))
+        elif opt in ("-s", "--short"):
+            queries.append(("/short", arg))
+        elif opt == "--port":
+            try:
+                server_port = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt == "--socket":
+            server_socket = arg
+
+
+
+##
+## class: HTTP connection over a Unix socket
+##
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        http.client.HTTPConnection.__init__(self, 'localhost')
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+
+##
+## function: send a query to the server, returns HTTP status and answer
+##
+def request(path, pattern):
+    if server_socket != '':
+        connection = UnixHTTPConnection(server_socket)
+    else:
+        connection = http.client.HTTPConnection('127.0.0.1', server_port)
+    if pattern != '':
+        path += "?q=" + urllib.parse.quote(pattern)
+    connection.request("GET", path)
+    response = connection.getresponse()
+    data = json.loads(response.read().decode('utf-8'))
+    connection.close()
+    return (response.status, data)
+
+
+
+##
+## function: print an acronym
+##
+def print_entry(entry):
+    print("      %s - %s\n        -> %s" % (entry['short'], entry['long'], entry['key']))
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    for path, pattern in queries:
+        try:
+            status, data = request(path, pattern)
+        except OSError as exc:
+            print("error: could not connect to server: %s" % exc)
+            sys.exit(71)
+        if status != 200:
+            print("error: %s" % data.get('error', status))
+            sys.exit(72)
+
+        if path == "/duplicates":
+            print("\n    > searching for duplicates\n")
+            for group in data['duplicates']:
+                for entry in group:
+                    print_entry(entry)
+                print("\n")
+        elif path == "/reload":
+            print("\n    > reloaded %d YAML files, found %d acronyms" % (data['files'], data['acronyms']))
+        else:
+            print("\n    > searching for %s %s\n" % (path[1:], pattern))
+            for entry in data['acronyms']:
+                print_entry(entry)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -32,6 +32,10 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _acronyms        ## compact store for acronyms
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
@@ -39,6 +43,10 @@ import sys, getopt      ## system for exit, getopt for CLI parsing
 import glob             ## gobal globbing to get YAML files recursively
 import pathlib          ## mkdirs in Python
 import datetime         ## to get date/time for ADOC files
+import re               ## finding used acronyms in AUX files
+import mmap             ## reading AUX files without line splitting
+import pickle           ## persist rendered acronyms
+import hashlib          ## fingerprint of all YAML files
 
 
 
@@ -48,12 +56,16 @@ import datetime         ## to get date/time for ADOC files
 task_level = "warn"         ## warning level
 output_file = ''            ## empty output file, means STDOUT
 yaml_dir = ''               ## YAML directory
+corpus = {}                 ## parsed YAML files, key is file name
 latex_aux = ''              ## target LaTeX, AUX file for reading used acronyms, all acronyms if not set
 
-acronyms = {}               ## dictionary of acronyms
-acr_idx  = {}               ## index for acronyms, key is short and value is list of names
+acronyms = {}               ## dictionary of acronyms, key is name and value is an acronym record
+acr_idx  = _acronyms.Index() ## index for acronyms, key is short and value is list of names
 longest_acr = ''            ## longest short form found
 
+memo_version = 1            ## version of the memo layout, change when layout or rendering changes
+acronym_used = re.compile(rb'^\\acronymused\{([^}]*)\}', re.MULTILINE)
+
 
 ##
 ## DO NOT CHANGE CODE BELOW, unless you know what you are doing
@@ -74,6 +86,10 @@ def help():
     print("          [-o | --output-file] <file>      - output file, default is STDOUT")
     print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
     print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
 
 
@@ -89,7 +105,7 @@ def cli(argv):
 
 
     try:
-        opts, args = getopt.getopt(argv,"a:ho:T:y:",["output-file=","yaml-directory=","help","aux=","task-level="])
+        opts, args = getopt.getopt(argv,"a:ho:T:y:",["output-file=","yaml-directory=","help","aux=","task-level=","cache-dir=","no-cache","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -97,12 +113,21 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-o", "--output-file"):
             output_file = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
         elif opt in ("-a", "--aux"):
             latex_aux = arg
 
@@ -112,13 +137,20 @@ def cli(argv):
 ## function: sort acronyms by value of short entry
 ##
 def index_acronyms(dict, idx):
-    for key in dict:
-        short_lc = dict[key]['short'].lower()
-        if short_lc in idx:
-            idx[short_lc].append(key)
-        else:
-            list = [ key ]
-            idx[short_lc] = list
+    idx.build(dict)
+
+
+
+##
+## function: add used acronyms from a file to a set, lines starting with \acronymused{key}
+##
+def read_used(fn, acr_required):
+    with open(fn, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for match in acronym_used.finditer(content):
+                acr_required.add(match.group(1).decode('utf-8'))
 
 
 
@@ -127,63 +159,118 @@ def index_acronyms(dict, idx):
 ##
 def get_used(fn, acr_required):
     if fn != '':
-        file = open(fn, "r")
-        for line in file:
-            if line.startswith("\\acronymused"):
-                key = line[line.find("{")+1:line.find("}")]
-                if not key in acr_required:
-                    acr_required.append(key)
-        file.close()
+        read_used(fn, acr_required)
 
         add_file = os.path.dirname(fn) + "/add-acronyms.txt"
         file_exists = os.path.isfile(add_file)
         if file_exists == True:
-            file = open(add_file, "r")
-            for line in file:
-                if line.startswith("\\acronymused"):
-                    key = line[line.find("{")+1:line.find("}")]
-                    if not key in acr_required:
-                        acr_required.append(key)
-            file.close()
+            read_used(add_file, acr_required)
 
 
 
 ##
-## function: get list of acronyms
+## function: render a single acronym, returns LaTeX key, short form, and \acro line
 ##
-def get_list(acr_required, dict, idx):
-    global longest_acr
-    acr_list = ''
+def render_entry(dict, entry):
+    acr_entry = entry.replace("/", ":")
+    acr_short = ''
+    if 'short-target' in dict[entry] and 'latex' in dict[entry]['short-target']:
+        acr_short = dict[entry]['short-target']['latex']
+    else:
+        acr_short = dict[entry]['short']
+
+    acr_long = ''
+    if 'long-target' in dict[entry] and 'latex' in dict[entry]['long-target']:
+        acr_long = dict[entry]['long-target']['latex']
+    elif 'en' in dict[entry]['long']:
+        acr_long = dict[entry]['long']['en']
+    else:
+        acr_long = dict[entry]['long'][next(iter(dict[entry]['long']))]
+
+    return (acr_entry, acr_short, "    \\acro{" + acr_entry + "}[" + acr_short + "]{" + acr_long + "}\n")
+
+
+
+##
+## function: fingerprint of all loaded YAML files
+##
+def get_fingerprint(files):
+    digest = hashlib.sha1()
+    for file in sorted(files):
+        digest.update(file[len(yaml_dir)+1:].encode('utf-8'))
+        digest.update(_corpus.digests.get(file, '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+
+##
+## function: read memo of rendered acronyms, empty if not found or not usable
+##
+def read_memo():
+    if _corpus.use_cache == True:
+        try:
+            with open(_corpus.cache_file(yaml_dir, 'acronyms-latex'), 'rb') as stream:
+                memo = pickle.load(stream)
+            if memo.get('version') == memo_version:
+                return memo
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+            pass
+    return { 'version': memo_version, 'fingerprint': '', 'rendered': [], 'entries': {} }
+
+
+
+##
+## function: write memo of rendered acronyms atomically, failure to write is not an error
+##
+def write_memo(memo):
+    if _corpus.use_cache == True:
+        fn = _corpus.cache_file(yaml_dir, 'acronyms-latex')
+        try:
+            os.makedirs(os.path.dirname(fn), exist_ok=True)
+            with open(fn + '.tmp', 'wb') as stream:
+                pickle.dump(memo, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(fn + '.tmp', fn)
+        except OSError:
+            pass
+
+
+
+##
+## function: get all rendered acronyms in order of short form, re-using rendered lines of unchanged YAML files
+##
+def get_rendered(dict, idx, memo):
+    rendered = []
+    entries = {}
     for key_sorted in sorted(idx.keys()):
         for entry in idx[key_sorted]:
-            acr_entry = entry.replace("/", ":")
-            use_acr = False
-            if len(acr_required) > 0:
-                if acr_entry in acr_required:
-                    use_acr = True
+            file = dict[entry]['src-file']
+            digest = _corpus.digests.get(file, '')
+            last = memo['entries'].get(entry)
+            if last is not None and last[0] == digest:
+                line = last[1]
             else:
-                use_acr = True
+                line = render_entry(dict, entry)
+            entries[entry] = (digest, line)
+            rendered.append(line)
+    memo['rendered'] = rendered
+    memo['entries'] = entries
+    return rendered
 
-            if use_acr == True:
-                acr_short = ''
-                if 'short-target' in dict[entry] and 'latex' in dict[entry]['short-target']:
-                    acr_short = dict[entry]['short-target']['latex']
-                else:
-                    acr_short = dict[entry]['short']
 
-                acr_long = ''
-                if 'long-target' in dict[entry] and 'latex' in dict[entry]['long-target']:
-                    acr_long = dict[entry]['long-target']['latex']
-                elif 'en' in dict[entry]['long']:
-                    acr_long = dict[entry]['long']['en']
-                else:
-                    acr_long = dict[entry]['long'][next(iter(dict[entry]['long']))]
 
-                acr_list += "    \\acro{" + acr_entry + "}[" + acr_short + "]{" + acr_long + "}\n"
-                if len(longest_acr) < len(acr_short):
-                    longest_acr = acr_short
+##
+## function: get list of acronyms, only required ones if any are required
+##
+def get_list(acr_required, rendered):
+    global longest_acr
+    acr_list = []
+    for acr_entry, acr_short, line in rendered:
+        if len(acr_required) == 0 or acr_entry in acr_required:
+            acr_list.append(line)
+            if len(longest_acr) < len(acr_short):
+                longest_acr = acr_short
 
-    return acr_list
+    return "".join(acr_list)
 
 
 
@@ -200,6 +287,7 @@ def print_list(acr_list):
         file.write("\\begin{acronym}[" + longest_acr + "X]\n")
         file.write(acr_list)
         file.write("\\end{acronym}\n")
+        _profile.add_write(file.tell())
         file.close()
         print("\n    > wrote %s\n" % output_file)
 
@@ -209,22 +297,20 @@ def print_list(acr_list):
 ## function: process a single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
         if not key in acronyms:
-            entries['src-file'] = file
-            acronyms[key] = entries
+            acronyms[key] = _acronyms.Acronym(entries, file)
         else:
             print("      -> key %s already in dictionary, defined in %s" % (key, acronyms[key]['src-file']))
             sys.exit(80)
 
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
@@ -236,19 +322,34 @@ def process_file(file):
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'processing': ( 'process_file', 'index_acronyms' ), 'memo': ( 'read_memo', 'write_memo' ), 'rendering': ( 'get_rendered', 'get_list' ), 'aux': ( 'get_used', ), 'writes': ( 'print_list', ) })
 
 #     print("    > YAML directory: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
-        for file in files:
-            process_file(file)
-
-        index_acronyms(acronyms, acr_idx)
-
-        acr_required = []
+        files = _discovery.files(_discovery.scan(yaml_dir))
+        corpus.update(_corpus.load(yaml_dir, files))
+        if output_file != '':
+            _corpus.print_stats()
+
+        ## unchanged YAML files: use the rendered acronyms from the last run, only filter
+        memo = read_memo()
+        fingerprint = get_fingerprint(corpus)
+        if len(_corpus.errors) == 0 and memo['fingerprint'] == fingerprint:
+            rendered = memo['rendered']
+        else:
+            for file in files:
+                process_file(file)
+            ## parsed YAML files are not needed anymore, all acronyms are in the compact store
+            corpus.clear()
+            index_acronyms(acronyms, acr_idx)
+            rendered = get_rendered(acronyms, acr_idx, memo)
+            memo['fingerprint'] = fingerprint
+            write_memo(memo)
+
+        acr_required = set()
         get_used(latex_aux, acr_required)
-        acr_list = get_list(acr_required, acronyms, acr_idx)
+        acr_list = get_list(acr_required, rendered)
         print_list(acr_list)
 
 #         print("\n    > processed %d YAML files, found %d acronyms" % (len(files), len(acronyms)))
@@ -32,6 +32,10 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _validation      ## collecting errors and duplicates for reports
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
@@ -47,7 +51,11 @@ import datetime         ## to get date/time for ADOC files
 ##
 task_level = "warn"         ## warning level
 yaml_dir = ''               ## YAML directory
-acronyms = {}               ## dictionary of acronyms
+corpus = {}                 ## parsed YAML files, key is file name
+collect = False             ## collect all errors and duplicates instead of stopping at the first one
+jobs = 1                    ## number of parallel jobs for parsing and validation
+report_file = ''            ## file for JSON report, implies collect
+acronyms = {}               ## files of acronyms, key is acronym key and value is file, parsed entries are not changed
 
 
 
@@ -65,9 +73,16 @@ def help():
     print("acronyms-val - validates YAML files of SKB acronyms\n")
     print("       Usage: acronyms-val [options]\n")
     print("       Options")
+    print("          [-c | --collect]                 - validate all files, report all errors and duplicates at the end")
     print("          [-h | --help]                    - this help screen")
+    print("          [-j | --jobs] <N>                - parse and validate with N parallel jobs, 0 for number of CPUs")
+    print("          [-r | --report] <file>           - write JSON report to file, implies collect")
     print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
     print("          [-y | --yaml-directory] <dir>    - top YAML directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
 
 
@@ -78,10 +93,13 @@ def help():
 def cli(argv):
     global yaml_dir
     global task_level
+    global collect
+    global jobs
+    global report_file
 
 
     try:
-        opts, args = getopt.getopt(argv,"hT:y:",["yaml-directory=","help","task-level="])
+        opts, args = getopt.getopt(argv,"chj:r:T:y:",["yaml-directory=","help","collect","jobs=","report=","task-level=","cache-dir=","no-cache","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -89,10 +107,33 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
+        elif opt in ("-c", "--collect"):
+            collect = True
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-r", "--report"):
+            report_file = arg
+            collect = True
 
 
 
@@ -101,57 +142,43 @@ def cli(argv):
 ##
 def validate_file(file, entries, key):
     ## check for required keys
-    found_keys = True
     expected_keys = ( 'short' , 'short-target', 'long', 'long-target', 'description', 'notes', 'urls')
-    errors = ""
+    errors = []
 
     if not 'short' in entries:
-        errors += "         --> did not find key 'short'\n"
-        found_keys = False
+        errors.append("did not find key 'short'")
     else:
-        if len(entries['short']) == 0:
-            errors += "         --> key 'short' with no entry\n"
-            found_keys = False
+        if not isinstance(entries['short'], str) or entries['short'] == '':
+            errors.append("key 'short' with no entry or not a string")
 
     if not 'long' in entries:
-        errors += "         --> did not find key 'long'\n"
-        found_keys = False
+        errors.append("did not find key 'long'")
     else:
-        if len(entries['long']) == 0:
-            errors += "         --> key 'long' with no entry\n"
-            found_keys = False
+        if not isinstance(entries['long'], dict) or len(entries['long']) == 0:
+            errors.append("key 'long' with no entry or not a map")
 
-    if 'long-target' in entries and len(entries['long-target']) == 0:
-            errors += "         --> key 'long-target' with no entry\n"
-            found_keys = False
+    if 'long-target' in entries and (not isinstance(entries['long-target'], dict) or len(entries['long-target']) == 0):
+            errors.append("key 'long-target' with no entry or not a map")
 
-    if 'description' in entries and len(entries['description']) == 0:
-            errors += "         --> key 'description' with no entry\n"
-            found_keys = False
+    if 'description' in entries and (not isinstance(entries['description'], dict) or len(entries['description']) == 0):
+            errors.append("key 'description' with no entry or not a map")
 
-    if 'notes' in entries and len(entries['notes']) == 0:
-            errors += "         --> key 'notes' with no entry\n"
-            found_keys = False
+    if 'notes' in entries and (not isinstance(entries['notes'], dict) or len(entries['notes']) == 0):
+            errors.append("key 'notes' with no entry or not a map")
 
-    if 'urls' in entries and len(entries['urls']) == 0:
-            errors += "         --> key 'urls' with no entry\n"
-            found_keys = False
+    if 'urls' in entries and (not isinstance(entries['urls'], dict) or len(entries['urls']) == 0):
+            errors.append("key 'urls' with no entry or not a map")
 
     if not all(elem in expected_keys for elem in entries):
-        errors += "         --> unknown key\n"
-        found_keys = False
+        errors.append("unknown key")
 
     file_short = file[len(yaml_dir)+1:]
     dir_short = file_short.rsplit('/', 1)[0]
     key_short = key.rsplit('/', 1)[0]
     if not key_short == dir_short:
-        errors += "         --> something wrong in key path (" + key_short + ") and directory (" + dir_short + ")\n"
-        found_keys = False
+        errors.append("something wrong in key path (" + key_short + ") and directory (" + dir_short + ")")
 
-    if found_keys == False:
-        print("      -> validation failed")
-        print("%s" % errors)
-        sys.exit(80)
+    return errors
 
 
 
@@ -159,45 +186,93 @@ def validate_file(file, entries, key):
 ## function: process a single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
-        validate_file(file, entries, key)
+        errors = validate_file(file, entries, key)
+        if len(errors) > 0:
+            print("      -> validation failed")
+            print("%s" % "".join("         --> " + error + "\n" for error in errors))
+            sys.exit(80)
 
         if not key in acronyms:
-            entries['src-file'] = file
-            acronyms[key] = entries
+            acronyms[key] = file
         else:
-            print("      -> key %s already in dictionary, defined in %s" % (key, acronyms[key]['src-file']))
+            print("      -> key %s already in dictionary, defined in %s" % (key, acronyms[key]))
             sys.exit(80)
 
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
 
 
 
+##
+## function: check a single YAML file for collect mode, returns key (None if no key found) and list of errors
+## - a failing validation is recorded as error of the file, so one bad file does not stop the pass
+##
+def check_file(file):
+    if not file in corpus:
+        if file in _corpus.errors:
+            return (None, [ "YAML error: " + _corpus.errors[file] ])
+        return (None, [ "could not open file" ])
+
+    data = corpus[file]
+    if not isinstance(data, dict) or len(data) != 1 or not isinstance(data[list(data.keys())[0]], dict):
+        return (None, [ "expected a single key with a map of entries" ])
+    key = list(data.keys())[0]
+    try:
+        return (key, validate_file(file, data[key], key))
+    except Exception as exc:
+        return (key, [ "validation failed with %s: %s" % (type(exc).__name__, exc) ])
+
+
+
+##
+## function: validate all files in collect mode, print report, and write JSON report if requested
+##
+def collect_files(files):
+    results = _validation.run(files, check_file, jobs)
+    for file, (key, errors) in zip(files, results):
+        _validation.add_errors(file, errors)
+        if key is not None:
+            _validation.add_key(key, file)
+
+    _validation.print_report(yaml_dir, len(files))
+    if report_file != '':
+        _validation.write_json(report_file, yaml_dir, len(files))
+
+
+
 ##
 ## function: main function
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'validation': ( 'validate_file', ), 'processing': ( 'process_file', 'collect_files' ) }, { _validation: { 'writes': ( 'write_json', ) } })
 
     print("    > YAML directory: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
-        for file in files:
-            print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
-            process_file(file)
+        files = _discovery.files(_discovery.scan(yaml_dir))
+        corpus.update(_corpus.load(yaml_dir, files))
+        _corpus.print_stats()
+        if collect == True:
+            collect_files(files)
+            if _validation.exit_status() != 0:
+                sys.exit(_validation.exit_status())
+            print("\n    > processed %d YAML files, found %d acronyms" % (len(files), len(_validation.keys)))
+        else:
+            for file in files:
+                print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
+                process_file(file)
 
-        print("\n    > processed %d YAML files, found %d acronyms" % (len(files), len(acronyms)))
+            print("\n    > processed %d YAML files, found %d acronyms" % (len(files), len(acronyms)))
 
     else:
         print("error: could not open YAML directory: %s" % yaml_dir)
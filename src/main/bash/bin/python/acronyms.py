@@ -32,6 +32,11 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _acronyms        ## compact store for acronyms
+import _ngram           ## n-gram index for substring search
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
@@ -39,6 +44,10 @@ import sys, getopt      ## system for exit, getopt for CLI parsing
 import glob             ## gobal globbing to get YAML files recursively
 import pathlib          ## mkdirs in Python
 import datetime         ## to get date/time for ADOC files
+import json             ## answers in server mode
+import socketserver     ## Unix socket server
+import http.server      ## HTTP server for server mode
+import urllib.parse     ## parsing queries in server mode
 
 
 
@@ -47,13 +56,17 @@ import datetime         ## to get date/time for ADOC files
 ##
 task_level = "warn"         ## warning level
 yaml_dir = ''               ## YAML directory
+corpus = {}                 ## parsed YAML files, key is file name
 duplicates = False          ## search and print duplicates
 search_short = ''           ## search string for SHORT form
 search_long = ''            ## search string for LONG form
 search_dnu = ''             ## search string for description, notes, and urls
+serve = False               ## run as server, answering queries over HTTP
+serve_port = 8642           ## server mode: port on localhost
+serve_socket = ''           ## server mode: Unix socket, used instead of port if set
 
-acronyms = {}               ## dictionary of acronyms
-acr_idx  = {}               ## index for acronyms, key is short and value is list of names
+acronyms = {}               ## dictionary of acronyms, key is name and value is an acronym record
+acr_idx  = _acronyms.Index() ## index for acronyms, key is short and value is list of names
 
 
 ##
@@ -76,7 +89,14 @@ def help():
     print("          [-n | --notes] <string>          - search <string> in descriptions, notes, and URLs")
     print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
     print("          [-s | --short] <string>          - search <string> in short form")
+    print("          [-S | --serve]                   - run as server, answer queries over HTTP, see acronyms-client")
+    print("          [--port] <port>                  - server mode: port on localhost, default: %d" % serve_port)
+    print("          [--socket] <file>                - server mode: Unix socket, used instead of port")
     print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
 
 
@@ -94,11 +114,13 @@ def cli(argv):
     global search_long
     global search_dnu
 
-    global latex_aux
+    global serve
+    global serve_port
+    global serve_socket
 
 
     try:
-        opts, args = getopt.getopt(argv,"dhl:n:s:T:y:",["yaml-directory=","duplicates","notes=","short=","long=","help","task-level="])
+        opts, args = getopt.getopt(argv,"dhl:n:s:ST:y:",["yaml-directory=","duplicates","notes=","short=","long=","help","task-level=","cache-dir=","no-cache","serve","port=","socket=","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -106,6 +128,11 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-s", "--short"):
@@ -116,8 +143,22 @@ def cli(argv):
             search_dnu = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
         elif opt in ("-d", "--duplicates"):
             duplicates = True
+        elif opt in ("-S", "--serve"):
+            serve = True
+        elif opt == "--port":
+            try:
+                serve_port = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt == "--socket":
+            serve_socket = arg
 
 
 
@@ -125,13 +166,7 @@ def cli(argv):
 ## function: sort acronyms by value of short entry
 ##
 def index_acronyms(dict, idx):
-    for key in dict:
-        short_lc = dict[key]['short'].lower()
-        if short_lc in idx:
-            idx[short_lc].append(key)
-        else:
-            list = [ key ]
-            idx[short_lc] = list
+    idx.build(dict)
 
 
 
@@ -140,11 +175,48 @@ def index_acronyms(dict, idx):
 ##
 def find_duplicates(dict, idx):
     print("\n    > searching for duplicates\n")
-    for key_sorted in sorted(idx.keys()):
-        if len(idx[key_sorted]) > 1:
-            for entry in idx[key_sorted]:
-                print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
-            print("\n")
+    for group in query_duplicates(idx):
+        for entry in group:
+            print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
+        print("\n")
+
+
+
+##
+## function: duplicates (short form), returns list of lists of entry keys
+##
+def query_duplicates(idx):
+    return [ idx[key_sorted] for key_sorted in sorted(idx.keys()) if len(idx[key_sorted]) > 1 ]
+
+
+##
+## function: texts of an acronym for the n-gram index: short, long, and description/notes/URLs
+##
+def index_texts(data):
+    key = list(data.keys())[0]
+    entries = data[key]
+    fields = { 'short': [ entries['short'] ], 'long': list(entries['long'].values()), 'dnu': [] }
+    for field in ('description', 'notes', 'urls'):
+        if field in entries:
+            fields['dnu'].extend(entries[field].values())
+    return (key, fields)
+
+
+
+##
+## function: sort found acronyms by short form like the index
+##
+def sort_found(dict, idx, found):
+    return sorted(found, key=lambda entry: (dict[entry]['short'].lower(), idx[dict[entry]['short'].lower()].index(entry)))
+
+
+
+##
+## function: print found acronyms, sorted by short form like the index
+##
+def print_found(dict, idx, found):
+    for entry in sort_found(dict, idx, found):
+        print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
 
 
 
@@ -153,12 +225,7 @@ def find_duplicates(dict, idx):
 ##
 def find_short(dict, idx, name):
     print("\n    > searching for short %s\n" % name)
-    name_lc = name.lower()
-
-    for key_sorted in sorted(idx.keys()):
-        for entry in idx[key_sorted]:
-            if dict[entry]['short'].lower().find(name_lc) != -1:
-                print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
+    print_found(dict, idx, _ngram.search(['short'], name))
 
 
 
@@ -167,13 +234,7 @@ def find_short(dict, idx, name):
 ##
 def find_long(dict, idx, pattern):
     print("\n    > searching for long %s\n" % pattern)
-    pattern_lc = pattern.lower()
-
-    for key_sorted in sorted(idx.keys()):
-        for entry in idx[key_sorted]:
-            for long_idx in dict[entry]['long']:
-                if dict[entry]['long'][long_idx].lower().find(pattern_lc) != -1:
-                    print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
+    print_found(dict, idx, _ngram.search(['long'], pattern))
 
 
 
@@ -182,22 +243,7 @@ def find_long(dict, idx, pattern):
 ##
 def find_dnu(dict, idx, pattern):
     print("\n    > searching for pattern %s\n" % pattern)
-    pattern_lc = pattern.lower()
-
-    for key_sorted in sorted(idx.keys()):
-        for entry in idx[key_sorted]:
-            if 'description' in dict[entry]:
-                for key in dict[entry]['description']:
-                    if dict[entry]['description'][key].lower().find(pattern_lc) != -1:
-                        print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
-            if 'notes' in dict[entry]:
-                for key in dict[entry]['notes']:
-                    if dict[entry]['notes'][key].lower().find(pattern_lc) != -1:
-                        print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
-            if 'urls' in dict[entry]:
-                for key in dict[entry]['urls']:
-                    if dict[entry]['urls'][key].lower().find(pattern_lc) != -1:
-                        print("      %s - %s\n        -> %s" % (dict[entry]['short'], dict[entry]['long'], entry))
+    print_found(dict, idx, _ngram.search(['dnu'], pattern))
 
 
 
@@ -205,28 +251,148 @@ def find_dnu(dict, idx, pattern):
 ## function: process a single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
         if not key in acronyms:
-            entries['src-file'] = file
-            acronyms[key] = entries
+            acronyms[key] = _acronyms.Acronym(entries, file)
         else:
             print("      -> key %s already in dictionary, defined in %s" % (key, acronyms[key]['src-file']))
             sys.exit(80)
 
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
 
 
 
+##
+## function: load all acronyms and build indexes, returns list of YAML files
+## - acronyms are loaded into new dictionary and index, which replace the old ones only if all files were processed
+## - a failing load in server mode (/reload) leaves the acronyms of the last load in place
+##
+def load_acronyms():
+    global acronyms
+    global acr_idx
+
+    files = _discovery.files(_discovery.scan(yaml_dir))
+    corpus.clear()
+    corpus.update(_corpus.load(yaml_dir, files))
+    _corpus.print_stats()
+
+    previous = (acronyms, acr_idx)
+    acronyms, acr_idx = {}, _acronyms.Index()
+    try:
+        for file in files:
+            process_file(file)
+        index_acronyms(acronyms, acr_idx)
+    except BaseException:
+        acronyms, acr_idx = previous
+        corpus.clear()
+        raise
+    if serve == True or search_short != '' or search_long != '' or search_dnu != '':
+        _ngram.update(yaml_dir, 'acronyms-ngram', corpus, _corpus.digests, index_texts)
+        _ngram.print_stats()
+    ## parsed YAML files are not needed anymore, all acronyms are in the compact store
+    corpus.clear()
+    return files
+
+
+
+##
+## function: answer a query in server mode, returns HTTP status and answer
+## - /short?q=<string>, /long?q=<string>, /notes?q=<string>: list of found acronyms
+## - /duplicates: list of lists of acronyms with the same short form
+## - /reload: re-load changed YAML files, returns number of acronyms
+##
+def answer(path):
+    url = urllib.parse.urlparse(path)
+    pattern = urllib.parse.parse_qs(url.query).get('q', [''])[0]
+    fields = { '/short': 'short', '/long': 'long', '/notes': 'dnu' }
+
+    if url.path in fields:
+        if pattern == '':
+            return (400, { 'error': "missing query parameter 'q'" })
+        found = sort_found(acronyms, acr_idx, _ngram.search([fields[url.path]], pattern))
+        return (200, { 'query': pattern, 'acronyms': [ answer_entry(entry) for entry in found ] })
+    elif url.path == '/duplicates':
+        return (200, { 'duplicates': [ [ answer_entry(entry) for entry in group ] for group in query_duplicates(acr_idx) ] })
+    elif url.path == '/reload':
+        try:
+            files = load_acronyms()
+        except SystemExit:
+            return (500, { 'error': 'reload failed, see server output' })
+        except Exception as exc:
+            print("      -> reload failed with %s: %s" % (type(exc).__name__, exc))
+            return (500, { 'error': 'reload failed, see server output' })
+        return (200, { 'files': len(files), 'acronyms': len(acronyms) })
+    return (404, { 'error': 'unknown query ' + url.path })
+
+
+
+##
+## function: acronym for an answer in server mode
+##
+def answer_entry(entry):
+    return { 'key': entry, 'short': acronyms[entry]['short'], 'long': acronyms[entry]['long'] }
+
+
+
+##
+## class: HTTP request handler for server mode
+##
+class QueryHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, data = answer(self.path)
+        content = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+
+##
+## class: HTTP server on a Unix socket for server mode
+##
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    pass
+
+
+
+##
+## function: run server mode until interrupted
+##
+def run_server():
+    if serve_socket != '':
+        if os.path.exists(serve_socket):
+            os.remove(serve_socket)
+        server = UnixHTTPServer(serve_socket, QueryHandler)
+        print("    > serving on socket: %s" % serve_socket)
+    else:
+        server = http.server.HTTPServer(('127.0.0.1', serve_port), QueryHandler)
+        print("    > serving on: http://127.0.0.1:%d" % serve_port)
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    if serve_socket != '' and os.path.exists(serve_socket):
+        os.remove(serve_socket)
+
+
+
 ##
 ## function: process directory
 ##
@@ -259,15 +425,15 @@ def process_directory(directory):
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'processing': ( 'process_file', 'index_acronyms' ), 'query': ( 'find_duplicates', 'find_short', 'find_long', 'find_dnu' ) }, { _ngram: { 'index': ( 'update', 'read_index', 'write_index' ) } })
 
     print("    > YAML directory: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
-        for file in files:
-            process_file(file)
-
-        index_acronyms(acronyms, acr_idx)
+        files = load_acronyms()
+        if serve == True:
+            run_server()
+            return
 
         if duplicates == True:
             find_duplicates(acronyms, acr_idx)
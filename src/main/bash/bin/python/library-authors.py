@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## library-authors - indexes persons of library entries and shows their entries and co-authors
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings, parallel parsing
+import _persons         ## persisted person index
+import _output          ## writing the JSON file only if changed, atomically
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import json             ## JSON output
+
+
+
+##
+## Global variables
+##
+yaml_dir = ''               ## YAML directory
+persons = []                ## persons to show entries and co-authors for
+list_all = False            ## list all persons with their number of entries
+json_file = ''              ## file for JSON output
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("library-authors - indexes persons of library entries and shows their entries and co-authors\n")
+    print("       Usage: library-authors [options]\n")
+    print("       Options")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-j | --jobs] <N>                - parse changed YAML files with N parallel jobs, 0 for number of CPUs")
+    print("          [-J | --json] <file>             - also write the result as JSON to file")
+    print("          [-l | --list]                    - list all persons with their number of entries, default without person")
+    print("          [-p | --person] <name>           - show entries and co-authors of a person, e.g. 'van der Meer, Sven', can be repeated")
+    print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--cache-dir] <dir>              - cache directory for the person index")
+    print("          [--no-cache]                     - do not use the person index of the last run, parse all YAML files")
+    print("\n")
+    print("Persons are authors, editors, presenters, and panelists")
+    print("The index is kept in the cache directory, later runs only parse new and changed YAML files")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global yaml_dir
+    global list_all
+    global json_file
+
+    try:
+        opts, args = getopt.getopt(argv,"hj:J:lp:y:",["help","jobs=","json=","list","person=","yaml-directory=","cache-dir=","no-cache"])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-J", "--json"):
+            json_file = arg
+        elif opt in ("-l", "--list"):
+            list_all = True
+        elif opt in ("-p", "--person"):
+            persons.append(arg)
+        elif opt in ("-y", "--yaml-directory"):
+            yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
+
+    if len(persons) == 0:
+        list_all = True
+
+
+
+##
+## function: print all persons with their number of entries, returns them for JSON
+##
+def print_list():
+    ret = {}
+    for name, count in _persons.get_persons():
+        print("%s: %d" % (name, count))
+        ret[name] = count
+    return ret
+
+
+
+##
+## function: print entries and co-authors of a person, returns them for JSON, None if the person is not in the index
+##
+def print_person(name):
+    pid = _persons.lookup(name)
+    if pid is None:
+        print("    > person not found: %s" % name)
+        return None
+
+    entries = _persons.get_entries(pid)
+    coauthors = _persons.get_coauthors(pid)
+    print("    > %s: %d entries, %d co-authors" % (name, len(set(key for key, role in entries)), len(coauthors)))
+    for key, role in entries:
+        print("      - %s (%s)" % (key, role))
+    if len(coauthors) > 0:
+        print("      co-authors: %s" % ", ".join("%s (%d)" % (other, count) for other, count in coauthors))
+    return { 'entries': [ { 'key': key, 'role': role } for key, role in entries ], 'coauthors': dict(coauthors) }
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    if not os.path.isdir(yaml_dir):
+        print("error: could not open YAML directory: %s" % yaml_dir)
+        sys.exit(71)
+
+    _persons.update(yaml_dir)
+    _persons.print_stats()
+
+    result = {}
+    if list_all == True:
+        result['count'] = print_list()
+    if len(persons) > 0:
+        result['persons'] = { name: print_person(name) for name in persons }
+
+    if json_file != '':
+        if _output.write(json_file, json.dumps(result, indent=1, ensure_ascii=False) + "\n") == True:
+            print("    > wrote JSON to: %s" % json_file)
+        else:
+            print("    > unchanged JSON: %s" % json_file)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
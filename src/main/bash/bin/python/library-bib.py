@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## library-bib - processes SKB library to build BIB file
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _profile         ## per-phase profiling with --profile
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import re               ## finding citations and crossrefs
+import mmap             ## reading AUX files without line splitting
+import collections      ## deque for crossref keys still to add
+
+
+
+##
+## Global variables
+##
+task_level = "warn"         ## warning level
+output_file = ''            ## empty output file, means STDOUT
+yaml_dir = ''               ## YAML directory
+latex_aux = ''              ## target LaTeX, AUX file for reading cited references
+file_ext = '-biblatex.bib'  ## extension of BIB files in the library, '.bib' for BiBTeX
+
+bib_index = {}              ## index of BIB files, key is citation key and value is file name or None
+bib_entries = {}            ## content of BIB files, key is citation key, in order of first use
+
+aux_cite = re.compile(rb'\\abx@aux@cite(?:\{[^}]*\})?\{([^}]*)\}')
+bib_crossref = re.compile(rb'crossref\s*=\s*[{"]([^}"]*)[}"]', re.IGNORECASE)
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("library-bib - processes SKB library to build BIB file\n")
+    print("       Usage: library-bib [options]\n")
+    print("       Options")
+    print("          [-a | --aux] <aux-file>          - LaTeX auxiliary file with cited references")
+    print("          [-b | --bib]                     - use BiBTeX references instead of Biblatex")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-o | --output-file] <file>      - output file, default is STDOUT")
+    print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
+    print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global output_file
+    global yaml_dir
+    global task_level
+    global latex_aux
+    global file_ext
+
+
+    try:
+        opts, args = getopt.getopt(argv,"a:bho:T:y:",["output-file=","yaml-directory=","help","aux=","bib","task-level=","profile","profile-dump="])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
+        elif opt in ("-T", "--task-level"):
+            task_level = arg
+        elif opt in ("-o", "--output-file"):
+            output_file = arg
+        elif opt in ("-y", "--yaml-directory"):
+            yaml_dir = arg
+        elif opt in ("-a", "--aux"):
+            latex_aux = arg
+        elif opt in ("-b", "--bib"):
+            file_ext = '.bib'
+
+
+
+##
+## function: get cited keys from AUX file, in order of first citation without duplicates
+##
+def get_cited(fn):
+    cited = {}
+    with open(fn, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for match in aux_cite.finditer(content):
+                cited[match.group(1).decode('utf-8')] = True
+    return list(cited)
+
+
+
+##
+## function: get BIB file for a key, e.g. cite:ietf:rfc:1234 -> <yaml_dir>/ietf/rfc/1234-biblatex.bib, None if not in library
+##
+def get_bib_file(key):
+    if not key in bib_index:
+        name = key[len("cite:"):] if key.startswith("cite:") else key
+        fn = yaml_dir + "/" + re.sub(r':+', '/', name) + file_ext
+        bib_index[key] = fn if os.path.isfile(fn) else None
+    return bib_index[key]
+
+
+
+##
+## function: add BIB entries for keys and everything they crossref, each entry once
+##
+def add_entries(keys):
+    todo = collections.deque(keys)
+    while len(todo) > 0:
+        key = todo.popleft()
+        if key in bib_entries:
+            continue
+        fn = get_bib_file(key)
+        if fn is None:
+            continue
+        with open(fn, "rb") as file:
+            content = file.read()
+        bib_entries[key] = content
+        for match in bib_crossref.finditer(content):
+            todo.append(match.group(1).decode('utf-8').strip())
+
+
+
+##
+## function: write all BIB entries with a single write
+##
+def write_entries():
+    content = b"\n" + b"".join(bib_entries.values())
+    if output_file == '':
+        sys.stdout.flush()
+        sys.stdout.buffer.write(content)
+        sys.stdout.buffer.flush()
+    else:
+        with open(output_file, "wb") as file:
+            file.write(content)
+        _profile.add_write(len(content))
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+    _profile.start(globals(), { 'aux': ( 'get_cited', ), 'crossrefs': ( 'add_entries', ), 'writes': ( 'write_entries', ) })
+
+    dir_exists = os.path.isdir(yaml_dir)
+    if dir_exists == True:
+        if latex_aux == '':
+            return
+        if not os.path.isfile(latex_aux):
+            print("error: could not open AUX file: %s" % latex_aux)
+            sys.exit(72)
+
+        cited = get_cited(latex_aux)
+        add_entries(cited)
+        references = len([key for key in cited if key in bib_entries])
+
+        if len(bib_entries) > 0:
+            write_entries()
+            if output_file != '':
+                print("    > references - %d, crossrefs - %d --> %s" % (references, len(bib_entries) - references, output_file))
+
+    else:
+        print("error: could not open YAML directory: %s" % yaml_dir)
+        sys.exit(71)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -32,6 +32,12 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _watch           ## watch mode, rebuild of changed entries
+import _artifacts       ## index of artifacts in the library home
+import _output          ## writing files only if changed, atomically
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
@@ -39,6 +45,11 @@ import sys, getopt      ## system for exit, getopt for CLI parsing
 import glob             ## gobal globbing to get YAML files recursively
 import pathlib          ## mkdirs in Python
 import datetime         ## to get date/time for ADOC files
+import hashlib          ## hashes of generated files for incremental builds
+import json             ## manifest for incremental builds
+import io               ## buffers for output of parallel jobs
+import contextlib       ## redirect output of parallel jobs
+import multiprocessing  ## process pool for parallel jobs
 
 
 
@@ -48,6 +59,7 @@ import datetime         ## to get date/time for ADOC files
 task_level = "warn"         ## warning level
 output_dir = ''             ## empty output directory, means same as the YAML file
 yaml_dir = ''               ## YAML directory
+corpus = {}                 ## parsed YAML files, key is file name
 library_url = ''            ## URL for auto-generated library links (yaml, adoc, bib, biblatex)
 build_local = False         ## do not generate local links to library
 library_home = ''           ## library home directory, with PDFs and other artifacts
@@ -56,6 +68,13 @@ target_adoc = False         ## target ADOC
 target_bibtex = False       ## target BiBTeX
 target_biblatex = False     ## target Biblatex
 
+jobs = 1                    ## number of parallel jobs for processing YAML files
+incremental = False         ## incremental build: only changed entries are rendered and written
+watch = False               ## watch mode: keep running and rebuild changed entries
+manifest_version = 2        ## version of the manifest layout, change when layout or generated content changes
+manifest = {}               ## manifest of the last build: source and output hashes
+manifest_new = {}           ## manifest of this build
+
 
 
 ##
@@ -76,13 +95,21 @@ def help():
     print("          [-a | --adoc]                    - target ADOC: create ADOC file")
     print("          [-b | --bibtex]                  - target BiBTeX: create BIB file")
     print("          [-h | --help]                    - this help screen")
+    print("          [-i | --incremental]             - only render and write entries that changed since the last build")
+    print("          [-j | --jobs] <N>                - process YAML files with N parallel jobs, 0 for number of CPUs")
     print("          [-l | --local]                   - generate local links, requires lib-home set")
     print("          [-L | --lib-home] <dir>          - home directory of library with artifacts, e.g. PDF files")
     print("          [-o | --output-directory] <dir>  - output directory, default is same as YAML source")
     print("          [-T | --task-level] <level>      - task log level: error, warn, warn-strict, info, debug, trace")
     print("          [-u | --library-url] <URL>       - URL with path prefix for auto-generated links (e.g. yaml, adoc)")
     print("          [-x | --biblatex]                - target BibLatex: create BIB file for Biblatex")
+    print("          [-w | --watch]                   - watch YAML directory and rebuild changed entries, until Ctrl-C")
     print("          [-y | --yaml-directory] <dir>    - YAML directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files and the artifact index")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files and scan all artifacts")
+    print("          [--watch-interval] <seconds>     - seconds between two polls in watch mode, default 1")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
     print("Extracted ADOC files will be written to the output directory, if set")
     print("Entry files for ADOC files will be created in the output directory")
@@ -106,9 +133,12 @@ def cli(argv):
     global target_bibtex
     global target_biblatex
 
+    global incremental
+    global jobs
+    global watch
 
     try:
-        opts, args = getopt.getopt(argv,"AabhlL:o:T:u:xy:",["all","adoc","bibtex","local","lib-home=","output-directory=","yaml-directory=","help","biblatex","task-level=","library-url="])
+        opts, args = getopt.getopt(argv,"Aabhij:lL:o:T:u:wxy:",["all","adoc","bibtex","incremental","jobs=","watch","watch-interval=","local","lib-home=","output-directory=","yaml-directory=","help","biblatex","task-level=","library-url=","cache-dir=","no-cache","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -116,12 +146,21 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-o", "--output-directory"):
             output_dir = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
         elif opt in ("-A", "--all"):
             target_adoc = True
             target_bibtex = True
@@ -134,6 +173,25 @@ def cli(argv):
             target_biblatex = True
         elif opt in ("-u", "--library-url"):
             library_url = arg
+        elif opt in ("-i", "--incremental"):
+            incremental = True
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-w", "--watch"):
+            watch = True
+        elif opt == "--watch-interval":
+            try:
+                _watch.interval = float(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
         elif opt in ("-l", "--local"):
             build_local = True
         elif opt in ("-L", "--lib-home"):
@@ -141,10 +199,106 @@ def cli(argv):
 
 
 
+##
+## function: header for generated ADOC files
+## - incremental builds do not add date and time, so unchanged entries result in byte-identical files
+##
+def adoc_header():
+    header = "//\n"
+    header += "// This file was generated by SKB-Dashboard, task 'library-ext'\n"
+    if incremental == False:
+        header += "// - on " + datetime.datetime.now().strftime("%A %B %e") + " at " + datetime.datetime.now().strftime("%T") + "\n"
+    header += "// - skb-dashboard: https://www.github.com/vdmeer/skb-dashboard\n"
+    header += "//\n\n"
+    return header
+
+
+
+##
+## function: options that change generated content, a change of any of them invalidates the manifest
+##
+def manifest_options():
+    return [ manifest_version, output_dir, library_url, build_local, library_home, target_adoc, target_bibtex, target_biblatex ]
+
+
+
+##
+## function: file name of the manifest, in the output directory if set, YAML directory otherwise
+##
+def manifest_file():
+    if output_dir != '':
+        return output_dir + "/.library-ext-manifest.json"
+    return yaml_dir + "/.library-ext-manifest.json"
+
+
+
+##
+## function: read manifest of the last build, empty if not found or built with other options
+##
+def read_manifest():
+    global manifest
+
+    try:
+        with open(manifest_file(), 'r') as stream:
+            data = json.load(stream)
+        if data['options'] == manifest_options():
+            manifest = data
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if not 'files' in manifest:
+        manifest = { 'files': {}, 'dirs': {} }
+
+    manifest_new['options'] = manifest_options()
+    manifest_new['files'] = {}
+    manifest_new['dirs'] = {}
+
+
+
+##
+## function: write manifest of this build
+##
+def write_manifest():
+    fn = manifest_file()
+    pathlib.Path(os.path.dirname(fn)).mkdir(parents=True, exist_ok=True)
+    tmp = fn + ".tmp"
+    with open(tmp, 'w') as stream:
+        json.dump(manifest_new, stream, indent=1, sort_keys=True)
+    os.replace(tmp, fn)
+
+
+
+##
+## function: write an output file, unless the last build wrote the same content and the file still exists
+## - files are only written if their content changed, see _output
+## - returns the hash of the content for the manifest
+##
+def write_output(fn, content, previous):
+    digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    if previous.get(fn) == digest and os.path.isfile(fn):
+        print("    > unchanged file: %s" % fn)
+    elif _output.write(fn, content) == True:
+        print("    > wrote file: %s" % fn)
+    else:
+        print("    > unchanged file: %s" % fn)
+    return digest
+
+
+
+##
+## function: local artifacts of an entry in the library home, empty if local links are not requested
+##
+def local_artifacts(key, file_no_ext):
+    if build_local == True and library_home != '':
+        return _artifacts.find(os.path.dirname(key), os.path.basename(file_no_ext))
+    return []
+
+
+
 ##
 ## function: process links
+## - artifacts are the local artifacts of the entry, see local_artifacts()
 ##
-def process_links(entries, key, file_no_ext):
+def process_links(entries, key, file_no_ext, artifacts):
     ## process links
     adoc_links = ''
     link_count = 0
@@ -178,8 +332,7 @@ def process_links(entries, key, file_no_ext):
 
     ## process links: local library links
     if build_local == True and library_home != '':
-        dir = library_home +"/" + os.path.dirname(key)
-        files = glob.glob(dir + '/' + os.path.basename(file_no_ext) + '*.*', recursive=False)
+        files = artifacts
         if len(files) > 0:
             if link_count > 0:
                 adoc_links += "    ┃ "
@@ -212,18 +365,31 @@ def process_links(entries, key, file_no_ext):
 ## function: process single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
         ## determine filename for output
         file_no_ext = os.path.splitext(file)[0]
 
+        ## local artifacts, their names are part of the output, so a new or removed artifact changes the entry
+        artifacts = local_artifacts(key, file_no_ext)
+        artifacts_digest = hashlib.sha1("\n".join(artifacts).encode('utf-8')).hexdigest()
+
+        ## incremental: skip entries with the same source and artifacts hash as in the last build
+        file_rel = file[len(yaml_dir)+1:]
+        previous = {}
+        if incremental == True:
+            last = manifest['files'].get(file_rel)
+            if last is not None:
+                previous = last['out']
+                if last['src'] == _corpus.digests[file] and last['artifacts'] == artifacts_digest and all(os.path.isfile(fn) for fn in previous):
+                    manifest_new['files'][file_rel] = last
+                    print("    > unchanged, skipped")
+                    return
+        outputs = {}
+
         ## determine presenter(s)
         presenters = []
         if 'presenters' in entries:
@@ -291,11 +457,7 @@ def process_file(file):
         ##
         ## prepare ADOC content
         ##
-        adoc_content = "//\n"
-        adoc_content += "// This file was generated by SKB-Dashboard, task 'library-ext'\n"
-        adoc_content += "// - on " + datetime.datetime.now().strftime("%A %B %e") + " at " + datetime.datetime.now().strftime("%T") + "\n"
-        adoc_content += "// - skb-dashboard: https://www.github.com/vdmeer/skb-dashboard\n"
-        adoc_content += "//\n\n"
+        adoc_content = adoc_header()
 
         ##
         ## if this is a tutorial/presentation: add 1 name if 1 presenter, no name else, and add "et al." if more names in presenters or authors
@@ -365,7 +527,7 @@ def process_file(file):
             adoc_content += entries['adoc']
 
         ## process links
-        adoc_links = process_links(entries, key, file_no_ext)
+        adoc_links = process_links(entries, key, file_no_ext, artifacts)
         if len(adoc_links) > 0 :
             adoc_content += adoc_links
 
@@ -375,56 +537,197 @@ def process_file(file):
             if output_dir != '':
                 file_adoc = output_dir + "/" + os.path.dirname(key) +"/" + os.path.basename(file_no_ext) + ".adoc"
                 pathlib.Path(output_dir + "/" + os.path.dirname(key)).mkdir(parents=True, exist_ok=True)
-            stream_out = open(file_adoc,'w')
-            stream_out.write(adoc_content + "\n")
-            stream_out.close()
-            print("    > wrote file: %s" % file_adoc)
+            outputs[file_adoc] = write_output(file_adoc, adoc_content + "\n", previous)
 
         ## if we have BiBTeX in YAML, write file
         if target_bibtex == True and 'bibtex' in entries:
             file_bibtex = file_no_ext + ".bib"
-            stream_out = open(file_bibtex,'w')
-            stream_out.write(entries['bibtex'] + "\n")
-            stream_out.close()
-            print("    > wrote file: %s" % file_bibtex)
+            outputs[file_bibtex] = write_output(file_bibtex, entries['bibtex'] + "\n", previous)
 
         ## if we have Biblatex in YAML, write file
         if target_biblatex == True and 'biblatex' in entries:
             file_biblatex = file_no_ext + "-biblatex.bib"
-            stream_out = open(file_biblatex,'w')
-            stream_out.write(entries['biblatex'] + "\n")
-            stream_out.close()
-            print("    > wrote file: %s" % file_biblatex)
+            outputs[file_biblatex] = write_output(file_biblatex, entries['biblatex'] + "\n", previous)
+
+        if incremental == True:
+            manifest_new['files'][file_rel] = { 'src': _corpus.digests[file], 'artifacts': artifacts_digest, 'out': outputs }
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
 
 
 
+##
+## function: process a single YAML file in a parallel job
+## - item is (file, parsed YAML or None, digest, YAML error or None), jobs only hold the file they process
+## - returns printed output, exit code, manifest entry, and counts (written/unchanged files, artifact lookups and their time, profiled writes and their bytes), the main process prints the output in order
+##
+def process_file_job(item):
+    file, data, digest, error = item
+    if digest is not None:
+        corpus[file] = data
+        _corpus.digests[file] = digest
+    if error is not None:
+        _corpus.errors[file] = error
+    counts = (_output.written, _output.skipped, _artifacts.lookups[0], _artifacts.lookups[1], _profile.writes[0], _profile.writes[1])
+    output = io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(output):
+        print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
+        try:
+            process_file(file)
+        except SystemExit as exc:
+            code = exc.code
+    corpus.pop(file, None)
+    _corpus.digests.pop(file, None)
+    _corpus.errors.pop(file, None)
+    counts = (_output.written - counts[0], _output.skipped - counts[1], _artifacts.lookups[0] - counts[2], _artifacts.lookups[1] - counts[3], _profile.writes[0] - counts[4], _profile.writes[1] - counts[5])
+    return (output.getvalue(), code, manifest_new.get('files', {}).pop(file[len(yaml_dir)+1:], None), counts)
+
+
+
+##
+## function: process YAML files with parallel jobs
+## - jobs are forked once, so they share all settings, the parsed YAML of each file is sent with the file
+## - output is printed in the order of files, the first failing file stops processing with its exit code
+##
+def process_files_parallel(pool, files):
+    items = [ (file, corpus.get(file), _corpus.digests.get(file), _corpus.errors.get(file)) for file in files ]
+    chunksize = max(1, len(files) // (jobs * 4))
+    for file, (output, code, entry, counts) in zip(files, pool.imap(process_file_job, items, chunksize)):
+        sys.stdout.write(output)
+        _output.written += counts[0]
+        _output.skipped += counts[1]
+        _artifacts.lookups[0] += counts[2]
+        _artifacts.lookups[1] += counts[3]
+        _profile.writes[0] += counts[4]
+        _profile.writes[1] += counts[5]
+        if entry is not None:
+            manifest_new['files'][file[len(yaml_dir)+1:]] = entry
+        if code != 0:
+            sys.stdout.flush()
+            pool.terminate()
+            sys.exit(code)
+
+
+
+##
+## function: file name of _entries.adoc for a directory, in the output directory if set
+##
+def entries_file(directory):
+    if output_dir != '':
+        return output_dir + "/" + directory[len(yaml_dir)+1:] +"/" + "_entries.adoc"
+    return directory + "/_entries.adoc"
+
+
+
 ##
 ## function: process directory to create _entries.adoc
 ##
-def process_directory(directory):
-    yaml_files = glob.glob(directory + "/*.yaml")
+def process_directory(directory, yaml_files):
     if len(yaml_files) > 0:
-        adoc_content = "//\n"
-        adoc_content += "// This file was generated by SKB-Dashboard, task 'library-ext'\n"
-        adoc_content += "// - on " + datetime.datetime.now().strftime("%A %B %e") + " at " + datetime.datetime.now().strftime("%T") + "\n"
-        adoc_content += "// - skb-dashboard: https://www.github.com/vdmeer/skb-dashboard\n"
-        adoc_content += "//\n\n"
+        adoc_content = adoc_header()
         adoc_content += '[cols="a", grid=rows, frame=none, %autowidth.stretch]\n'
         adoc_content += "|===\n"
         for file in yaml_files:
             adoc_content += "|include::{library-adoc}/" + os.path.splitext(file)[0][len(yaml_dir)+1:] + ".adoc[]\n"
         adoc_content += "|===\n\n"
 
-        file_entries = directory + "/_entries.adoc"
+        file_entries = entries_file(directory)
+        dir_rel = directory[len(yaml_dir)+1:]
+        previous = {}
+        if incremental == True:
+            previous = manifest['dirs'].get(dir_rel, {})
+        digest = hashlib.sha1((adoc_content + "\n").encode('utf-8')).hexdigest()
+        if previous.get(file_entries) == digest and os.path.isfile(file_entries):
+            print("    > unchanged %d entries in: %s" % (len(yaml_files), file_entries))
+        elif _output.write(file_entries, adoc_content + "\n") == True:
+            print("    > wrote %d entries to: %s" % (len(yaml_files), file_entries))
+        else:
+            print("    > unchanged %d entries in: %s" % (len(yaml_files), file_entries))
+        if incremental == True:
+            manifest_new['dirs'][dir_rel] = { file_entries: digest }
+
+
+
+##
+## function: output files of a YAML file for the requested targets, from the manifest if the file is in it
+## - without manifest, the key of the file is assumed to match its directory, as library-val requires
+##
+def output_files(file):
+    file_rel = file[len(yaml_dir)+1:]
+    if incremental == True and file_rel in manifest_new['files']:
+        return list(manifest_new['files'][file_rel]['out'])
+
+    file_no_ext = os.path.splitext(file)[0]
+    files = []
+    if target_adoc == True:
         if output_dir != '':
-            file_entries = output_dir + "/" + directory[len(yaml_dir)+1:] +"/" + "_entries.adoc"
-        stream_out = open(file_entries,'w')
-        stream_out.write(adoc_content + "\n")
-        stream_out.close()
-        print("    > wrote %d entries to: %s" % (len(yaml_files), file_entries))
+            files.append(output_dir + "/" + os.path.splitext(file_rel)[0] + ".adoc")
+        else:
+            files.append(file_no_ext + ".adoc")
+    if target_bibtex == True:
+        files.append(file_no_ext + ".bib")
+    if target_biblatex == True:
+        files.append(file_no_ext + "-biblatex.bib")
+    return files
+
+
+
+##
+## function: rebuild changed entries in watch mode, plus _entries.adoc of their directories
+## - outputs of removed entries are deleted, as is _entries.adoc of a directory without entries
+## - errors are reported and do not stop watching
+##
+def rebuild(changed, removed):
+    global manifest
+
+    tree = _discovery.scan(yaml_dir)
+    _corpus.errors.clear()
+    corpus.clear()
+    corpus.update(_corpus.load(yaml_dir, _discovery.files(tree)))
+    if incremental == True:
+        manifest = manifest_new
+
+    for file in removed:
+        print("\n    > removed: .../%s" % file[len(yaml_dir)+1:])
+        for fn in output_files(file):
+            if os.path.isfile(fn):
+                os.remove(fn)
+                print("    > removed file: %s" % fn)
+        if incremental == True:
+            manifest_new['files'].pop(file[len(yaml_dir)+1:], None)
+
+    for file in changed:
+        print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
+        if file in _corpus.errors:
+            print("      -> YAML error: %s" % _corpus.errors[file])
+            continue
+        try:
+            process_file(file)
+        except SystemExit as exc:
+            print("      -> failed with exit code %s" % exc.code)
+        except Exception as exc:
+            print("      -> failed with %s: %s" % (type(exc).__name__, exc))
+
+    for directory in sorted(set(os.path.dirname(file) for file in changed + removed)):
+        if directory == yaml_dir:
+            continue
+        if len(tree.get(directory, [])) > 0:
+            process_directory(directory, tree[directory])
+        else:
+            file_entries = entries_file(directory)
+            if os.path.isfile(file_entries):
+                os.remove(file_entries)
+                print("    > removed file: %s" % file_entries)
+            if incremental == True:
+                manifest_new['dirs'].pop(directory[len(yaml_dir)+1:], None)
+
+    if incremental == True:
+        write_manifest()
 
 
 
@@ -433,6 +736,7 @@ def process_directory(directory):
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'rendering': ( 'process_file', 'process_files_parallel', 'process_directory' ), 'writes': ( 'write_output', 'write_manifest' ) }, { _artifacts: { 'artifacts': ( 'scan', 'find' ) } })
 
     if build_local == True and library_home == '':
         print("error: local set but no library directory given")
@@ -441,15 +745,44 @@ def main(argv):
     print("    > searching in: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
-        for file in files:
-            print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
-            process_file(file)
-        print("\n    > processed %d YAML files" % len(files))
-
-        for (root, directories, filenames) in walk(yaml_dir):
-            for directory in directories:
-                process_directory(os.path.join(root, directory))
+        if build_local == True:
+            _artifacts.scan(library_home)
+        if incremental == True:
+            read_manifest()
+        elif os.path.isfile(manifest_file()):
+            os.remove(manifest_file())
+
+        ## stream directory by directory: only the YAML files of the current directory are in memory
+        pool = None
+        if jobs > 1:
+            pool = multiprocessing.get_context('fork').Pool(jobs)
+        count = 0
+        for directory, yaml_files, loaded in _corpus.stream(yaml_dir, _discovery.walk(yaml_dir)):
+            corpus.update(loaded)
+            if pool is not None:
+                process_files_parallel(pool, yaml_files)
+            else:
+                for file in yaml_files:
+                    print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
+                    process_file(file)
+            if directory != yaml_dir:
+                process_directory(directory, yaml_files)
+            corpus.clear()
+            count += len(yaml_files)
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _corpus.print_stats()
+        print("\n    > processed %d YAML files" % count)
+        _output.print_stats()
+        if build_local == True:
+            _artifacts.print_stats()
+
+        if incremental == True:
+            write_manifest()
+
+        if watch == True:
+            _watch.watch(yaml_dir, rebuild)
 
     else:
         print("error: could not open YAML directory: %s" % yaml_dir)
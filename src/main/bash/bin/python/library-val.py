@@ -32,11 +32,16 @@
 ## Includes, all we need
 ##
 import yaml             ## parsing YAML files
+import _corpus          ## loading YAML files, with cache of parsed entries
+import _discovery       ## finding YAML files with a single traversal
+import _validation      ## collecting errors and duplicates for reports
+import _profile         ## per-phase profiling with --profile
 import os               ## operating system, e.g. file handling
 from os import walk     ## for walking directories
 import functools        ## some tools for functions
 import sys, getopt      ## system for exit, getopt for CLI parsing
 import glob             ## gobal globbing to get YAML files recursively
+import multiprocessing  ## process pool for parallel validation
 import pathlib          ## mkdirs in Python
 import datetime         ## to get date/time for ADOC files
 
@@ -48,7 +53,11 @@ import datetime         ## to get date/time for ADOC files
 task_level = "warn"         ## warning level
 output_dir = ''             ## empty output directory, means same as the YAML file
 yaml_dir = ''               ## YAML directory
-library = {}                ## dictionary of library entries
+corpus = {}                 ## parsed YAML files, key is file name
+collect = False             ## collect all errors and duplicates instead of stopping at the first one
+jobs = 1                    ## number of parallel jobs for parsing and validation
+report_file = ''            ## file for JSON report, implies collect
+library = {}                ## library keys for duplicate detection, value is the file defining the key
 
 
 
@@ -66,8 +75,15 @@ def help():
     print("library-val - validates library YAML sources\n")
     print("       Usage: library-val [options]\n")
     print("       Options")
+    print("          [-c | --collect]                 - validate all files, report all errors and duplicates at the end")
     print("          [-h | --help]                    - this help screen")
+    print("          [-j | --jobs] <N>                - parse and validate with N parallel jobs, 0 for number of CPUs")
+    print("          [-r | --report] <file>           - write JSON report to file, implies collect")
     print("          [-y | --yaml-directory] <dir>    - YAML directory")
+    print("          [--cache-dir] <dir>              - cache directory for parsed YAML files")
+    print("          [--no-cache]                     - do not use cache, parse all YAML files")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
     print("\n")
 
 
@@ -78,10 +94,13 @@ def help():
 def cli(argv):
     global yaml_dir
     global task_level
+    global collect
+    global jobs
+    global report_file
 
 
     try:
-        opts, args = getopt.getopt(argv,"hy:",["yaml-directory=","help"])
+        opts, args = getopt.getopt(argv,"chj:r:y:",["yaml-directory=","help","collect","jobs=","report=","cache-dir=","no-cache","profile","profile-dump="])
     except getopt.GetoptError:
         help()
         sys.exit(70)
@@ -89,10 +108,33 @@ def cli(argv):
         if opt in ("-h", "--help"):
             help()
             sys.exit(0)
+        elif opt == "--profile":
+            _profile.enabled = True
+        elif opt == "--profile-dump":
+            _profile.enabled = True
+            _profile.dump_file = arg
         elif opt in ("-T", "--task-level"):
             task_level = arg
         elif opt in ("-y", "--yaml-directory"):
             yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
+        elif opt in ("-c", "--collect"):
+            collect = True
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-r", "--report"):
+            report_file = arg
+            collect = True
 
 
 
@@ -101,29 +143,23 @@ def cli(argv):
 ##
 def validate_file(file, entries, key):
     ## check for required keys
-    found_keys = True
     expected_keys = ( 'title', 'titleaddon', 'type', 'year', 'presenters', 'authors', 'editors', 'chair', 'panelists', 'urls', 'adoc', 'bibtex', 'biblatex')
-    errors = ""
+    errors = []
 
     if not 'title' in entries:
-        errors += "         --> did not find key 'title'\n"
-        found_keys = False
+        errors.append("did not find key 'title'")
     else:
-        if len(entries['title']) == 0:
-            errors += "         --> key 'title' empty\n"
-            found_keys = False
+        if not isinstance(entries['title'], str) or entries['title'] == '':
+            errors.append("key 'title' empty or not a string")
 
     if not 'type' in entries:
-        errors += "         --> did not find key 'type'\n"
-        found_keys = False
+        errors.append("did not find key 'type'")
     else:
-        if len(entries['type']) == 0:
-            errors += "         --> key 'type' empty\n"
-            found_keys = False
+        if not isinstance(entries['type'], str) or entries['type'] == '':
+            errors.append("key 'type' empty or not a string")
 
     if not 'year' in entries:
-        errors += "         --> did not find key 'year'\n"
-        found_keys = False
+        errors.append("did not find key 'year'")
 
 
     ## check presenter(s)
@@ -133,8 +169,7 @@ def validate_file(file, entries, key):
             if presenter not in presenters:
                 presenters.append(presenter)
             else:
-                errors += "         --> presenter '" + presenter + "' used more than once\n"
-                found_keys = False
+                errors.append("presenter '%s' used more than once" % presenter)
 
     ## check author(s)
     authors = []
@@ -143,8 +178,7 @@ def validate_file(file, entries, key):
             if author not in authors:
                 authors.append(author)
             else:
-                errors += "         --> author '" + author + "' used more than once\n"
-                found_keys = False
+                errors.append("author '%s' used more than once" % author)
 
     ## check editor(s)
     editors = []
@@ -153,8 +187,7 @@ def validate_file(file, entries, key):
             if editor not in editors:
                 editors.append(editor)
             else:
-                errors += "         --> editor '" + editor + "' used more than once\n"
-                found_keys = False
+                errors.append("editor '%s' used more than once" % editor)
 
     ## check panelist(s)
     panelists = []
@@ -163,51 +196,40 @@ def validate_file(file, entries, key):
             if panelist not in panelists:
                 panelists.append(panelist)
             else:
-                errors += "         --> panelist '" + panelist + "' used more than once\n"
-                found_keys = False
+                errors.append("panelist '%s' used more than once" % panelist)
 
     if len(presenters) == 0 and len(authors) == 0 and len(editors) == 0 and len(panelists) == 0:
-        if not entries['type'] == 'movie':
-            errors += "         --> did not find person, tried: presenters, editors, authors, panelists\n"
-            found_keys = False
-    if entries['type'] == "tutorial" or entries['type'] == "presentation" or entries['type'] == "lecture-note" or entries['type'] == "keynote" or entries['type'] == "invited-talk":
+        if not entries.get('type') == 'movie':
+            errors.append("did not find person, tried: presenters, editors, authors, panelists")
+    if entries.get('type') == "tutorial" or entries.get('type') == "presentation" or entries.get('type') == "lecture-note" or entries.get('type') == "keynote" or entries.get('type') == "invited-talk":
         if len(presenters) == 0:
-            errors += "         --> found tutorial/presentation/ln/keynote/it without presenter(s)\n"
-            found_keys = False
-    elif entries['type'] == "panel":
+            errors.append("found tutorial/presentation/ln/keynote/it without presenter(s)")
+    elif entries.get('type') == "panel":
         if len(panelists) == 0:
-            errors += "         --> found panel without panelist(s)\n"
-            found_keys = False
-        if not entries['chair']:
-            errors += "         --> found panel without chair\n"
-            found_keys = False
+            errors.append("found panel without panelist(s)")
+        if not entries.get('chair'):
+            errors.append("found panel without chair")
     else:
         if len(authors) == 0 and len(editors) == 0:
-            if not entries['type'] == 'movie':
-                errors += "         --> found publication (not panel/tutorial/presentation/ln/keynote/it/movie) without author(s) and editor(s)\n"
-                found_keys = False
+            if not entries.get('type') == 'movie':
+                errors.append("found publication (not panel/tutorial/presentation/ln/keynote/it/movie) without author(s) and editor(s)")
 
-    print("    > found: presenter <%d>, authors <%d>, editor <%d>" % (len(presenters), len(authors), len(editors)))
+    if collect == False:
+        print("    > found: presenter <%d>, authors <%d>, editor <%d>" % (len(presenters), len(authors), len(editors)))
 
-    if 'urls' in entries and len(entries['urls']) == 0:
-            errors += "         --> key 'urls' with no entry\n"
-            found_keys = False
+    if 'urls' in entries and (not isinstance(entries['urls'], dict) or len(entries['urls']) == 0):
+            errors.append("key 'urls' with no entry or not a map")
 
     if not all(elem in expected_keys for elem in entries):
-        errors += "         --> unknown key\n"
-        found_keys = False
+        errors.append("unknown key")
 
     file_short = file[len(yaml_dir)+1:]
     dir_short = file_short.rsplit('/', 1)[0]
     key_short = key.rsplit('/', 1)[0]
     if not key_short == dir_short:
-        errors += "         --> something wrong in key path (" + key_short + ") and directory (" + dir_short + ")\n"
-        found_keys = False
+        errors.append("something wrong in key path (" + key_short + ") and directory (" + dir_short + ")")
 
-    if found_keys == False:
-        print("      -> validation failed")
-        print("%s" % errors)
-        sys.exit(80)
+    return errors
 
 
 
@@ -215,45 +237,119 @@ def validate_file(file, entries, key):
 ## function: process a single YAML file
 ##
 def process_file(file):
-    file_exists = os.path.isfile(file)
-    if file_exists == True:
-        stream = open(file,'r')
-
-        data = yaml.load(stream)
-        stream.close()
+    if file in corpus:
+        data = corpus[file]
         entries = data[list(data.keys())[0]]    ## dictionary with all entries
         key = list(data.keys())[0]              ## key name of the YAML spec
 
-        validate_file(file, entries, key)
+        errors = validate_file(file, entries, key)
+        if len(errors) > 0:
+            print("      -> validation failed")
+            print("%s" % "".join("         --> " + error + "\n" for error in errors))
+            sys.exit(80)
 
         if not key in library:
-            entries['src-file'] = file
-            library[key] = entries
+            library[key] = file
         else:
-            print("      -> key %s already in dictionary, defined in %s" % (key, library[key]['src-file']))
+            print("      -> key %s already in dictionary, defined in %s" % (key, library[key]))
             sys.exit(80)
 
+    elif file in _corpus.errors:
+        print("error: YAML error in %s: %s" % (file, _corpus.errors[file]))
+        sys.exit(80)
     else:
         print("error: could not open file: %s" % file)
         sys.exit(72)
 
 
 
+##
+## function: item of a YAML file for collect mode: file, parsed YAML, and error if it was not loaded
+##
+def get_item(file, loaded):
+    if file in loaded:
+        return (file, loaded[file], None)
+    if file in _corpus.errors:
+        return (file, None, "YAML error: " + _corpus.errors[file])
+    return (file, None, "could not open file")
+
+
+
+##
+## function: check a single YAML file for collect mode, returns key (None if no key found) and list of errors
+## - a failing validation is recorded as error of the file, so one bad file does not stop the pass
+##
+def check_file(item):
+    file, data, error = item
+    if error is not None:
+        return (None, [ error ])
+
+    if not isinstance(data, dict) or len(data) != 1 or not isinstance(data[list(data.keys())[0]], dict):
+        return (None, [ "expected a single key with a map of entries" ])
+    key = list(data.keys())[0]
+    try:
+        return (key, validate_file(file, data[key], key))
+    except Exception as exc:
+        return (key, [ "validation failed with %s: %s" % (type(exc).__name__, exc) ])
+
+
+
+##
+## function: validate all files in collect mode directory by directory, print report, and write JSON report if requested
+## - returns the number of validated files
+##
+def collect_files():
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.get_context('fork').Pool(jobs)
+    count = 0
+    for directory, yaml_files, loaded in _corpus.stream(yaml_dir, _discovery.walk(yaml_dir)):
+        results = _validation.run([ get_item(file, loaded) for file in yaml_files ], check_file, jobs, pool)
+        for file, (key, errors) in zip(yaml_files, results):
+            _validation.add_errors(file, errors)
+            if key is not None:
+                _validation.add_key(key, file)
+        count += len(yaml_files)
+    if pool is not None:
+        pool.close()
+        pool.join()
+    _corpus.print_stats()
+
+    _validation.print_report(yaml_dir, count)
+    if report_file != '':
+        _validation.write_json(report_file, yaml_dir, count)
+    return count
+
+
+
 ##
 ## function: main function
 ##
 def main(argv):
     cli(argv)
+    _profile.start(globals(), { 'validation': ( 'validate_file', ), 'processing': ( 'process_file', 'collect_files' ) }, { _validation: { 'writes': ( 'write_json', ) } })
 
     print("    > YAML directory: %s" % yaml_dir)
     dir_exists = os.path.isdir(yaml_dir)
     if dir_exists == True:
-        files = glob.glob(yaml_dir + '/**/*.yaml', recursive=True)
-        for file in files:
-            print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
-            process_file(file)
-
-        print("\n    > processed %d YAML files, found %d references" % (len(files), len(library)))
+        if collect == True:
+            count = collect_files()
+            if _validation.exit_status() != 0:
+                sys.exit(_validation.exit_status())
+            print("\n    > processed %d YAML files, found %d references" % (count, len(_validation.keys)))
+        else:
+            ## stream directory by directory: only the YAML files of the current directory are in memory
+            count = 0
+            for directory, yaml_files, loaded in _corpus.stream(yaml_dir, _discovery.walk(yaml_dir)):
+                corpus.update(loaded)
+                for file in yaml_files:
+                    print("\n    > processing: .../%s" % file[len(yaml_dir)+1:])
+                    process_file(file)
+                corpus.clear()
+                count += len(yaml_files)
+            _corpus.print_stats()
+
+            print("\n    > processed %d YAML files, found %d references" % (count, len(library)))
 
     else:
         print("error: could not open YAML directory: %s" % yaml_dir)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## library - finds SKB library entries by person, year, type, title, and URL tag
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings, parallel parsing
+import _libindex        ## persisted secondary indexes of library entries
+import _persons         ## person index and roles of persons
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import time             ## query timing
+
+
+
+##
+## Global variables
+##
+yaml_dir = ''               ## YAML directory
+search_person = None        ## search string for persons
+search_roles = None         ## roles of persons to search, None for all
+search_from = None          ## first year of the year range
+search_to = None            ## last year of the year range
+search_type = None          ## entry type
+search_title = None         ## search string for title
+search_tag = None           ## URL tag, e.g. doi
+check = True                ## check YAML files for changes before searching
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("library - finds SKB library entries by person, year, type, title, and URL tag\n")
+    print("       Usage: library [options]\n")
+    print("       Options")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-i | --title] <string>          - search <string> in title and title addon")
+    print("          [-j | --jobs] <N>                - parse changed YAML files with N parallel jobs, 0 for number of CPUs")
+    print("          [-n | --no-update]               - use the library index of the last run as it is, do not check YAML files for changes")
+    print("          [-p | --person] <name>           - search person, exact name or part of names, e.g. 'van der Meer'")
+    print("          [-r | --role] <role>             - only persons in role: authors, editors, presenters, panelists, can be repeated")
+    print("          [-t | --type] <type>             - search entry type, e.g. article, inproceedings")
+    print("          [-u | --url-tag] <tag>           - search entries with URL tag, e.g. doi")
+    print("          [-Y | --year] <range>            - search year or year range, e.g. 2019, 2015-2019, 2015-, -2019")
+    print("          [-y | --yaml-directory] <dir>    - YAML top directory")
+    print("          [--cache-dir] <dir>              - cache directory for the library index")
+    print("          [--no-cache]                     - do not use the library index of the last run, parse all YAML files")
+    print("\n")
+    print("All given search options must match")
+    print("The index is kept in the cache directory, later runs only parse new and changed YAML files")
+    print("\n")
+
+
+
+##
+## function: parse a year range: year, from-to, from-, -to, returns (from, to), exits on wrong range
+##
+def parse_years(arg):
+    try:
+        if '-' in arg:
+            year_from, year_to = arg.split('-', 1)
+            return (int(year_from) if year_from != '' else None, int(year_to) if year_to != '' else None)
+        return (int(arg), int(arg))
+    except ValueError:
+        help()
+        sys.exit(70)
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global yaml_dir
+    global search_person
+    global search_roles
+    global search_from
+    global search_to
+    global search_type
+    global search_title
+    global search_tag
+    global check
+
+    try:
+        opts, args = getopt.getopt(argv,"hi:j:np:r:t:u:Y:y:",["help","title=","jobs=","person=","role=","type=","url-tag=","year=","yaml-directory=","cache-dir=","no-cache","no-update"])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-i", "--title"):
+            search_title = arg
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-p", "--person"):
+            search_person = arg
+        elif opt in ("-r", "--role"):
+            if not arg in _persons.roles:
+                help()
+                sys.exit(70)
+            if search_roles is None:
+                search_roles = []
+            search_roles.append(arg)
+        elif opt in ("-t", "--type"):
+            search_type = arg
+        elif opt in ("-u", "--url-tag"):
+            search_tag = arg
+        elif opt in ("-Y", "--year"):
+            search_from, search_to = parse_years(arg)
+        elif opt in ("-y", "--yaml-directory"):
+            yaml_dir = arg
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+        elif opt == "--no-cache":
+            _corpus.use_cache = False
+        elif opt in ("-n", "--no-update"):
+            check = False
+
+
+
+##
+## function: description of the search for the output
+##
+def describe():
+    ret = []
+    if search_person is not None:
+        ret.append("person '%s'" % search_person + ("" if search_roles is None else " as " + "/".join(search_roles)))
+    if search_from is not None or search_to is not None:
+        if search_from == search_to:
+            ret.append("year %d" % search_from)
+        else:
+            ret.append("year %s-%s" % ("" if search_from is None else search_from, "" if search_to is None else search_to))
+    if search_type is not None:
+        ret.append("type %s" % search_type)
+    if search_title is not None:
+        ret.append("title '%s'" % search_title)
+    if search_tag is not None:
+        ret.append("URL tag %s" % search_tag)
+    return ", ".join(ret)
+
+
+
+##
+## function: print found entries, sorted by key
+##
+def print_found(found):
+    for eid in found:
+        print("      %s (%s, %s)\n        -> %s" % (_libindex.titles[eid], _libindex.types[eid], _libindex.years[eid] if _libindex.years[eid] >= 0 else '', _libindex.keys[eid]))
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    print("    > YAML directory: %s" % yaml_dir)
+    if not os.path.isdir(yaml_dir):
+        print("error: could not open YAML directory: %s" % yaml_dir)
+        sys.exit(71)
+
+    _libindex.update(yaml_dir, check)
+    _libindex.print_stats()
+    _persons.print_stats()
+
+    description = describe()
+    if description == '':
+        return
+    print("\n    > searching for %s\n" % description)
+    start = time.perf_counter()
+    found = _libindex.search(search_person, search_roles, search_from, search_to, search_type, search_title, search_tag)
+    seconds = time.perf_counter() - start
+    print_found(found)
+    print("\n    > found %d entries in %.1fms" % (len(found), seconds * 1000))
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
+    print("    > done")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## skb-adoc-deps - finds ADOC documents that need rendering, using a graph of their include dependencies
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _adocdeps        ## dependency graph of documents and included files
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+
+
+
+##
+## Global variables
+##
+graph_file = ''             ## dependency graph file, default is .adoc-deps.json in the output directory
+output_dir = ''             ## output directory of rendered documents, documents without output need rendering
+docs_dir = ''               ## directory of the documents, rendered documents keep their path relative to it
+target = 'html'             ## target, also the file extension of rendered documents
+render_all = False          ## all documents need rendering, e.g. for a forced build
+done = False                ## record documents as rendered, instead of checking them
+verbose = False             ## print why documents need rendering to STDERR
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-adoc-deps - finds ADOC documents that need rendering, using a graph of their include dependencies\n")
+    print("       Usage: skb-adoc-deps [options] <document>...\n")
+    print("       Options")
+    print("          [-a | --attribute] <name=value>  - attribute used in include paths, as for asciidoctor, can be repeated")
+    print("          [-A | --all]                     - all documents need rendering, the graph is still updated")
+    print("          [-d | --docs-directory] <dir>    - directory of the documents, for the paths of rendered documents")
+    print("          [-g | --graph] <file>            - dependency graph file, default is .adoc-deps.json in the output directory")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-o | --output-directory] <dir>  - output directory of rendered documents, documents without output need rendering")
+    print("          [-t | --target] <target>         - target and file extension of rendered documents, e.g. html or pdf, default html")
+    print("          [-v | --verbose]                 - print why documents need rendering to STDERR")
+    print("          [--done]                         - record documents as rendered, call after rendering each document")
+    print("\n")
+    print("Without --done the documents that need rendering are printed, one per line")
+    print("A document needs rendering if it or any file it includes changed since it was last recorded as rendered")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global graph_file
+    global output_dir
+    global docs_dir
+    global target
+    global render_all
+    global done
+    global verbose
+
+    try:
+        opts, args = getopt.getopt(argv,"a:Ad:g:ho:t:v",["attribute=","all","docs-directory=","graph=","help","output-directory=","target=","verbose","done"])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-a", "--attribute"):
+            name, sep, value = arg.partition('=')
+            _adocdeps.attributes[name] = value
+        elif opt in ("-A", "--all"):
+            render_all = True
+        elif opt in ("-d", "--docs-directory"):
+            docs_dir = arg
+        elif opt in ("-g", "--graph"):
+            graph_file = arg
+        elif opt in ("-o", "--output-directory"):
+            output_dir = arg
+        elif opt in ("-t", "--target"):
+            target = arg
+        elif opt in ("-v", "--verbose"):
+            verbose = True
+        elif opt == "--done":
+            done = True
+
+    if graph_file == '':
+        if output_dir == '':
+            print("error: no graph file and no output directory given")
+            help()
+            sys.exit(70)
+        graph_file = output_dir + "/.adoc-deps.json"
+    return args
+
+
+
+##
+## function: reason why a document needs rendering, None if it does not
+##
+def get_reason(doc, deps, built):
+    if render_all == True:
+        return "all documents requested"
+    if not doc in built:
+        return "not rendered before"
+    output = _adocdeps.output_file(doc, docs_dir, output_dir, target)
+    if output_dir != '' and not os.path.isfile(output):
+        return "no output " + output
+    for file, digest in deps.items():
+        if built[doc].get(file, '') != digest:
+            if digest is None:
+                return "missing include " + file
+            return "changed " + file
+    for file in built[doc]:
+        if not file in deps:
+            return "no longer included " + file
+    return None
+
+
+
+##
+## function: check documents, print those that need rendering, they are pending until recorded as rendered
+##
+def check(docs):
+    section = _adocdeps.get_section(target)
+    count = 0
+    for doc in docs:
+        key = os.path.abspath(doc)
+        deps = _adocdeps.get_dependencies(key)
+        reason = get_reason(key, deps, section['built'])
+        if reason is not None:
+            section['pending'][key] = deps
+            count += 1
+            print(doc)
+            if verbose == True:
+                print("    > %s: %s" % (doc, reason), file=sys.stderr)
+
+    _adocdeps.prune()
+    if verbose == True:
+        print("    > %d of %d documents need rendering, %d files checked, %d read" % (count, len(docs), len(_adocdeps.visited), _adocdeps.hashed[0]), file=sys.stderr)
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    docs = cli(argv)
+    _adocdeps.read_graph(graph_file)
+    if done == True:
+        _adocdeps.record(target, docs)
+    else:
+        check(docs)
+    _adocdeps.write_graph(graph_file)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
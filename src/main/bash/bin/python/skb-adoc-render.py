@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## skb-adoc-render - renders ADOC documents with asciidoctor in parallel jobs
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _adocdeps        ## output file names, recording rendered documents in the dependency graph
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import subprocess       ## running asciidoctor
+import concurrent.futures   ## bounded pool of parallel renders
+import time             ## timings of renders
+
+
+
+##
+## Global variables
+##
+output_dir = ''             ## output directory of rendered documents
+docs_dir = ''               ## directory of the documents, for mirror layout
+mirror = False              ## mirror layout: --out-file per document keeping its path relative to the docs directory, otherwise --destination-dir
+targets = []                ## targets to render, default html
+attributes = []             ## attributes for asciidoctor, as name=value
+jobs = 1                    ## number of parallel renders
+batch = 1                   ## documents per asciidoctor process, 0 to split documents evenly over the jobs
+slowest = 5                 ## number of slowest renders to report
+graph_file = ''             ## dependency graph to record rendered documents in, see skb-adoc-deps
+
+commands = { 'html': 'asciidoctor', 'pdf': 'asciidoctor-pdf' }  ## command for each target
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-adoc-render - renders ADOC documents with asciidoctor in parallel jobs\n")
+    print("       Usage: skb-adoc-render [options] <document>...\n")
+    print("       Options")
+    print("          [-a | --attribute] <name=value>  - attribute for asciidoctor, can be repeated")
+    print("          [-b | --batch] <N>               - render N documents per asciidoctor process, 0 to split them evenly over the jobs, default 1")
+    print("          [-d | --docs-directory] <dir>    - directory of the documents, for mirror layout")
+    print("          [-g | --graph] <file>            - record rendered documents in this dependency graph, see skb-adoc-deps")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-j | --jobs] <N>                - render N documents in parallel, 0 for number of CPUs, default 1")
+    print("          [-m | --mirror]                  - keep the path of documents relative to the docs directory in the output directory")
+    print("          [-o | --output-directory] <dir>  - output directory, used as --destination-dir unless mirror is set")
+    print("          [-s | --slowest] <N>             - number of slowest renders to report, default 5")
+    print("          [-t | --target] <target>         - target: html (asciidoctor) or pdf (asciidoctor-pdf), can be repeated, default html")
+    print("\n")
+    print("Output directories are created before rendering, a failed document does not stop other documents")
+    print("Batches share one asciidoctor start-up, a failed batch is rendered again one document at a time")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global output_dir
+    global docs_dir
+    global mirror
+    global jobs
+    global batch
+    global slowest
+    global graph_file
+
+    try:
+        opts, args = getopt.getopt(argv,"a:b:d:g:hj:mo:s:t:",["attribute=","batch=","docs-directory=","graph=","help","jobs=","mirror","output-directory=","slowest=","target="])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-a", "--attribute"):
+            attributes.append(arg)
+        elif opt in ("-b", "--batch"):
+            try:
+                batch = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt in ("-d", "--docs-directory"):
+            docs_dir = arg
+        elif opt in ("-g", "--graph"):
+            graph_file = arg
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+        elif opt in ("-m", "--mirror"):
+            mirror = True
+        elif opt in ("-o", "--output-directory"):
+            output_dir = arg
+        elif opt in ("-s", "--slowest"):
+            try:
+                slowest = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt in ("-t", "--target"):
+            if not arg in commands:
+                print("error: unknown target: %s" % arg)
+                help()
+                sys.exit(70)
+            targets.append(arg)
+
+    if len(targets) == 0:
+        targets.append('html')
+    if mirror == True and (output_dir == '' or docs_dir == ''):
+        print("error: mirror layout requires an output and a docs directory")
+        help()
+        sys.exit(70)
+    return args
+
+
+
+##
+## function: asciidoctor command line for documents and a target
+## - a single document in mirror layout uses --out-file, several documents use --source-dir with --destination-dir for the same paths
+##
+def get_command(docs, target):
+    cmd = [ commands[target] ] + docs
+    if mirror == True and len(docs) == 1:
+        cmd += [ '--out-file', _adocdeps.output_file(docs[0], docs_dir, output_dir, target) ]
+    elif mirror == True:
+        cmd += [ '--source-dir', docs_dir, '--destination-dir', output_dir ]
+    elif output_dir != '':
+        cmd += [ '--destination-dir', output_dir ]
+    for attribute in attributes:
+        cmd += [ '-a', attribute ]
+    return cmd
+
+
+
+##
+## function: file name asciidoctor writes for a document and target
+##
+def get_output(doc, target):
+    if mirror == True:
+        return _adocdeps.output_file(doc, docs_dir, output_dir, target)
+    directory = output_dir
+    if directory == '':
+        directory = os.path.dirname(doc)
+    return os.path.join(directory, os.path.splitext(os.path.basename(doc))[0] + "." + target)
+
+
+
+##
+## function: create all output directories before rendering
+##
+def make_directories(docs):
+    directories = set()
+    for doc in docs:
+        for target in targets:
+            directories.add(os.path.dirname(get_output(doc, target)))
+    for directory in sorted(directories):
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+
+
+##
+## function: documents per process, one document per process unless batches are set
+## - batch size 0 splits the documents of a target evenly over the jobs
+##
+def get_batches(docs):
+    size = batch
+    if size < 1:
+        size = max(1, -(-len(docs) // jobs))
+    return [ docs[i:i + size] for i in range(0, len(docs), size) ]
+
+
+
+##
+## function: run asciidoctor for documents and a target, returns (documents, target, exit code, seconds, output)
+##
+def run(docs, target):
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(get_command(docs, target), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        code = proc.returncode
+        output = proc.stdout.decode('utf-8', errors='replace')
+    except OSError as exc:
+        code = 127
+        output = str(exc) + "\n"
+    return (docs, target, code, time.perf_counter() - start, output)
+
+
+
+##
+## function: render documents for a target in one process, returns list of results of run()
+## - if a batch fails or does not write all outputs, its documents are rendered one by one to find the failing ones
+##
+def render(docs, target):
+    result = run(docs, target)
+    if len(docs) == 1:
+        return [ result ]
+    if result[2] == 0 and all(os.path.isfile(get_output(doc, target)) for doc in docs):
+        return [ result ]
+    return [ result ] + [ run([ doc ], target) for doc in docs ]
+
+
+
+##
+## function: start-up time of asciidoctor for a target, the time of running it with --version
+##
+def get_startup(target):
+    start = time.perf_counter()
+    try:
+        subprocess.run([ commands[target], '--version' ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return 0.0
+    return time.perf_counter() - start
+
+
+
+##
+## function: render all documents for all targets with parallel jobs, returns results in order of completion
+## - each process prints its output when it is finished, so outputs of parallel renders do not mix
+## - a failed batch is in the results with the results of its documents rendered one by one
+##
+def render_all(docs):
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [ pool.submit(render, unit, target) for target in targets for unit in get_batches(docs) ]
+        for future in concurrent.futures.as_completed(futures):
+            for unit, target, code, seconds, output in future.result():
+                name = unit[0]
+                if len(unit) > 1:
+                    name = "batch of %d documents" % len(unit)
+                if code == 0:
+                    print("    > rendered %s for %s in %.2fs" % (name, target, seconds))
+                else:
+                    print("    > failed %s for %s with exit code %d in %.2fs" % (name, target, code, seconds))
+                if output != '':
+                    print("".join("      " + line + "\n" for line in output.splitlines()), end='')
+                results.append((unit, target, code, seconds))
+            sys.stdout.flush()
+    return results
+
+
+
+##
+## function: results of documents: a document rendered one by one after its batch failed has the result of that render
+##
+def get_documents(results):
+    ret = {}
+    for unit, target, code, seconds in results:
+        for doc in unit:
+            if len(unit) == 1 or not (doc, target) in ret:
+                ret[(doc, target)] = code
+    return ret
+
+
+
+##
+## function: print summary, slowest processes, and start-up time saved by batches
+##
+def print_report(results, seconds):
+    documents = get_documents(results)
+    failed = [ key for key, code in documents.items() if code != 0 ]
+    print("    > rendered %d of %d documents in %.2fs with %d jobs and %d processes, %d failed" % (len(documents) - len(failed), len(documents), seconds, jobs, len(results), len(failed)))
+    for doc, target in failed:
+        print("      - failed: %s for %s" % (doc, target))
+    if slowest > 0 and len(results) > 0:
+        print("    > slowest renders:")
+        for unit, target, code, seconds in sorted(results, key=lambda result: -result[3])[:slowest]:
+            name = unit[0]
+            if len(unit) > 1:
+                name = "batch of %d documents, %s ..." % (len(unit), unit[0])
+            print("      %8.2fs  %s for %s" % (seconds, name, target))
+    if batch != 1:
+        for target in targets:
+            processes = len([ result for result in results if result[1] == target ])
+            docs = len([ key for key in documents if key[1] == target ])
+            startup = get_startup(target)
+            print("    > %s: %d documents in %d processes, saved about %.2fs of start-up (%.2fs per process)" % (target, docs, processes, max(0, docs - processes) * startup, startup))
+
+
+
+##
+## function: record rendered documents in the dependency graph
+##
+def record(results):
+    documents = get_documents(results)
+    _adocdeps.read_graph(graph_file)
+    for target in targets:
+        _adocdeps.record(target, [ doc for (doc, doc_target), code in documents.items() if doc_target == target and code == 0 ])
+    _adocdeps.write_graph(graph_file)
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    docs = cli(argv)
+    if len(docs) == 0:
+        print("    > no documents to render")
+        return
+
+    start = time.perf_counter()
+    make_directories(docs)
+    results = render_all(docs)
+    print_report(results, time.perf_counter() - start)
+    if graph_file != '':
+        record(results)
+
+    if any(code != 0 for code in get_documents(results).values()):
+        sys.exit(80)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
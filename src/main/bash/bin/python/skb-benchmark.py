@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## skb-benchmark - times Python tasks end-to-end and by phase on synthetic corpora, results as JSON
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import time             ## timings
+import json             ## results file
+import shutil           ## removing work directories
+import tempfile         ## default work directory
+import platform         ## platform information for results
+import subprocess       ## corpus generator, git commit
+import contextlib       ## silence task output
+import functools        ## wrapping phase functions
+import inspect          ## finding phase functions
+import resource         ## peak memory of a run
+import importlib.util   ## loading task scripts as modules
+import multiprocessing  ## every run in a fresh forked process
+import tracemalloc      ## memory of acronym store layouts
+import gc               ## collect before measuring retained memory
+
+
+
+##
+## Global variables
+##
+sizes = [ 1000, 10000 ]     ## corpus sizes, number of entries
+work_dir = ''               ## work directory for corpora and outputs, temporary if not set
+output_file = 'benchmark.json'  ## results file
+compare_file = ''           ## results of an earlier benchmark to compare with
+repeat = 1                  ## number of warm runs, the fastest is kept
+threshold = 10.0            ## percent, slower runs than this are marked as regressions
+store = False               ## also benchmark the acronym store against the plain dictionary layout
+tasks = [ 'library-val', 'library-ext', 'library-bib', 'acronyms-val', 'acronyms-build', 'acronyms-latex', 'acronyms' ]
+
+bin_dir = os.path.dirname(os.path.abspath(__file__))
+
+## phases in shared modules, all other phases are the functions of the task itself
+shared_phases = { '_discovery': ( 'scan', ), '_corpus': ( 'load', 'parse_all' ), '_validation': ( 'run', ), '_ngram': ( 'update', 'search' ), '_artifacts': ( 'scan', 'find' ) }
+no_phases = ( 'main', 'cli', 'help' )
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-benchmark - times Python tasks end-to-end and by phase on synthetic corpora, results as JSON\n")
+    print("       Usage: skb-benchmark [options]\n")
+    print("       Options")
+    print("          [-c | --compare] <file>          - compare with results of an earlier benchmark")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-o | --output-file] <file>      - results file, default benchmark.json")
+    print("          [-r | --repeat] <number>         - number of warm runs, the fastest is kept, default 1")
+    print("          [-s | --sizes] <list>            - corpus sizes, suffix k or M allowed, default 1k,10k")
+    print("          [-t | --tasks] <list>            - tasks to run, default all: " + ",".join(tasks))
+    print("          [-w | --work-dir] <dir>          - work directory for corpora and outputs, default temporary")
+    print("          [--store]                        - also compare memory and index build of the acronym store with plain dictionaries")
+    print("          [--threshold] <percent>          - mark runs slower than this as regressions, default 10")
+    print("\n")
+    print("Every task runs in a fresh process, first with an empty cache (cold) and then with the cache of the first run (warm)")
+    print("Phases are the functions of the task and the main functions of shared modules, phase times include nested phases")
+    print("\n")
+
+
+
+##
+## function: parse a number with optional suffix k or M
+##
+def parse_number(arg):
+    factor = 1
+    if arg[-1:] in ('k', 'K'):
+        factor = 1000
+        arg = arg[:-1]
+    elif arg[-1:] == 'M':
+        factor = 1000000
+        arg = arg[:-1]
+    return int(arg) * factor
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global sizes
+    global work_dir
+    global output_file
+    global compare_file
+    global repeat
+    global threshold
+    global tasks
+    global store
+
+    try:
+        opts, args = getopt.getopt(argv,"c:ho:r:s:t:w:",["compare=","help","output-file=","repeat=","sizes=","tasks=","work-dir=","threshold=","store"])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-c", "--compare"):
+            compare_file = arg
+        elif opt in ("-o", "--output-file"):
+            output_file = arg
+        elif opt in ("-w", "--work-dir"):
+            work_dir = arg
+        elif opt == "--store":
+            store = True
+        elif opt in ("-t", "--tasks"):
+            if not all(task in tasks for task in arg.split(",")):
+                print("error: unknown task in: %s" % arg)
+                help()
+                sys.exit(70)
+            tasks = arg.split(",")
+        else:
+            try:
+                if opt in ("-r", "--repeat"):
+                    repeat = max(1, int(arg))
+                elif opt in ("-s", "--sizes"):
+                    sizes = [ parse_number(size) for size in arg.split(",") ]
+                elif opt == "--threshold":
+                    threshold = float(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+
+
+
+##
+## function: arguments of a task for a corpus directory
+##
+def task_args(task, directory):
+    args = {
+        'library-val':      [ '-y', directory + '/library' ],
+        'library-ext':      [ '-y', directory + '/library', '-o', directory + '/out/library', '-A', '-l', '-L', directory + '/home' ],
+        'library-bib':      [ '-y', directory + '/library', '-a', directory + '/library.aux', '-o', directory + '/out/library.bib' ],
+        'acronyms-val':     [ '-y', directory + '/acronyms' ],
+        'acronyms-build':   [ '-y', directory + '/acronyms', '-o', directory + '/out/acronyms', '-a' ],
+        'acronyms-latex':   [ '-y', directory + '/acronyms', '-a', directory + '/acronyms.aux', '-o', directory + '/out/acronyms.tex' ],
+        'acronyms':         [ '-y', directory + '/acronyms', '-s', 'SDN' ]
+    }
+    return args[task]
+
+
+
+##
+## function: wrap a function to add its time and calls to a phase
+##
+def timed(phases, name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phase = phases.setdefault(name, { 'seconds': 0.0, 'calls': 0 })
+            phase['seconds'] += time.perf_counter() - start
+            phase['calls'] += 1
+    return wrapper
+
+
+
+##
+## function: run a task in this process, sends the result to the connection (runs in a forked process)
+##
+def run_task(connection, task, args, cache_dir):
+    os.environ['SKB_DASHBOARD_CACHE'] = cache_dir
+    sys.path.insert(0, bin_dir)
+    phases = {}
+    code = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for name in shared_phases:
+            module = importlib.import_module(name)
+            for function in shared_phases[name]:
+                setattr(module, function, timed(phases, name + '.' + function, getattr(module, function)))
+
+        spec = importlib.util.spec_from_file_location(task.replace("-", "_"), os.path.join(bin_dir, task + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__ and not name in no_phases:
+                setattr(module, name, timed(phases, name, function))
+
+        try:
+            module.main(args)
+        except SystemExit as exc:
+            code = exc.code if exc.code is not None else 0
+        seconds = time.perf_counter() - start
+    connection.send({ 'seconds': seconds, 'exit': code, 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'phases': phases })
+    connection.close()
+
+
+
+##
+## function: run a task in a fresh process, returns result of the run
+##
+def run(task, args, cache_dir):
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=run_task, args=(sender, task, args, cache_dir))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = { 'seconds': 0.0, 'exit': 'crashed', 'max_rss_kb': 0, 'phases': {} }
+    process.join()
+    return result
+
+
+
+##
+## function: build acronyms in a layout and measure time and memory (runs in a forked process)
+## - dict: the parsed YAML dictionaries with 'src-file' added, index is a dictionary of lists
+## - compact: _acronyms records and index, parsed YAML dictionaries are released
+##
+def measure_store(connection, directory, layout):
+    os.environ['SKB_DASHBOARD_CACHE'] = directory + '/cache/store'
+    sys.path.insert(0, bin_dir)
+    _corpus = importlib.import_module('_corpus')
+    _discovery = importlib.import_module('_discovery')
+    _acronyms = importlib.import_module('_acronyms')
+    yaml_dir = directory + '/acronyms'
+    files = _discovery.files(_discovery.scan(yaml_dir))
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _corpus.load(yaml_dir, files)
+
+    tracemalloc.start()
+    corpus = _corpus.load(yaml_dir, files)
+    start = time.perf_counter()
+    acronyms = {}
+    for file in files:
+        data = corpus[file]
+        key = list(data.keys())[0]
+        if layout == 'dict':
+            data[key]['src-file'] = file
+            acronyms[key] = data[key]
+        else:
+            acronyms[key] = _acronyms.Acronym(data[key], file)
+    store_seconds = time.perf_counter() - start
+    del corpus, data
+
+    start = time.perf_counter()
+    if layout == 'dict':
+        idx = {}
+        for key in acronyms:
+            short_lc = acronyms[key]['short'].lower()
+            if short_lc in idx:
+                idx[short_lc].append(key)
+            else:
+                idx[short_lc] = [ key ]
+    else:
+        idx = _acronyms.Index()
+        idx.build(acronyms)
+    index_seconds = time.perf_counter() - start
+
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    connection.send({ 'acronyms': len(acronyms), 'store_seconds': store_seconds, 'index_seconds': index_seconds, 'retained_mb': retained / 1048576.0, 'peak_mb': peak / 1048576.0 })
+    connection.close()
+
+
+
+##
+## function: benchmark acronym store layouts, returns results per layout
+##
+def benchmark_store(directory):
+    ret = {}
+    context = multiprocessing.get_context('fork')
+    for layout in ( 'dict', 'compact' ):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=measure_store, args=(sender, directory, layout))
+        process.start()
+        sender.close()
+        ret[layout] = receiver.recv()
+        process.join()
+        print("      store %-9s store %8.3fs   index %8.3fs   retained %8.1f MiB   peak %8.1f MiB" % (layout, ret[layout]['store_seconds'], ret[layout]['index_seconds'], ret[layout]['retained_mb'], ret[layout]['peak_mb']))
+    return ret
+
+
+
+##
+## function: generate library and acronym corpora for a size, returns generation time per corpus
+##
+def generate(directory, size):
+    generator = os.path.join(bin_dir, "skb-corpus-gen.py")
+    ret = {}
+    for corpus_type, extra in (( 'library', [ '-L', directory + '/home' ] ), ( 'acronyms', [] )):
+        start = time.perf_counter()
+        subprocess.run([ sys.executable, generator, '-t', corpus_type, '-n', str(size), '-y', directory + '/' + corpus_type, '-a', directory + '/' + corpus_type + '.aux' ] + extra, check=True, stdout=subprocess.DEVNULL)
+        ret[corpus_type] = time.perf_counter() - start
+    return ret
+
+
+
+##
+## function: git commit of the tree, empty if not in a git repository
+##
+def git_commit():
+    try:
+        return subprocess.run([ 'git', 'rev-parse', '--short', 'HEAD' ], cwd=bin_dir, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+
+##
+## function: benchmark all tasks for a size
+##
+def benchmark(directory, size):
+    print("\n    > size %d: generating corpora in %s" % (size, directory))
+    ret = { 'generate': generate(directory, size), 'tasks': {} }
+    os.makedirs(directory + '/out', exist_ok=True)
+    print("      generated in %.3fs" % sum(ret['generate'].values()))
+
+    for task in tasks:
+        cache_dir = directory + '/cache/' + task
+        args = task_args(task, directory)
+        cold = run(task, args, cache_dir)
+        warm = min((run(task, args, cache_dir) for i in range(repeat)), key=lambda result: result['seconds'])
+        ret['tasks'][task] = { 'args': args, 'cold': cold, 'warm': warm }
+        print("      %-16s cold %8.3fs   warm %8.3fs   exit %s/%s" % (task, cold['seconds'], warm['seconds'], cold['exit'], warm['exit']))
+    if store == True:
+        ret['acronym-store'] = benchmark_store(directory)
+    return ret
+
+
+
+##
+## function: compare results with an earlier benchmark
+##
+def compare(results, fn):
+    with open(fn, 'r') as stream:
+        old = json.load(stream)
+    print("\n    > compared with %s (commit %s, %s)" % (fn, old.get('commit', ''), old.get('date', '')))
+    regressions = 0
+    for size in results['sizes']:
+        if not size in old['sizes']:
+            continue
+        for task in results['sizes'][size]['tasks']:
+            if not task in old['sizes'][size]['tasks']:
+                continue
+            for state in ( 'cold', 'warm' ):
+                before = old['sizes'][size]['tasks'][task][state]['seconds']
+                after = results['sizes'][size]['tasks'][task][state]['seconds']
+                change = (after - before) * 100.0 / before if before > 0 else 0.0
+                mark = ''
+                if change > threshold:
+                    mark = '   <-- slower'
+                    regressions += 1
+                print("      %8s %-16s %-4s %8.3fs -> %8.3fs %+7.1f%%%s" % (size, task, state, before, after, change, mark))
+    print("\n    > %d regressions above %.1f%%" % (regressions, threshold))
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    base = work_dir if work_dir != '' else tempfile.mkdtemp(prefix='skb-benchmark-')
+    results = {
+        'version': 1,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'sizes': {}
+    }
+    try:
+        for size in sizes:
+            directory = os.path.abspath(base + '/' + str(size))
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            results['sizes'][str(size)] = benchmark(directory, size)
+    finally:
+        if work_dir == '':
+            shutil.rmtree(base, ignore_errors=True)
+
+    with open(output_file, 'w') as stream:
+        json.dump(results, stream, indent=1, sort_keys=True)
+    print("\n    > wrote %s" % output_file)
+
+    if compare_file != '':
+        compare(results, compare_file)
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
+    print("    > done")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## skb-corpus-gen - generates a synthetic SKB library or acronym corpus for benchmarks
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import random           ## reproducible random content
+import json             ## JSON strings are valid YAML double-quoted strings
+import time             ## timing of the generation
+
+
+
+##
+## Global variables
+##
+yaml_dir = ''               ## YAML directory to create the corpus in
+corpus_type = 'library'     ## type of corpus: library or acronyms
+entries = 1000              ## number of entries
+seed = 1                    ## seed for random content, same seed and size create the same corpus
+latex_aux = ''              ## LaTeX AUX file to write, citing or using every 10th entry
+library_home = ''           ## library home to create artifacts (empty PDFs) in, for library corpora
+
+entries_per_dir = 250       ## entries per directory, about
+
+words = ( 'adaptive', 'autonomic', 'network', 'management', 'policy', 'service', 'model', 'control', 'semantic', 'knowledge',
+          'software', 'defined', 'cloud', 'edge', 'orchestration', 'intent', 'closed', 'loop', 'telemetry', 'analytics',
+          'learning', 'framework', 'architecture', 'protocol', 'security', 'reliable', 'distributed', 'system', 'virtual', 'function' )
+first_names = ( 'Ann', 'Bo', 'Carla', 'David', 'Eva', 'Frank', 'Grace', 'Hans', 'Ines', 'John', 'Kim', 'Lars', 'Maria', 'Nils', 'Olga', 'Paul' )
+last_names = ( 'Doe', 'Smith', 'Meer', 'Jones', 'Brown', 'Garcia', 'Muller', 'Rossi', 'Tanaka', 'Chen', 'Kumar', 'Silva', 'Novak', 'Berg', 'Dubois', 'Kelly' )
+areas = ( 'ieee', 'acm', 'ifip', 'etsi', 'ietf', 'itu', 'springer', 'elsevier' )
+venues = ( 'noms', 'im', 'cnsm', 'netsoft', 'tnsm', 'jnsm', 'commag', 'sigcomm', 'nfv', 'opsawg', 'zsm', 'tmf' )
+
+## library types with the persons they need, checked in library-val
+library_types = (
+    ( 'article', 'authors' ), ( 'inproceedings', 'authors' ), ( 'book', 'authors' ), ( 'incollection', 'authors' ),
+    ( 'techreport', 'authors' ), ( 'standard', 'editors' ), ( 'proceedings', 'editors' ), ( 'phdthesis', 'authors' ),
+    ( 'tutorial', 'presenters' ), ( 'presentation', 'presenters' ), ( 'lecture-note', 'presenters' ), ( 'keynote', 'presenters' ),
+    ( 'invited-talk', 'presenters' ), ( 'panel', 'panelists' ), ( 'movie', '' )
+)
+languages = ( 'en', 'de', 'fr', 'es' )
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-corpus-gen - generates a synthetic SKB library or acronym corpus for benchmarks\n")
+    print("       Usage: skb-corpus-gen [options]\n")
+    print("       Options")
+    print("          [-a | --aux] <aux-file>          - also write LaTeX AUX file, citing (library) or using (acronyms) every 10th entry")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-L | --lib-home] <dir>          - also create artifacts (empty PDF files) for every 2nd library entry")
+    print("          [-n | --entries] <number>        - number of entries, suffix k or M allowed, e.g. 1k, 10k, 100k, 1M, default 1k")
+    print("          [-s | --seed] <number>           - seed for random content, default 1")
+    print("          [-t | --type] <type>             - type of corpus: library or acronyms, default library")
+    print("          [-y | --yaml-directory] <dir>    - YAML top directory, created if it does not exist")
+    print("\n")
+
+
+
+##
+## function: parse a number with optional suffix k or M
+##
+def parse_number(arg):
+    factor = 1
+    if arg[-1:] in ('k', 'K'):
+        factor = 1000
+        arg = arg[:-1]
+    elif arg[-1:] == 'M':
+        factor = 1000000
+        arg = arg[:-1]
+    return int(arg) * factor
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global yaml_dir
+    global corpus_type
+    global entries
+    global seed
+    global latex_aux
+    global library_home
+
+    try:
+        opts, args = getopt.getopt(argv,"a:hL:n:s:t:y:",["aux=","help","lib-home=","entries=","seed=","type=","yaml-directory="])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-a", "--aux"):
+            latex_aux = arg
+        elif opt in ("-L", "--lib-home"):
+            library_home = arg
+        elif opt in ("-n", "--entries"):
+            try:
+                entries = parse_number(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt in ("-s", "--seed"):
+            try:
+                seed = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt in ("-t", "--type"):
+            corpus_type = arg
+        elif opt in ("-y", "--yaml-directory"):
+            yaml_dir = arg
+
+    if yaml_dir == '' or not corpus_type in ('library', 'acronyms') or entries < 1:
+        help()
+        sys.exit(70)
+
+
+
+##
+## function: directory of an entry, relative to the YAML directory, about entries_per_dir entries per directory
+##
+def get_directory(number):
+    leaf = number // entries_per_dir
+    return areas[leaf % len(areas)] + "/" + venues[(leaf // len(areas)) % len(venues)] + "/" + str(1990 + leaf // (len(areas) * len(venues)))
+
+
+
+##
+## function: random text of words
+##
+def get_text(rnd, count):
+    return " ".join(rnd.choice(words) for i in range(count))
+
+
+
+##
+## function: random person, last name first
+##
+def get_person(rnd):
+    return rnd.choice(last_names) + str(rnd.randrange(200)) + ", " + rnd.choice(first_names)
+
+
+
+##
+## function: YAML for a library entry, returns key, directory, and YAML text
+##
+def get_library_entry(rnd, number):
+    directory = get_directory(number)
+    index = number % entries_per_dir
+    name = "proceedings" if index == 0 else "e%07d" % number
+    key = directory + "/" + name
+    bib_key = key.replace("/", ":")
+    type, persons = ( 'proceedings', 'editors' ) if index == 0 else library_types[rnd.randrange(len(library_types))]
+    year = directory.rsplit("/", 1)[1]
+    title = get_text(rnd, rnd.randint(4, 12)).capitalize()
+
+    yaml = key + ":\n"
+    yaml += "  title: " + json.dumps(title) + "\n"
+    if rnd.random() < 0.2:
+        yaml += "  titleaddon: " + json.dumps(get_text(rnd, 3)) + "\n"
+    yaml += "  type: " + type + "\n"
+    yaml += "  year: " + year + "\n"
+
+    names = []
+    if persons != '':
+        while len(names) < rnd.randint(1, 6):
+            person = get_person(rnd)
+            if not person in names:
+                names.append(person)
+        yaml += "  " + persons + ":\n" + "".join("    - " + json.dumps(person) + "\n" for person in names)
+    if type == 'panel':
+        yaml += "  chair: " + json.dumps(get_person(rnd)) + "\n"
+
+    if rnd.random() < 0.8:
+        yaml += "  urls:\n"
+        yaml += "    doi: https://doi.org/10.1109/" + bib_key.replace(":", ".") + "\n"
+        if rnd.random() < 0.5:
+            yaml += "    pdf: https://example.org/" + key + ".pdf\n"
+
+    if rnd.random() < 0.5:
+        yaml += "  adoc: |\n    " + get_text(rnd, rnd.randint(20, 60)) + ".\n"
+
+    bib_type = type if type in ('article', 'inproceedings', 'book', 'incollection', 'techreport', 'proceedings', 'phdthesis') else 'misc'
+    bib = "@" + bib_type + "{" + bib_key + ",\n"
+    if len(names) > 0:
+        bib += "      " + ("editor" if persons == 'editors' else "author") + " = {" + " and ".join(names) + "},\n"
+    bib += "      title = {" + title + "},\n"
+    if type == 'inproceedings':
+        bib += "      crossref = {" + directory.replace("/", ":") + ":proceedings},\n"
+    bib += "      year = {" + year + "}\n    }\n"
+    yaml += "  bibtex: |\n    " + bib
+    yaml += "  biblatex: |\n    " + bib.replace("      year = {", "      date = {")
+    return (key, directory, yaml)
+
+
+
+##
+## function: YAML for an acronym, returns key, directory, and YAML text
+##
+def get_acronym_entry(rnd, number):
+    directory = get_directory(number)
+    key = directory + "/a%07d" % number
+    long = [ rnd.choice(words) for i in range(rnd.randint(2, 5)) ]
+    short = "".join(word[0].upper() for word in long)
+    if rnd.random() < 0.5:
+        short += str(number % 97)
+
+    yaml = key + ":\n"
+    yaml += "  short: " + json.dumps(short) + "\n"
+    if rnd.random() < 0.1:
+        yaml += "  short-target:\n    latex: " + json.dumps(short + "\\textsuperscript{+}") + "\n    adoc: " + json.dumps(short + "^+^") + "\n"
+    yaml += "  long:\n"
+    for language in languages[:rnd.randint(1, len(languages))]:
+        yaml += "    " + language + ": " + json.dumps(" ".join(long).title() + ("" if language == 'en' else " (" + language + ")")) + "\n"
+    if rnd.random() < 0.1:
+        yaml += "  long-target:\n    latex: " + json.dumps("\\emph{" + " ".join(long).title() + "}") + "\n"
+    if rnd.random() < 0.3:
+        yaml += "  description:\n    en: " + json.dumps(get_text(rnd, rnd.randint(10, 30))) + "\n"
+    if rnd.random() < 0.2:
+        yaml += "  notes:\n    en: " + json.dumps(get_text(rnd, rnd.randint(5, 15))) + "\n"
+    if rnd.random() < 0.3:
+        yaml += "  urls:\n    wikipedia: https://en.wikipedia.org/wiki/" + short + "\n"
+    return (key, directory, yaml)
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    start = time.perf_counter()
+    rnd = random.Random(seed)
+    directories = set()
+    aux = []
+    artifacts = 0
+    for number in range(entries):
+        if corpus_type == 'library':
+            key, directory, yaml = get_library_entry(rnd, number)
+        else:
+            key, directory, yaml = get_acronym_entry(rnd, number)
+
+        if not directory in directories:
+            os.makedirs(yaml_dir + "/" + directory, exist_ok=True)
+            if library_home != '' and corpus_type == 'library':
+                os.makedirs(library_home + "/" + directory, exist_ok=True)
+            directories.add(directory)
+        with open(yaml_dir + "/" + key + ".yaml", 'w') as file:
+            file.write(yaml)
+
+        if library_home != '' and corpus_type == 'library' and number % 2 == 0:
+            open(library_home + "/" + key + ".pdf", 'w').close()
+            artifacts += 1
+        if number % 10 == 1:
+            if corpus_type == 'library':
+                aux.append("\\abx@aux@cite{0}{" + key.replace("/", ":") + "}\n")
+            else:
+                aux.append("\\acronymused{" + key.replace("/", ":") + "}\n")
+
+    if latex_aux != '':
+        with open(latex_aux, 'w') as file:
+            file.write("\\relax\n" + "".join(aux))
+
+    print("    > generated %d %s entries in %d directories in %.3fs" % (entries, corpus_type, len(directories), time.perf_counter() - start))
+    if artifacts > 0:
+        print("    > generated %d artifacts in %s" % (artifacts, library_home))
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
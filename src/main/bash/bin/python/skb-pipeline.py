@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## skb-pipeline - runs several Python tasks in one process over a single load of the YAML sources
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## loading YAML files, kept in memory for all stages
+import _loader          ## YAML loader statistics, reset per stage
+import _validation      ## errors and keys of validation tasks, reset per stage
+import _output          ## counts of written files, reset per stage
+import _artifacts       ## artifact lookup statistics, reset per stage
+import _ngram           ## n-gram index of the acronyms task, reset per stage
+import _profile         ## per-phase profiling of all stages with --profile, or per stage
+import os               ## operating system, e.g. file handling
+import sys              ## system for exit
+import time             ## timings per stage
+import importlib.util   ## loading task scripts as modules
+
+
+
+##
+## Global variables
+##
+stages = []                 ## stages in order of command line, list of (task, arguments)
+tasks = ( 'library-val', 'library-ext', 'acronyms-val', 'acronyms-build', 'acronyms-latex', 'acronyms' )
+timings = []                ## timings per stage, list of (task, seconds)
+profile = False             ## profile all stages together, otherwise stages with --profile are profiled on their own
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-pipeline - runs several Python tasks in one process over a single load of the YAML sources\n")
+    print("       Usage: skb-pipeline [options] <task> [task options] [-- <task> [task options]]...\n")
+    print("       Options")
+    print("          [-h | --help]                    - this help screen")
+    print("          [--profile]                      - print per-phase timings, file counts, and peak memory of all stages to STDERR")
+    print("          [--profile-dump] <file>          - also write cProfile statistics to file, implies --profile")
+    print("\n")
+    print("       Tasks: " + ", ".join(tasks) + "\n")
+    print("       Each stage is a task with the same options as the task itself, stages are separated by '--'")
+    print("       Stages run in order, the first failing stage stops the pipeline with its exit code")
+    print("       Example: skb-pipeline library-val -y lib -- library-ext -y lib -o out -A")
+    print("\n")
+
+
+
+##
+## function: parse command line into stages
+##
+def cli(argv):
+    global profile
+
+    while len(argv) > 0 and argv[0] in ("--profile", "--profile-dump"):
+        profile = True
+        _profile.enabled = True
+        if argv[0] == "--profile-dump":
+            if len(argv) < 2:
+                help()
+                sys.exit(70)
+            _profile.dump_file = argv[1]
+            argv = argv[1:]
+        argv = argv[1:]
+
+    if len(argv) == 0 or argv[0] in ("-h", "--help"):
+        help()
+        sys.exit(0)
+
+    stage = []
+    for arg in argv + [ "--" ]:
+        if arg == "--":
+            if len(stage) > 0:
+                if not stage[0] in tasks:
+                    print("error: unknown task: %s" % stage[0])
+                    help()
+                    sys.exit(70)
+                stages.append((stage[0], stage[1:]))
+            stage = []
+        else:
+            stage.append(arg)
+
+
+
+##
+## function: load a task script as a new module, so every stage starts with fresh settings
+##
+def load_task(task):
+    fn = os.path.join(os.path.dirname(os.path.abspath(__file__)), task + ".py")
+    spec = importlib.util.spec_from_file_location(task.replace("-", "_"), fn)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+
+##
+## function: reset state that shared modules keep from the last stage, loaded YAML files in _corpus stay
+## - profiling is only reset if stages are profiled on their own
+##
+def reset_modules():
+    for module in ( _corpus, _loader, _validation, _output, _artifacts, _ngram ):
+        module.reset()
+    if profile == False:
+        _profile.reset()
+
+
+
+##
+## function: run a stage, returns exit code
+##
+def run_stage(task, args):
+    print("\n    > stage: %s %s" % (task, " ".join(args)))
+    reset_modules()
+    start = time.perf_counter()
+    code = 0
+    try:
+        load_task(task).main(args)
+    except SystemExit as exc:
+        code = exc.code
+    timings.append((task, time.perf_counter() - start))
+    if profile == False:
+        _profile.report()
+    return code
+
+
+
+##
+## function: print timings of all stages
+##
+def print_timings():
+    print("\n    > timings")
+    for task, seconds in timings:
+        print("      %-20s %8.3fs" % (task, seconds))
+    print("      %-20s %8.3fs" % ("total", sum(seconds for task, seconds in timings)))
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+    _profile.start(globals(), { 'stages': ( 'load_task', ) })
+
+    _corpus.keep = True
+    for task, args in stages:
+        code = run_stage(task, args)
+        if code != 0 and code is not None:
+            print_timings()
+            print("error: stage %s failed with exit code %s" % (task, code))
+            sys.exit(code)
+    print_timings()
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
+    print("    > done")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+##
+## skb-store - loads library and acronym YAML files into a SQLite store with full-text tables and queries it
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## Includes, all we need
+##
+import _corpus          ## cache directory and settings, parallel parsing
+import _store           ## the SQLite store
+import os               ## operating system, e.g. file handling
+import sys, getopt      ## system for exit, getopt for CLI parsing
+import json             ## JSON output
+import sqlite3          ## errors of the store
+import time             ## query timing
+
+
+
+##
+## Global variables
+##
+database = ''               ## store file, default in the cache directory
+yaml_dirs = []              ## (corpus, YAML directory) to load
+query = ''                  ## full-text query
+corpora = []                ## corpora to query, default all
+field = None                ## full-text column to query, default all
+limit = 20                  ## maximum number of results per corpus
+json_out = False            ## print results as JSON
+
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+
+
+##
+## function: print help, for empty or wrong command line
+##
+def help():
+    print("")
+    print("skb-store - loads library and acronym YAML files into a SQLite store with full-text tables and queries it\n")
+    print("       Usage: skb-store [options]\n")
+    print("       Options")
+    print("          [-a | --acronyms] <dir>          - load acronym YAML directory into the store")
+    print("          [-c | --corpus] <corpus>         - query only this corpus: library, acronyms, can be repeated")
+    print("          [-d | --database] <file>         - store file, default: <cache-dir>/skb-store.sqlite")
+    print("          [-f | --field] <field>           - query only this field: title, adoc, short, long, description, notes")
+    print("          [-h | --help]                    - this help screen")
+    print("          [-j | --jobs] <N>                - parse changed YAML files with N parallel jobs, 0 for number of CPUs")
+    print("          [-J | --json]                    - print query results as JSON")
+    print("          [-l | --library] <dir>           - load library YAML directory into the store")
+    print("          [-n | --limit] <N>               - maximum number of results per corpus, default: 20")
+    print("          [-q | --query] <query>           - full-text query, e.g. 'policy NEAR(closed loop)', 'autonom*'")
+    print("          [--cache-dir] <dir>              - cache directory for the default store file")
+    print("\n")
+    print("Loads only parse new and changed YAML files, files with unchanged content are found by their SHA-1")
+    print("Queries use SQLite FTS5 syntax, queries with invalid syntax are searched as plain words")
+    print("\n")
+
+
+
+##
+## function: parse command line
+##
+def cli(argv):
+    global database
+    global query
+    global field
+    global limit
+    global json_out
+
+    try:
+        opts, args = getopt.getopt(argv,"a:c:d:f:hj:Jl:n:q:",["acronyms=","corpus=","database=","field=","help","jobs=","json","library=","limit=","query=","cache-dir="])
+    except getopt.GetoptError:
+        help()
+        sys.exit(70)
+    for opt, arg in opts:
+        if opt in ("-a", "--acronyms"):
+            yaml_dirs.append(('acronyms', arg))
+        elif opt in ("-c", "--corpus"):
+            if arg not in _store.columns:
+                help()
+                sys.exit(70)
+            corpora.append(arg)
+        elif opt in ("-d", "--database"):
+            database = arg
+        elif opt in ("-f", "--field"):
+            field = arg
+        elif opt in ("-h", "--help"):
+            help()
+            sys.exit(0)
+        elif opt in ("-j", "--jobs"):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+            if jobs < 1:
+                jobs = os.cpu_count() or 1
+            _corpus.jobs = jobs
+        elif opt in ("-J", "--json"):
+            json_out = True
+        elif opt in ("-l", "--library"):
+            yaml_dirs.append(('library', arg))
+        elif opt in ("-n", "--limit"):
+            try:
+                limit = int(arg)
+            except ValueError:
+                help()
+                sys.exit(70)
+        elif opt in ("-q", "--query"):
+            query = arg.strip()
+            if query == '':
+                print("error: empty query")
+                sys.exit(70)
+        elif opt == "--cache-dir":
+            _corpus.cache_dir = arg
+
+    if len(yaml_dirs) == 0 and query == '':
+        help()
+        sys.exit(70)
+    if database == '':
+        database = os.path.join(_corpus.cache_dir, 'skb-store.sqlite')
+    if field is not None and not any(field in names for names in _store.columns.values()):
+        print("error: unknown field %s, fields are: %s" % (field, ", ".join(name for names in _store.columns.values() for name in names)))
+        sys.exit(70)
+    if len(corpora) == 0:
+        corpora.extend(corpus for corpus in _store.columns if field is None or field in _store.columns[corpus])
+    for corpus in corpora:
+        if field is not None and field not in _store.columns[corpus]:
+            print("error: no field %s in corpus %s" % (field, corpus))
+            sys.exit(70)
+
+
+
+##
+## function: main function
+##
+def main(argv):
+    cli(argv)
+
+    for corpus, yaml_dir in yaml_dirs:
+        if not os.path.isdir(yaml_dir):
+            print("error: could not open YAML directory: %s" % yaml_dir)
+            sys.exit(71)
+
+    try:
+        conn = _store.connect(database)
+    except sqlite3.Error as exc:
+        print("error: could not open store %s: %s" % (database, exc))
+        sys.exit(71)
+
+    for corpus, yaml_dir in yaml_dirs:
+        _store.load(conn, corpus, yaml_dir)
+        if json_out == False:
+            _store.print_stats(corpus)
+
+    if query == '':
+        conn.close()
+        return
+
+    result = {}
+    for corpus in corpora:
+        start = time.perf_counter()
+        try:
+            total, rows = _store.search(conn, corpus, query, field, limit)
+        except sqlite3.OperationalError as exc:
+            print("error: could not search for %s: %s" % (query, exc))
+            conn.close()
+            sys.exit(70)
+        seconds = time.perf_counter() - start
+        result[corpus] = { 'total': total, 'results': [ { 'key': key, 'label': label, 'snippet': snippet, 'file': path } for key, label, snippet, path in rows ] }
+        if json_out == True:
+            continue
+        print("    > %s: %d of %d results in %.1fms" % (corpus, len(rows), total, seconds * 1000))
+        for key, label, snippet, path in rows:
+            print("      - %s: %s" % (key, label))
+            print("          %s" % snippet.replace("\n", " "))
+    conn.close()
+
+    if json_out == True:
+        print(json.dumps(result, indent=1, ensure_ascii=False))
+
+
+
+##
+## Call main
+##
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -70,14 +70,17 @@ TARGETS=
 BUILD_LOCAL=false
 ALL=false
 CLI_SET=false
+FORCE=false
+JOBS=
+BATCH=false
 
 
 
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=hAH
-CLI_LONG_OPTIONS=help
+CLI_OPTIONS=bfhj:AH
+CLI_LONG_OPTIONS=batch,help,force,jobs:
 CLI_LONG_OPTIONS+=,all,html
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name acronyms-adoc -- "$@")
@@ -90,11 +93,26 @@ eval set -- "$PARSED"
 PRINT_PADDING=25
 while true; do
     case "$1" in
+        -b | --batch)
+            BATCH=true
+            shift
+            ;;
+        -f | --force)
+            FORCE=true
+            shift
+            ;;
+        -j | --jobs)
+            JOBS="$2"
+            shift 2
+            ;;
         -h | --help)
             CACHED_HELP=$(TaskGetCachedHelp "acronyms-adoc")
             if [[ -z ${CACHED_HELP:-} ]]; then
                 printf "\n   options\n"
+                BuildTaskHelpLine b batch       "<none>"    "render many documents per asciidoctor process" $PRINT_PADDING
+                BuildTaskHelpLine f force       "<none>"    "render all documents, even if unchanged"   $PRINT_PADDING
                 BuildTaskHelpLine h help        "<none>"    "print help screen and exit"            $PRINT_PADDING
+                BuildTaskHelpLine j jobs        "<N>"       "number of parallel renders, 0 for all CPUs"    $PRINT_PADDING
                 printf "\n   targets\n"
                 BuildTaskHelpLine A     all         "<none>"    "generate all targets"              $PRINT_PADDING
                 BuildTaskHelpLine H     html        "<none>"    "generate HTML"                     $PRINT_PADDING
@@ -153,34 +171,38 @@ if [[ ! -d $ACRONYMS_ADOC ]]; then
     exit 61
 fi
 
-ConsoleDebug "remove and re-create output directory: $OUTPUT_DIR"
-if [[ -d $OUTPUT_DIR ]]; then
-    rm -fr $OUTPUT_DIR
+if [[ $FORCE == true ]]; then
+    ConsoleDebug "remove and re-create output directory: $OUTPUT_DIR"
+    if [[ -d $OUTPUT_DIR ]]; then
+        rm -fr $OUTPUT_DIR
+    fi
 fi
 mkdir -p $OUTPUT_DIR
 
 ADOC_ACRONYM="-a acronyms-adoc=$ACRONYMS_ADOC"
-ADOC_OUTPUT_DIR="--destination-dir $OUTPUT_DIR"
-
-for FILE in ${CONFIG_MAP["ACRONYM_DOCS"]}/**/*.adoc; do
-    for TARGET in $TARGETS; do
-        OUTPUT_FILE="$OUTPUT_DIR${FILE#${CONFIG_MAP["ACRONYM_DOCS"]}}"
-        OUTPUT_FILE=${OUTPUT_FILE%.*}
-        MKDIR_DIR=${OUTPUT_FILE%/*}
-
-        ConsoleDebug "building file $FILE for target $TARGET"
-        case $TARGET in
-            html)
-                ConsoleDebug "    outfile: ${OUTPUT_FILE}.html"
-                mkdir -p $MKDIR_DIR
-                asciidoctor $FILE --out-file ${OUTPUT_FILE}.html $ADOC_ACRONYM -a toc=left
-                :
-                ;;
-            *)
-                ConsoleError "  ->" "acradoc: unknown target $TARGET"
-                ;;
-        esac
-    done
+
+## dependency graph of includes: only documents with changed includes (or without output) are rendered
+ADOC_DEPS="${CONFIG_MAP["APP_HOME"]}/bin/python/skb-adoc-deps.py --output-directory $OUTPUT_DIR --docs-directory ${CONFIG_MAP["ACRONYM_DOCS"]} $ADOC_ACRONYM"
+if [[ $FORCE == true ]]; then
+    ADOC_DEPS+=" --all"
+fi
+
+ADOC_RENDER="${CONFIG_MAP["APP_HOME"]}/bin/python/skb-adoc-render.py --output-directory $OUTPUT_DIR --mirror --docs-directory ${CONFIG_MAP["ACRONYM_DOCS"]} --graph $OUTPUT_DIR/.adoc-deps.json $ADOC_ACRONYM -a toc=left"
+if [[ -n "$JOBS" ]]; then
+    ADOC_RENDER+=" --jobs $JOBS"
+fi
+if [[ $BATCH == true ]]; then
+    ADOC_RENDER+=" --batch 0"
+fi
+
+for TARGET in $TARGETS; do
+    DOCS=$($ADOC_DEPS --target $TARGET ${CONFIG_MAP["ACRONYM_DOCS"]}/**/*.adoc)
+    if [[ -z $DOCS ]]; then
+        ConsoleInfo "  -->" "acradoc: all documents for target $TARGET are up to date"
+        continue
+    fi
+    ConsoleDebug "building files for target $TARGET: $DOCS"
+    $ADOC_RENDER --target $TARGET $DOCS
 done
 
 
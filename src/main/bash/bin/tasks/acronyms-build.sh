@@ -67,6 +67,7 @@ ConsoleResetWarnings
 TARGETS=
 ALL=false
 DO_CLEAN=false
+WATCH=false
 CLI_SET=false
 
 
@@ -74,8 +75,8 @@ CLI_SET=false
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=Aach
-CLI_LONG_OPTIONS=help
+CLI_OPTIONS=Aachw
+CLI_LONG_OPTIONS=help,watch
 CLI_LONG_OPTIONS+=,clean,all,adoc
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name acronyms-build -- "$@")
@@ -94,6 +95,7 @@ while true; do
                 printf "\n   options\n"
                 BuildTaskHelpLine c clean           "<none>"    "cleans build artifacts"            $PRINT_PADDING
                 BuildTaskHelpLine h help            "<none>"    "print help screen and exit"        $PRINT_PADDING
+                BuildTaskHelpLine w watch           "<none>"    "watch sources and rebuild changes" $PRINT_PADDING
                 printf "\n   targets\n"
                 BuildTaskHelpLine A     all         "<none>"    "generate all targets"              $PRINT_PADDING
                 BuildTaskHelpLine a     adoc        "<none>"    "generate ADOC"                     $PRINT_PADDING
@@ -123,6 +125,11 @@ while true; do
             shift
             ;;
 
+        -w | --watch)
+            WATCH=true
+            shift
+            ;;
+
         --)
             shift
             break
@@ -172,6 +179,10 @@ for TARGET in $TARGETS; do
     esac
 done
 
+if [[ $WATCH == true ]]; then
+    ACRONYMS_ARGS+=" --watch"
+fi
+
 ${CONFIG_MAP["APP_HOME"]}/bin/python/acronyms-build.py $ACRONYMS_ARGS
 __errno=$?
 exit $?
@@ -64,14 +64,17 @@ ConsoleResetWarnings
 ##
 ## set local variables
 ##
+COLLECT=false
+JOBS=
+REPORT=
 
 
 
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=h
-CLI_LONG_OPTIONS=help
+CLI_OPTIONS=chj:r:
+CLI_LONG_OPTIONS=collect,help,jobs:,report:
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name acronyms-val -- "$@")
 if [[ ${PIPESTATUS[0]} -ne 0 ]]; then
@@ -87,13 +90,29 @@ while true; do
             CACHED_HELP=$(TaskGetCachedHelp "acronyms-val")
             if [[ -z ${CACHED_HELP:-} ]]; then
                 printf "\n   options\n"
-                BuildTaskHelpLine h help "<none>" "print help screen and exit" $PRINT_PADDING
+                BuildTaskHelpLine c collect "<none>"    "validate all files, report all errors at the end"  $PRINT_PADDING
+                BuildTaskHelpLine h help    "<none>"    "print help screen and exit"                        $PRINT_PADDING
+                BuildTaskHelpLine j jobs    "<N>"       "number of parallel jobs"                           $PRINT_PADDING
+                BuildTaskHelpLine r report  "<file>"    "write JSON report to file, implies collect"        $PRINT_PADDING
             else
                 cat $CACHED_HELP
             fi
             exit 0
             ;;
 
+        -c | --collect)
+            COLLECT=true
+            shift
+            ;;
+        -j | --jobs)
+            JOBS="$2"
+            shift 2
+            ;;
+        -r | --report)
+            REPORT="$2"
+            shift 2
+            ;;
+
         --)
             shift
             break
@@ -113,7 +132,18 @@ done
 ############################################################################################
 ConsoleInfo "  -->" "acrval: starting task"
 
-${CONFIG_MAP["APP_HOME"]}/bin/python/acronyms-val.py -y ${CONFIG_MAP["ACRONYM_YAML"]}
+VAL_ARGS=" -y ${CONFIG_MAP["ACRONYM_YAML"]}"
+if [[ $COLLECT == true ]]; then
+    VAL_ARGS+=" --collect"
+fi
+if [[ -n "$JOBS" ]]; then
+    VAL_ARGS+=" --jobs $JOBS"
+fi
+if [[ -n "$REPORT" ]]; then
+    VAL_ARGS+=" --report $REPORT"
+fi
+
+${CONFIG_MAP["APP_HOME"]}/bin/python/acronyms-val.py $VAL_ARGS
 __errno=$?
 exit $?
 
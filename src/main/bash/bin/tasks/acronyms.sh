@@ -69,15 +69,16 @@ SEARCH_SHORT=
 SEARCH_LONG=
 SEARCH_NOTES=
 DUBPLICATES=false
+SERVE=false
 
 
 
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=dhl:n:s:x
+CLI_OPTIONS=dhl:n:s:Sx
 CLI_LONG_OPTIONS=help
-CLI_LONG_OPTIONS+=,short:,long:,notes:,duplicates
+CLI_LONG_OPTIONS+=,short:,long:,notes:,duplicates,serve
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name acronyms -- "$@")
 if [[ ${PIPESTATUS[0]} -ne 0 ]]; then
@@ -98,6 +99,7 @@ while true; do
                 BuildTaskHelpLine l long            "<string>"  "search for string in long form"                        $PRINT_PADDING
                 BuildTaskHelpLine n notes           "<string>"  "search for string in description, notes, and URLs"     $PRINT_PADDING
                 BuildTaskHelpLine s short           "<name>"    "search for acronym name"                               $PRINT_PADDING
+                BuildTaskHelpLine S serve           "<none>"    "run as server on localhost, query with acronyms-client" $PRINT_PADDING
             else
                 cat $CACHED_HELP
             fi
@@ -128,6 +130,12 @@ while true; do
             shift 2
             ;;
 
+        -S | --serve)
+            SERVE=true
+            CLI_SET=true
+            shift
+            ;;
+
         --)
             shift
             break
@@ -172,6 +180,10 @@ if [[ -n "$SEARCH_NOTES" ]]; then
     ACRONYMS_ARGS+=" --notes ${SEARCH_NOTES}"
 fi
 
+if [[ $SERVE == true ]]; then
+    ACRONYMS_ARGS+=" --serve"
+fi
+
 ${CONFIG_MAP["APP_HOME"]}/bin/python/acronyms.py $ACRONYMS_ARGS
 __errno=$?
 exit $?
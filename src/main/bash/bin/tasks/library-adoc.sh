@@ -68,14 +68,17 @@ TARGETS=
 BUILD_LOCAL=false
 ALL=false
 CLI_SET=false
+FORCE=false
+JOBS=
+BATCH=false
 
 
 
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=hlAHP
-CLI_LONG_OPTIONS=help,local
+CLI_OPTIONS=bfhj:lAHP
+CLI_LONG_OPTIONS=batch,help,force,jobs:,local
 CLI_LONG_OPTIONS+=,all,html,pdf
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name library-adoc -- "$@")
@@ -88,11 +91,26 @@ eval set -- "$PARSED"
 PRINT_PADDING=25
 while true; do
     case "$1" in
+        -b | --batch)
+            BATCH=true
+            shift
+            ;;
+        -f | --force)
+            FORCE=true
+            shift
+            ;;
+        -j | --jobs)
+            JOBS="$2"
+            shift 2
+            ;;
         -h | --help)
             CACHED_HELP=$(TaskGetCachedHelp "library-adoc")
             if [[ -z ${CACHED_HELP:-} ]]; then
                 printf "\n   options\n"
+                BuildTaskHelpLine b batch       "<none>"    "render many documents per asciidoctor process" $PRINT_PADDING
+                BuildTaskHelpLine f force       "<none>"    "render all documents, even if unchanged"   $PRINT_PADDING
                 BuildTaskHelpLine h help        "<none>"    "print help screen and exit"            $PRINT_PADDING
+                BuildTaskHelpLine j jobs        "<N>"       "number of parallel renders, 0 for all CPUs"    $PRINT_PADDING
                 BuildTaskHelpLine l local       "<none>"    "build from local target"               $PRINT_PADDING
                 printf "\n   targets\n"
                 BuildTaskHelpLine A     all         "<none>"    "generate all targets"              $PRINT_PADDING
@@ -173,15 +191,16 @@ if [[ ! -d $LIBRARY_ADOC ]]; then
     exit 61
 fi
 
-ConsoleDebug "remove and re-create output directory: $OUTPUT_DIR"
-if [[ -d $OUTPUT_DIR ]]; then
-    rm -fr $OUTPUT_DIR
+if [[ $FORCE == true ]]; then
+    ConsoleDebug "remove and re-create output directory: $OUTPUT_DIR"
+    if [[ -d $OUTPUT_DIR ]]; then
+        rm -fr $OUTPUT_DIR
+    fi
 fi
 mkdir -p $OUTPUT_DIR
 
 ADOC_LIBRARY="-a library-adoc=$LIBRARY_ADOC"
 ADOC_LIBRARY_DOCS="-a library-docs=${CONFIG_MAP["LIBRARY_DOCS"]}"
-ADOC_OUTPUT_DIR="--destination-dir $OUTPUT_DIR"
 
 SKB_BUILD_DAY=$(date +"%d")
 SKB_BUILD_MONTH=$(date +"%b")
@@ -190,21 +209,28 @@ SKB_BUILD_YEAR=$(date +"%Y")
 SKB_BUILD_DATE=$(date -I)
 ADOC_SKB_ATTRIBUTES="-a skb-build-day=$SKB_BUILD_DAY -a skb-build-month=$SKB_BUILD_MONTH -a skb-build-month-lc=$SKB_BUILD_MONTH_LC -a skb-build-year=$SKB_BUILD_YEAR -a skb-build-date=$SKB_BUILD_DATE"
 
-for FILE in ${CONFIG_MAP["LIBRARY_DOCS"]}/*.adoc; do
-    for TARGET in $TARGETS; do
-        ConsoleDebug "building file $FILE for target $TARGET"
-        case $TARGET in
-            html)
-                asciidoctor $FILE $ADOC_OUTPUT_DIR $ADOC_LIBRARY $ADOC_LIBRARY_DOCS $ADOC_LIBRARY_HOME $ADOC_SKB_ATTRIBUTES -a toc=left
-                ;;
-            pdf)
-                asciidoctor-pdf $FILE $ADOC_OUTPUT_DIR $ADOC_LIBRARY $ADOC_LIBRARY_DOCS $ADOC_LIBRARY_HOME $ADOC_SKB_ATTRIBUTES -a toc=left
-                ;;
-            *)
-                ConsoleError "  ->" "libadoc: unknown target $TARGET"
-                ;;
-        esac
-    done
+## dependency graph of includes: only documents with changed includes (or without output) are rendered
+ADOC_DEPS="${CONFIG_MAP["APP_HOME"]}/bin/python/skb-adoc-deps.py --output-directory $OUTPUT_DIR --docs-directory ${CONFIG_MAP["LIBRARY_DOCS"]} $ADOC_LIBRARY $ADOC_LIBRARY_DOCS $ADOC_LIBRARY_HOME"
+if [[ $FORCE == true ]]; then
+    ADOC_DEPS+=" --all"
+fi
+
+ADOC_RENDER="${CONFIG_MAP["APP_HOME"]}/bin/python/skb-adoc-render.py --output-directory $OUTPUT_DIR --graph $OUTPUT_DIR/.adoc-deps.json $ADOC_LIBRARY $ADOC_LIBRARY_DOCS $ADOC_LIBRARY_HOME $ADOC_SKB_ATTRIBUTES -a toc=left"
+if [[ -n "$JOBS" ]]; then
+    ADOC_RENDER+=" --jobs $JOBS"
+fi
+if [[ $BATCH == true ]]; then
+    ADOC_RENDER+=" --batch 0"
+fi
+
+for TARGET in $TARGETS; do
+    DOCS=$($ADOC_DEPS --target $TARGET ${CONFIG_MAP["LIBRARY_DOCS"]}/*.adoc)
+    if [[ -z $DOCS ]]; then
+        ConsoleInfo "  -->" "libadoc: all documents for target $TARGET are up to date"
+        continue
+    fi
+    ConsoleDebug "building files for target $TARGET: $DOCS"
+    $ADOC_RENDER --target $TARGET $DOCS
 done
 
 
@@ -149,74 +149,21 @@ if [[ -n "${CONFIG_MAP["LIBRARY_BIB_FILE"]:-}" ]]; then
     fi
 fi
 
-FILE_EXT="-biblatex.bib"
+LIBBIB_ARGS=" -y ${CONFIG_MAP["LIBRARY_YAML"]}"
 if [[ $DO_BIB == true ]]; then
-    FILE_EXT=".bib"
+    LIBBIB_ARGS+=" --bib"
+fi
+if [[ -n "${CONFIG_MAP["LATEX_AUX"]:-}" ]]; then
+    LIBBIB_ARGS+=" --aux ${CONFIG_MAP["LATEX_AUX"]:-}"
+fi
+if [[ -n "${CONFIG_MAP["LIBRARY_BIB_FILE"]:-}" ]]; then
+    LIBBIB_ARGS+=" --output-file ${CONFIG_MAP["LIBRARY_BIB_FILE"]:-}"
 fi
 
-AUX=$(cat ${CONFIG_MAP["LATEX_AUX"]:-})
-REFERENCES=
-for LINE in $AUX; do
-    case $LINE in
-        *"abx@aux@cite"*)
-            LINE=${LINE#*\{}
-            LINE=${LINE%\}*}
-            REFERENCES=(${REFERENCES[@]:-} $LINE)
-            ;;
-        *)
-            ;;
-    esac
-done
-
-FILE_SET=
-for i in ${!REFERENCES[@]}; do
-    ID=${REFERENCES[$i]}
-    FILE="${ID#cite:}"
-    FILE="${CONFIG_MAP["LIBRARY_YAML"]}/${FILE//+([:])/\/}${FILE_EXT}"
-    if [[ -r "${FILE}" ]]; then
-        FILE_SET=(${FILE_SET[@]:-} $FILE)
-    fi
-#     printf "%s -- %s\n" "$ID" "$FILE"
-done
-
-if [[ "${#FILE_SET[@]}" > 0 ]]; then
-    rm "${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-    echo > "${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-    for i in ${!FILE_SET[@]}; do
-        FILE="${FILE_SET[$i]}"
-        cat "$FILE" >> "${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-    done
-    ConsoleInfo "  -->" "libbib: references - ${#FILE_SET[@]} --> ${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-
-
-    REFERENCES_CR=
-    while read LINE; do
-        case $LINE in
-            *"crossref"*)
-                LINE=${LINE#*crossref*\{}
-                LINE=${LINE%\}*}
-                REFERENCES_CR=(${REFERENCES_CR[@]:-} $LINE)
-                ;;
-            *)
-                ;;
-        esac
-    done < "${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-    FILE_SET_CR=
-    for i in ${!REFERENCES_CR[@]}; do
-        ID=${REFERENCES_CR[$i]}
-        FILE="${ID#cite:}"
-        FILE="${CONFIG_MAP["LIBRARY_YAML"]}/${FILE//+([:])/\/}${FILE_EXT}"
-        if [[ -r "${FILE}" ]]; then
-            FILE_SET_CR=(${FILE_SET_CR[@]:-} $FILE)
-        fi
-    done
-    if [[ -n "${FILE_SET_CR:-}" && "${#FILE_SET_CR[@]}" > 0 ]]; then
-        for i in ${!FILE_SET_CR[@]}; do
-            FILE="${FILE_SET_CR[$i]}"
-            cat "$FILE" >> "${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-        done
-        ConsoleInfo "  -->" "libbib: crossrefs  - ${#FILE_SET_CR[@]} --> ${CONFIG_MAP["LIBRARY_BIB_FILE"]}"
-    fi
+${CONFIG_MAP["APP_HOME"]}/bin/python/library-bib.py $LIBBIB_ARGS
+__errno=$?
+if [[ $__errno != 0 ]]; then
+    ConsoleError "  ->" "libbib: error building BIB file"
 fi
 
 
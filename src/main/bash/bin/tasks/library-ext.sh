@@ -65,6 +65,9 @@ ConsoleResetWarnings
 ## set local variables
 ##
 BUILD_LOCAL=false
+INCREMENTAL=false
+JOBS=
+WATCH=false
 TARGETS=
 ALL=false
 CLI_SET=false
@@ -74,8 +77,8 @@ CLI_SET=false
 ##
 ## set CLI options and parse CLI
 ##
-CLI_OPTIONS=Aabhlx
-CLI_LONG_OPTIONS=help,local
+CLI_OPTIONS=Aabhij:lwx
+CLI_LONG_OPTIONS=help,incremental,jobs:,local,watch
 CLI_LONG_OPTIONS+=,all,adoc,bib,biblatex
 
 ! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name library-ext -- "$@")
@@ -93,7 +96,10 @@ while true; do
             if [[ -z ${CACHED_HELP:-} ]]; then
                 printf "\n   options\n"
                 BuildTaskHelpLine h help            "<none>"    "print help screen and exit"        $PRINT_PADDING
+                BuildTaskHelpLine i incremental     "<none>"    "only build entries that changed"   $PRINT_PADDING
+                BuildTaskHelpLine j jobs            "<N>"       "number of parallel jobs"           $PRINT_PADDING
                 BuildTaskHelpLine l local           "<none>"    "build with local links"            $PRINT_PADDING
+                BuildTaskHelpLine w watch           "<none>"    "watch sources and rebuild changes" $PRINT_PADDING
                 printf "\n   targets\n"
                 BuildTaskHelpLine A     all         "<none>"    "generate all targets"              $PRINT_PADDING
                 BuildTaskHelpLine a     adoc        "<none>"    "generate ADOC"                     $PRINT_PADDING
@@ -109,6 +115,21 @@ while true; do
             exit 0
             ;;
 
+        -i | --incremental)
+            INCREMENTAL=true
+            shift
+            ;;
+
+        -j | --jobs)
+            JOBS="$2"
+            shift 2
+            ;;
+
+        -w | --watch)
+            WATCH=true
+            shift
+            ;;
+
         -l | --local)
             BUILD_LOCAL=true
             shift
@@ -184,6 +205,18 @@ if [[ ! -z "${CONFIG_MAP["LIBRARY_URL"]:-}" ]]; then
     LIB_EXT_ARGS+=" --library-url ${CONFIG_MAP["LIBRARY_URL"]}"
 fi
 
+if [[ $INCREMENTAL == true ]]; then
+    LIB_EXT_ARGS+=" --incremental"
+fi
+
+if [[ -n "$JOBS" ]]; then
+    LIB_EXT_ARGS+=" --jobs $JOBS"
+fi
+
+if [[ $WATCH == true ]]; then
+    LIB_EXT_ARGS+=" --watch"
+fi
+
 for TARGET in $TARGETS; do
     case $TARGET in
         adoc)       LIB_EXT_ARGS+=" --adoc" ;;
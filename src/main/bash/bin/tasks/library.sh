@@ -0,0 +1,180 @@
+#!/usr/bin/env bash
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+
+##
+## library - finds SKB library entries by person, year, type, title, and URL tag
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+## put bugs into errors, safer
+set -o errexit -o pipefail -o noclobber -o nounset
+
+
+##
+## Test if we are run from parent with configuration
+## - load configuration
+##
+if [[ -z ${FW_HOME:-} || -z ${FW_L1_CONFIG-} ]]; then
+    printf " ==> please run from framework or application\n\n"
+    exit 50
+fi
+source $FW_L1_CONFIG
+CONFIG_MAP["RUNNING_IN"]="task"
+
+
+##
+## load main functions
+## - reset errors and warnings
+##
+source $FW_HOME/bin/api/_include
+ConsoleResetErrors
+ConsoleResetWarnings
+
+
+##
+## set local variables
+## - search values can have spaces and commas (person names), so arguments are collected in an array
+##
+CLI_SET=false
+LIBRARY_ARGS=()
+
+
+
+##
+## set CLI options and parse CLI
+##
+CLI_OPTIONS=hi:j:np:r:t:u:Y:
+CLI_LONG_OPTIONS=help
+CLI_LONG_OPTIONS+=,title:,jobs:,person:,role:,type:,url-tag:,year:,no-update
+
+! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name library -- "$@")
+if [[ ${PIPESTATUS[0]} -ne 0 ]]; then
+    ConsoleError "  ->" "library: unknown CLI options"
+    exit 51
+fi
+eval set -- "$PARSED"
+
+PRINT_PADDING=25
+while true; do
+    case "$1" in
+        -h | --help)
+            CACHED_HELP=$(TaskGetCachedHelp "library")
+            if [[ -z ${CACHED_HELP:-} ]]; then
+                printf "\n   options\n"
+                BuildTaskHelpLine h help            "<none>"    "print help screen and exit"                                    $PRINT_PADDING
+                BuildTaskHelpLine i title           "<string>"  "search for string in title"                                    $PRINT_PADDING
+                BuildTaskHelpLine j jobs            "<N>"       "parse changed YAML files with N parallel jobs, 0 for all CPUs" $PRINT_PADDING
+                BuildTaskHelpLine p person          "<name>"    "search for person, exact name or part of names"                $PRINT_PADDING
+                BuildTaskHelpLine r role            "<role>"    "only persons in role: authors, editors, presenters, panelists" $PRINT_PADDING
+                BuildTaskHelpLine t type            "<type>"    "search for entry type"                                         $PRINT_PADDING
+                BuildTaskHelpLine u url-tag         "<tag>"     "search for entries with URL tag, e.g. doi"                     $PRINT_PADDING
+                BuildTaskHelpLine Y year            "<range>"   "search for year or year range, e.g. 2015-2019"                 $PRINT_PADDING
+                BuildTaskHelpLine n no-update       "<none>"    "use library index as it is, do not check for changed files"    $PRINT_PADDING
+            else
+                cat $CACHED_HELP
+            fi
+            exit 0
+            ;;
+
+        -i | --title)
+            LIBRARY_ARGS+=(--title "$2")
+            CLI_SET=true
+            shift 2
+            ;;
+
+        -j | --jobs)
+            LIBRARY_ARGS+=(--jobs "$2")
+            shift 2
+            ;;
+
+        -p | --person)
+            LIBRARY_ARGS+=(--person "$2")
+            CLI_SET=true
+            shift 2
+            ;;
+
+        -r | --role)
+            LIBRARY_ARGS+=(--role "$2")
+            shift 2
+            ;;
+
+        -t | --type)
+            LIBRARY_ARGS+=(--type "$2")
+            CLI_SET=true
+            shift 2
+            ;;
+
+        -u | --url-tag)
+            LIBRARY_ARGS+=(--url-tag "$2")
+            CLI_SET=true
+            shift 2
+            ;;
+
+        -Y | --year)
+            LIBRARY_ARGS+=(--year "$2")
+            CLI_SET=true
+            shift 2
+            ;;
+
+        -n | --no-update)
+            LIBRARY_ARGS+=(--no-update)
+            shift
+            ;;
+
+        --)
+            shift
+            break
+            ;;
+        *)
+            ConsoleFatal "  ->" "library: internal error (task): CLI parsing bug"
+            exit 52
+    esac
+done
+
+
+
+############################################################################################
+## test requirements and CLI
+############################################################################################
+
+
+
+############################################################################################
+##
+## ready to go
+##
+############################################################################################
+ConsoleInfo "  -->" "lib: starting task"
+
+${CONFIG_MAP["APP_HOME"]}/bin/python/library.py -y "${CONFIG_MAP["LIBRARY_YAML"]}" "${LIBRARY_ARGS[@]}"
+__errno=$?
+exit $?
+
+
+ConsoleInfo "  -->" "lib: done"
+exit $TASK_ERRORS
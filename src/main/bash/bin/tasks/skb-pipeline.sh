@@ -0,0 +1,224 @@
+#!/usr/bin/env bash
+
+#-------------------------------------------------------------------------------
+# ============LICENSE_START=======================================================
+#  Copyright (C) 2018 Sven van der Meer. All rights reserved.
+# ================================================================================
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# 
+#      http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+# SPDX-License-Identifier: Apache-2.0
+# ============LICENSE_END=========================================================
+#-------------------------------------------------------------------------------
+
+##
+## skb-pipeline - runs validation, extraction, acronym build, and LaTeX list in one process
+##
+## @author     Sven van der Meer <vdmeer.sven@mykolab.com>
+## @version    v0.0.0
+##
+
+
+##
+## DO NOT CHANGE CODE BELOW, unless you know what you are doing
+##
+
+## put bugs into errors, safer
+set -o errexit -o pipefail -o noclobber -o nounset
+
+
+##
+## Test if we are run from parent with configuration
+## - load configuration
+##
+if [[ -z ${FW_HOME:-} || -z ${FW_L1_CONFIG-} ]]; then
+    printf " ==> please run from framework or application\n\n"
+    exit 50
+fi
+source $FW_L1_CONFIG
+CONFIG_MAP["RUNNING_IN"]="task"
+
+
+##
+## load main functions
+## - reset errors and warnings
+##
+source $FW_HOME/bin/api/_include
+ConsoleResetErrors
+ConsoleResetWarnings
+
+
+##
+## set local variables
+##
+STAGES=
+ALL=false
+CLI_SET=false
+
+
+
+##
+## set CLI options and parse CLI
+##
+CLI_OPTIONS=Aabehlv
+CLI_LONG_OPTIONS=help
+CLI_LONG_OPTIONS+=,all,acronyms,bib,extract,latex,validate
+
+! PARSED=$(getopt --options "$CLI_OPTIONS" --longoptions "$CLI_LONG_OPTIONS" --name skb-pipeline -- "$@")
+if [[ ${PIPESTATUS[0]} -ne 0 ]]; then
+    ConsoleError "  ->" "skb-pipeline: unknown CLI options"
+    exit 51
+fi
+eval set -- "$PARSED"
+
+PRINT_PADDING=25
+while true; do
+    case "$1" in
+        -h | --help)
+            CACHED_HELP=$(TaskGetCachedHelp "skb-pipeline")
+            if [[ -z ${CACHED_HELP:-} ]]; then
+                printf "\n   options\n"
+                BuildTaskHelpLine h help            "<none>"    "print help screen and exit"                $PRINT_PADDING
+                printf "\n   stages\n"
+                BuildTaskHelpLine A     all         "<none>"    "run all stages"                            $PRINT_PADDING
+                BuildTaskHelpLine v     validate    "<none>"    "validate library and acronyms"             $PRINT_PADDING
+                BuildTaskHelpLine e     extract     "<none>"    "extract ADOC from library"                 $PRINT_PADDING
+                BuildTaskHelpLine b     bib         "<none>"    "extract BiBTeX and Biblatex from library"  $PRINT_PADDING
+                BuildTaskHelpLine a     acronyms    "<none>"    "build acronym ADOC"                        $PRINT_PADDING
+                BuildTaskHelpLine l     latex       "<none>"    "build acronym list for LaTeX"              $PRINT_PADDING
+                printf "\n   Notes\n"
+                printf "Without stages, validate, extract, and acronyms are run\n"
+                printf "All stages run in one process over a single load of the YAML sources\n"
+            else
+                cat $CACHED_HELP
+            fi
+            exit 0
+            ;;
+
+        -A | --all)
+            ALL=true
+            CLI_SET=true
+            shift
+            ;;
+        -v | --validate)
+            STAGES=$STAGES" validate"
+            CLI_SET=true
+            shift
+            ;;
+        -e | --extract)
+            STAGES=$STAGES" extract"
+            CLI_SET=true
+            shift
+            ;;
+        -b | --bib)
+            STAGES=$STAGES" bib"
+            CLI_SET=true
+            shift
+            ;;
+        -a | --acronyms)
+            STAGES=$STAGES" acronyms"
+            CLI_SET=true
+            shift
+            ;;
+        -l | --latex)
+            STAGES=$STAGES" latex"
+            CLI_SET=true
+            shift
+            ;;
+
+        --)
+            shift
+            break
+            ;;
+        *)
+            ConsoleFatal "  ->" "skb-pipeline: internal error (task): CLI parsing bug"
+            exit 52
+    esac
+done
+
+
+
+############################################################################################
+## test requirements and CLI
+############################################################################################
+if [[ $ALL == true ]]; then
+    STAGES="validate extract bib acronyms latex"
+fi
+if [[ $CLI_SET == false ]]; then
+    STAGES="validate extract acronyms"
+fi
+
+
+
+############################################################################################
+##
+## ready to go
+##
+############################################################################################
+ConsoleInfo "  -->" "pipeline: starting task"
+
+PIPELINE_ARGS=
+LIB_EXT_TARGETS=
+for STAGE in $STAGES; do
+    case $STAGE in
+        extract)    LIB_EXT_TARGETS+=" --adoc" ;;
+        bib)        LIB_EXT_TARGETS+=" --bibtex --biblatex" ;;
+    esac
+done
+
+for STAGE in $STAGES; do
+    case $STAGE in
+        validate)
+            PIPELINE_ARGS+=" -- library-val -y ${CONFIG_MAP["LIBRARY_YAML"]}"
+            if [[ -n "${CONFIG_MAP["ACRONYM_YAML"]:-}" ]]; then
+                PIPELINE_ARGS+=" -- acronyms-val -y ${CONFIG_MAP["ACRONYM_YAML"]}"
+            fi
+            ;;
+        extract | bib)
+            if [[ -n "$LIB_EXT_TARGETS" ]]; then
+                PIPELINE_ARGS+=" -- library-ext -y ${CONFIG_MAP["LIBRARY_YAML"]} --output-directory ${CONFIG_MAP["TARGET"]}/library $LIB_EXT_TARGETS"
+                if [[ ! -z "${CONFIG_MAP["LIBRARY_URL"]:-}" ]]; then
+                    PIPELINE_ARGS+=" --library-url ${CONFIG_MAP["LIBRARY_URL"]}"
+                fi
+                LIB_EXT_TARGETS=
+            fi
+            ;;
+        acronyms)
+            if [[ -z "${CONFIG_MAP["ACRONYM_YAML"]:-}" ]]; then
+                ConsoleError "  ->" "pipeline: 'ACRONYM_YAML' not set, cannot build acronyms"
+                exit 61
+            fi
+            PIPELINE_ARGS+=" -- acronyms-build -y ${CONFIG_MAP["ACRONYM_YAML"]} --output-directory ${CONFIG_MAP["TARGET"]}/acronyms --adoc"
+            ;;
+        latex)
+            if [[ -z "${CONFIG_MAP["ACRONYM_YAML"]:-}" ]]; then
+                ConsoleError "  ->" "pipeline: 'ACRONYM_YAML' not set, cannot build acronym list"
+                exit 61
+            fi
+            PIPELINE_ARGS+=" -- acronyms-latex -y ${CONFIG_MAP["ACRONYM_YAML"]}"
+            if [[ -n "${CONFIG_MAP["LATEX_AUX"]:-}" ]]; then
+                PIPELINE_ARGS+=" --aux ${CONFIG_MAP["LATEX_AUX"]}"
+            fi
+            if [[ -n "${CONFIG_MAP["ACRONYM_LATEX_FILE"]:-}" ]]; then
+                PIPELINE_ARGS+=" --output-file ${CONFIG_MAP["ACRONYM_LATEX_FILE"]}"
+            fi
+            ;;
+    esac
+done
+
+${CONFIG_MAP["APP_HOME"]}/bin/python/skb-pipeline.py $PIPELINE_ARGS
+__errno=$?
+exit $?
+
+
+ConsoleInfo "  -->" "pipeline: done"
+exit $TASK_ERRORS